@@ -0,0 +1,294 @@
+import hashlib
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+
+from dldmodel import (CELL_DIAMETERS, DEFAULT_DEPTH, PARABOLIC, WATER_VISCOSITY, DLDDesign, duct_resistance,
+                      lateral_displacement, simulated_critical_diameter)
+
+# Surrogate tables are kept here, so later searches skip the particle simulations
+DESIGN_CACHE_DIR = os.environ.get("DLD_DESIGN_CACHE", "design_cache")
+
+# Row shift fractions at which the surrogate samples the particle model
+SURROGATE_ROW_SHIFTS = np.geomspace(0.004, 0.35, 48)
+
+# Particle model settings: per-row flux noise and particles per size
+DEFAULT_JITTER = 0.01
+DEFAULT_PARTICLES = 64
+
+# Candidate designs searched by default: gaps and pillar radii in micrometres, row shift fractions
+DEFAULT_GAPS = np.arange(4.0, 101.0, 1.0)
+DEFAULT_RADII = np.arange(2.5, 40.1, 2.5)
+DEFAULT_ROW_SHIFTS = np.geomspace(0.005, 0.3, 80)
+
+# Constraints a search uses unless told otherwise
+DEFAULT_CONSTRAINTS = {
+    "flow_rate": 20.0,  # µL/min the chip has to process
+    "max_pressure": 1e5,  # Pa available to drive it
+    "max_footprint": 500.0,  # mm² of pillar array
+    "clog_margin": 1.5,  # smallest of gap and depth over the largest particle
+    "max_aspect_ratio": 2.0,  # depth over pillar diameter, above which pillars are hard to fabricate
+    "largest_particle": max(CELL_DIAMETERS.values()),  # µm
+    "separation": 300.0,  # µm bumped particles must be displaced
+    "depth": DEFAULT_DEPTH,  # µm
+}
+
+# Weight of the footprint (as a fraction of max_footprint) against the relative Dc error
+FOOTPRINT_WEIGHT = 0.02
+
+# Candidates verified with the particle model per design returned
+VERIFY_OVERSAMPLING = 3
+
+# Surrogates already loaded in this process, and how many of them are kept
+SURROGATES = {}
+MAX_SURROGATES = 32
+
+
+def parallel_map(function, *iterables, workers=None):
+    """map over a process pool, or in this process when workers is 1"""
+    if workers == 1:
+        return list(map(function, *iterables))
+    with ProcessPoolExecutor(workers) as pool:
+        return list(pool.map(function, *iterables))
+
+
+def cached_npz(key_parts, cache_dir, build, load, prefix, memory, max_entries):
+    """
+    An object computed at most once, kept in memory and as one .npz under cache_dir.
+
+    key_parts are hashed into the key, bytes as they are and anything else
+    through repr (NumPy scalars as the Python number they hold). Missing from memory, the object is loaded from
+    prefix-<key>.npz if that exists; otherwise build() returns a dict of
+    arrays, which is written atomically (.partial.npz, then renamed).
+    load(arrays, key) makes the object either way. memory is a dict holding
+    at most max_entries objects; the least recently used go first.
+    """
+    digest = hashlib.blake2b(digest_size=12)
+    for part in key_parts:
+        if isinstance(part, np.generic):
+            part = part.item()
+        digest.update(part if isinstance(part, bytes) else repr(part).encode())
+        digest.update(b"|")
+    key = digest.hexdigest()
+    if key in memory:
+        # Move it to the end, which keeps the dict in least recently used order
+        memory[key] = memory.pop(key)
+        return memory[key]
+
+    path = os.path.join(cache_dir, f"{prefix}-{key}.npz")
+    if os.path.exists(path):
+        with np.load(path) as saved:
+            value = load({name: saved[name] for name in saved.files}, key)
+    else:
+        arrays = build()
+        os.makedirs(cache_dir, exist_ok=True)
+        partial_path = os.path.join(cache_dir, f"{prefix}-{key}.partial.npz")
+        np.savez(partial_path, **arrays)
+        os.replace(partial_path, path)
+        value = load(arrays, key)
+    memory[key] = value
+    while len(memory) > max_entries:
+        del memory[next(iter(memory))]
+    return value
+
+
+class CriticalDiameterSurrogate:
+    """
+    Dc / G against ε, tabulated from the particle model and interpolated in log ε.
+
+    At a fixed row shift the critical diameter scales with the gap, so one
+    table of a few dozen simulations answers every (gap, pillar, ε) design.
+    """
+
+    def __init__(self, row_shifts, ratios, key=None):
+        valid = np.isfinite(ratios)
+        self.row_shifts = np.asarray(row_shifts, dtype=float)[valid]
+        self.ratios = np.asarray(ratios, dtype=float)[valid]
+        self.key = key
+
+    def __call__(self, gap, row_shift):
+        """Predicted Dc for arrays of gaps and row shifts, NaN outside the sampled row shifts"""
+        row_shift = np.asarray(row_shift, dtype=float)
+        ratio = np.interp(np.log(row_shift), np.log(self.row_shifts), self.ratios)
+        inside = (row_shift >= self.row_shifts[0]) & (row_shift <= self.row_shifts[-1])
+        return np.where(inside, np.asarray(gap, dtype=float) * ratio, np.nan)
+
+
+def load_surrogate(profile=PARABOLIC, jitter=DEFAULT_JITTER, particles=DEFAULT_PARTICLES,
+                   row_shifts=SURROGATE_ROW_SHIFTS, cache_dir=DESIGN_CACHE_DIR, workers=None):
+    """
+    The surrogate for one flow profile and particle model, built at most once.
+
+    Tables are keyed by the profile, the model settings and the sampled row
+    shifts, kept in memory (the last MAX_SURROGATES used) and saved as .npz
+    under cache_dir; the particle simulations behind a new table run in
+    parallel, one row shift each.
+    """
+    row_shifts = np.asarray(row_shifts, dtype=float)
+
+    def build():
+        simulate = partial(simulated_critical_diameter, profile=profile, jitter=jitter, particles=particles)
+        return {"row_shifts": row_shifts, "ratios": np.array(parallel_map(simulate, row_shifts, workers=workers))}
+
+    return cached_npz(
+        (profile.digest(), jitter, particles, row_shifts.tobytes()), cache_dir, build,
+        lambda table, key: CriticalDiameterSurrogate(table["row_shifts"], table["ratios"], key),
+        "surrogate", SURROGATES, MAX_SURROGATES,
+    )
+
+
+def design_metrics(gap, pillar_radius, row_shift, surrogate, flow_rate, max_pressure, depth, separation,
+                   largest_particle, viscosity=WATER_VISCOSITY, shape=None, **_):
+    """
+    Predicted performance of whole arrays of candidate designs at once.
+
+    Rows are however many it takes to displace bumped particles by
+    separation. Columns are however many gaps in parallel keep the pressure
+    for flow_rate under max_pressure, and at least enough for the array to
+    be as wide as the separation. Pillars are circles unless a shape (a
+    pillarshapes.PillarShape) is given; as in DLDDesign, the pitch and the
+    pillar width then use the shape's width across the flow. Returns a dict
+    of arrays.
+    """
+    width = 2.0 if shape is None else shape.width
+    pitch = gap + width * pillar_radius
+    num_rows = np.ceil(separation / (row_shift * pitch))
+    gap_resistance = duct_resistance(gap * 1e-6, depth * 1e-6, pitch * 1e-6, viscosity)
+    flow = flow_rate * 1e-9 / 60
+    num_columns = np.maximum(np.ceil(flow * gap_resistance * num_rows / max_pressure),
+                             np.ceil(separation / pitch) + 1)
+    return {
+        "critical_diameter": surrogate(gap, row_shift),
+        "pitch": pitch,
+        "num_rows": num_rows,
+        "num_columns": num_columns,
+        "footprint": num_rows * num_columns * pitch**2 * 1e-6,
+        "pressure": flow * gap_resistance * num_rows / num_columns,
+        "clog_margin": np.minimum(gap, depth) / largest_particle,
+        "aspect_ratio": depth / (width * pillar_radius),
+    }
+
+
+def verify_design(design, target, profile=PARABOLIC, jitter=DEFAULT_JITTER, particles=DEFAULT_PARTICLES, seed=0):
+    """
+    Runs the particle model on one design: its critical diameter at the exact
+    row shift, and how far apart particles 10% above and below the target end up
+    across the whole array, in micrometres.
+    """
+    ratio = simulated_critical_diameter(design.row_shift, profile, jitter, particles, seed)
+    sizes = np.repeat([1.1 * target, 0.9 * target], particles)
+    displacement, _ = lateral_displacement(sizes, design.gap, design.row_shift, design.num_rows, profile, jitter,
+                                           seed=seed)
+    large, small = displacement.reshape(2, particles).mean(axis=1)
+    return design.gap * ratio, (large - small) * design.pitch
+
+
+def optimize_design(target, surrogate=None, gaps=DEFAULT_GAPS, radii=DEFAULT_RADII, row_shifts=DEFAULT_ROW_SHIFTS,
+                    top_k=10, verify=True, profile=PARABOLIC, jitter=DEFAULT_JITTER, workers=None, shape=None,
+                    **constraints):
+    """
+    Ranked designs whose critical diameter is closest to target (µm).
+
+    Every combination of gaps, radii and row_shifts is scored through the
+    surrogate in one vectorized pass; designs that break a constraint (see
+    DEFAULT_CONSTRAINTS) are dropped and the rest ranked by relative Dc
+    error plus a small footprint penalty. With verify, the best few times
+    top_k are re-run through the particle model in parallel and re-ranked on
+    the simulated Dc. Returns up to top_k dicts, best first.
+
+    shape sets the pillar outline for the pitch, footprint and aspect ratio
+    of every candidate (see design_metrics). The surrogate and profile are
+    still used as given for every radius, so for shaped pillars they should
+    come from the shape's flow field (pillarshapes.shaped_design) at a
+    typical radius over pitch.
+    """
+    constraints = {**DEFAULT_CONSTRAINTS, **constraints}
+    unknown = set(constraints) - set(DEFAULT_CONSTRAINTS) - {"viscosity"}
+    if unknown:
+        raise ValueError(f"unknown constraints {sorted(unknown)}, expected some of {sorted(DEFAULT_CONSTRAINTS)}")
+    if surrogate is None:
+        surrogate = load_surrogate(profile, jitter, workers=workers)
+
+    gap, radius, row_shift = (grid.ravel() for grid in np.meshgrid(gaps, radii, row_shifts, indexing="ij"))
+    metrics = design_metrics(gap, radius, row_shift, surrogate, shape=shape, **constraints)
+    with np.errstate(invalid="ignore"):
+        feasible = (
+            np.isfinite(metrics["critical_diameter"])
+            & (metrics["footprint"] <= constraints["max_footprint"])
+            & (metrics["clog_margin"] >= constraints["clog_margin"])
+            & (metrics["aspect_ratio"] <= constraints["max_aspect_ratio"])
+        )
+    error = np.abs(metrics["critical_diameter"] - target) / target
+    score = error + FOOTPRINT_WEIGHT * metrics["footprint"] / constraints["max_footprint"]
+    candidates = np.flatnonzero(feasible)
+    keep = top_k * (VERIFY_OVERSAMPLING if verify else 1)
+    candidates = candidates[np.argsort(score[candidates], kind="stable")[:keep]]
+
+    rows = []
+    for i in candidates:
+        design = DLDDesign(gap[i], radius[i], row_shift[i], constraints["depth"], metrics["num_rows"][i],
+                           metrics["num_columns"][i], profile, shape)
+        rows.append({
+            "design": design,
+            "target": target,
+            "predicted_dc": float(metrics["critical_diameter"][i]),
+            "footprint": float(metrics["footprint"][i]),
+            "pressure": float(metrics["pressure"][i]),
+            "clog_margin": float(metrics["clog_margin"][i]),
+            "score": float(score[i]),
+        })
+
+    if verify and rows:
+        check = partial(verify_design, target=target, profile=profile, jitter=jitter)
+        for row, (dc, separation) in zip(rows, parallel_map(check, [row["design"] for row in rows], workers=workers)):
+            row["simulated_dc"] = dc
+            row["separation"] = separation
+            row["score"] = (abs(dc - target) / target
+                            + FOOTPRINT_WEIGHT * row["footprint"] / constraints["max_footprint"])
+        rows.sort(key=lambda row: row["score"])
+    return rows[:top_k]
+
+
+def optimize_designs(targets, **options):
+    """optimize_design for several cut-off diameters sharing one surrogate, as {target: ranked designs}"""
+    options.setdefault("surrogate", load_surrogate(options.get("profile", PARABOLIC),
+                                                   options.get("jitter", DEFAULT_JITTER),
+                                                   workers=options.get("workers")))
+    return {target: optimize_design(target, **options) for target in targets}
+
+
+def format_designs(rows):
+    lines = [f"{'gap':>6}{'radius':>8}{'ε':>8}{'rows':>7}{'cols':>6}{'Dc pred':>9}{'Dc sim':>8}"
+             f"{'sep µm':>8}{'mm²':>8}{'kPa':>7}{'clog':>6}"]
+    for row in rows:
+        design = row["design"]
+        lines.append(
+            f"{design.gap:>6.1f}{design.pillar_radius:>8.1f}{design.row_shift:>8.4f}{design.num_rows:>7}"
+            f"{design.num_columns:>6}{row['predicted_dc']:>9.2f}{row.get('simulated_dc', np.nan):>8.2f}"
+            f"{row.get('separation', np.nan):>8.0f}{row['footprint']:>8.1f}{row['pressure'] / 1000:>7.1f}"
+            f"{row['clog_margin']:>6.2f}"
+        )
+    return "\n".join(lines)
+
+
+# To search designs for cut-off diameters in µm (by default between neighbouring cells of introcells.py):
+# python designopt.py 9.75 15
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        targets = [float(value) for value in sys.argv[1:]]
+    else:
+        sizes = sorted(CELL_DIAMETERS.values())
+        targets = [(small + large) / 2 for small, large in zip(sizes, sizes[1:])]
+
+    start = time.perf_counter()
+    surrogate = load_surrogate()
+    print(f"surrogate ready in {time.perf_counter() - start:.2f}s")
+    for target in targets:
+        start = time.perf_counter()
+        rows = optimize_design(target, surrogate)
+        print(f"\ntarget Dc {target:g} µm ({time.perf_counter() - start:.2f}s)")
+        print(format_designs(rows) if rows else "no design meets the constraints")
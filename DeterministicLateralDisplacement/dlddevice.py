@@ -0,0 +1,308 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+from designopt import DEFAULT_JITTER, DESIGN_CACHE_DIR, cached_npz
+from dldmodel import CELL_DIAMETERS, DLDDesign, particle_steps
+
+# Section transfer maps are kept here, so devices sharing a section reuse its map
+TRANSFER_CACHE_DIR = os.path.join(DESIGN_CACHE_DIR, "transfer")
+
+# Flux bins across a gap, and particles simulated per bin, for one transfer map
+TRANSFER_BINS = 64
+TRANSFER_SAMPLES = 32
+
+# Width in micrometres of the lateral bins of a device's position distributions
+LATERAL_BIN = 5.0
+
+# Transfer maps already loaded in this process, and how many of them are kept
+TRANSFER_MAPS = {}
+MAX_TRANSFER_MAPS = 128
+
+
+class TransferMap:
+    """
+    What one section does to particles of one size, wherever they enter it.
+
+    kernel[i, j, k] is the probability that a particle entering the section
+    in flux bin i leaves it in flux bin j, carried displacements[k] pitches
+    across the flow. It only depends on the diameter over the gap, ε, the
+    row count, the gap profile and the jitter, so sections with another
+    pitch, or in another device, share it.
+    """
+
+    def __init__(self, kernel, displacements, key=None):
+        self.kernel = kernel
+        self.displacements = displacements
+        self.key = key
+
+    @property
+    def num_bins(self):
+        return self.kernel.shape[0]
+
+    def apply(self, state, bin_shift):
+        """
+        Moves a (lateral bins, flux bins) distribution through the section.
+
+        bin_shift is the width of one pitch in lateral bins. Each possible
+        displacement is one matrix product over the flux bins and a shift
+        along the lateral axis, split between the two nearest bins.
+        """
+        moved = np.zeros_like(state)
+        for k, displacement in enumerate(self.displacements):
+            part = state @ self.kernel[:, :, k]
+            shift = displacement * bin_shift
+            low = int(np.floor(shift))
+            weight = shift - low
+            shift_rows(part, low, 1 - weight, moved)
+            if weight:
+                shift_rows(part, low + 1, weight, moved)
+        return moved
+
+
+def shift_rows(values, offset, weight, out):
+    """Adds weight * values moved offset rows down into out; rows pushed past either end pile up in the end row"""
+    n = len(values)
+    if offset >= n or offset <= -n:
+        out[-1 if offset > 0 else 0] += weight * values.sum(axis=0)
+        return
+    if offset >= 0:
+        out[offset:] += weight * values[:n - offset]
+        out[-1] += weight * values[n - offset:].sum(axis=0)
+    else:
+        out[:offset] += weight * values[-offset:]
+        out[0] += weight * values[:-offset].sum(axis=0)
+
+
+def transfer_map(diameter_ratio, row_shift, num_rows, profile, jitter=DEFAULT_JITTER, bins=TRANSFER_BINS,
+                 samples=TRANSFER_SAMPLES, seed=0, cache_dir=TRANSFER_CACHE_DIR):
+    """
+    The TransferMap of one section for one particle size, simulated at most once.
+
+    samples particles start spread across every flux bin and are moved
+    through all num_rows rows together; maps are kept in memory (the last
+    MAX_TRANSFER_MAPS used) and saved as .npz under cache_dir, keyed by
+    everything they depend on.
+    """
+    def build():
+        rng = np.random.default_rng(seed)
+        entry = np.repeat(np.arange(bins), samples)
+        start = (entry + rng.random(len(entry))) / bins
+        sizes = np.full(len(entry), float(diameter_ratio))
+        for _, flux, columns in particle_steps(sizes, 1.0, row_shift, num_rows, profile, jitter, start, seed):
+            pass
+        exit_bin = np.minimum((flux * bins).astype(np.int64), bins - 1)
+        lowest = columns.min()
+        kernel = np.zeros((bins, bins, columns.max() - lowest + 1))
+        np.add.at(kernel, (entry, exit_bin, columns - lowest), 1.0 / samples)
+        displacements = row_shift * num_rows + np.arange(lowest, columns.max() + 1)
+        return {"kernel": kernel, "displacements": displacements}
+
+    return cached_npz(
+        (profile.digest(), diameter_ratio, row_shift, num_rows, jitter, bins, samples, seed), cache_dir, build,
+        lambda saved, key: TransferMap(saved["kernel"], saved["displacements"], key),
+        "transfer", TRANSFER_MAPS, MAX_TRANSFER_MAPS,
+    )
+
+
+def profile_remap(source, target, bins=TRANSFER_BINS):
+    """(bins, bins) matrix taking flux bins of one gap profile to the bins at the same place in another's gap"""
+    centers = (np.arange(bins) + 0.5) / bins
+    moved = np.minimum((target.flux(source.position(centers)) * bins).astype(np.int64), bins - 1)
+    remap = np.zeros((bins, bins))
+    remap[np.arange(bins), moved] = 1
+    return remap
+
+
+class DLDDevice:
+    """
+    A chip made of DLD sections one after another, all width micrometres wide.
+
+    sections are DLDDesigns; each one's num_rows is used as given and its
+    num_columns follows from the width. Particles keep their lateral
+    position and their place in the gap from one section to the next, and
+    the side walls stop any that are carried further.
+    """
+
+    def __init__(self, sections, width):
+        self.sections = list(sections)
+        self.width = float(width)
+
+    def columns(self, section):
+        return int(np.ceil(self.width / section.pitch))
+
+    @property
+    def length(self):
+        """Length of the pillar arrays in micrometres"""
+        return sum(section.num_rows * section.pitch for section in self.sections)
+
+    def pressure_drop(self, flow_rate):
+        """Pressure in Pa to push flow_rate microlitres per minute through every section"""
+        total = 0.0
+        for section in self.sections:
+            sized = DLDDesign(section.gap, section.pillar_radius, section.row_shift, section.depth, section.num_rows,
+                              self.columns(section), section.profile, shape=section.shape)
+            total += sized.pressure_drop(flow_rate)
+        return total
+
+    def critical_diameters(self):
+        return [section.critical_diameter() for section in self.sections]
+
+
+class DeviceResult:
+    """
+    Lateral distributions of each particle size after every section of a device.
+
+    distributions[s, i] is the histogram over lateral bins (centers, in
+    micrometres) of size diameters[s] at the inlet (i = 0) and after each
+    section (i = 1, 2, ...); every histogram sums to one.
+    """
+
+    def __init__(self, diameters, centers, distributions):
+        self.diameters = np.asarray(diameters, dtype=float)
+        self.centers = centers
+        self.distributions = distributions
+
+    def outlet_fractions(self, bounds, section=-1):
+        """(sizes, outlets) fractions of each size leaving through the lateral bands between consecutive bounds"""
+        band = np.searchsorted(bounds, self.centers, side="right") - 1
+        band = np.clip(band, 0, len(bounds) - 2)
+        fractions = np.zeros((len(self.diameters), len(bounds) - 1))
+        for outlet in range(len(bounds) - 1):
+            fractions[:, outlet] = self.distributions[:, section, band == outlet].sum(axis=1)
+        return fractions
+
+    def mean_positions(self):
+        """(sizes, sections + 1) mean lateral position of each size at the inlet and after each section"""
+        return self.distributions @ self.centers
+
+
+def simulate_device(device, diameters, inlet=None, jitter=DEFAULT_JITTER, lateral_bin=LATERAL_BIN,
+                    bins=TRANSFER_BINS, samples=TRANSFER_SAMPLES, seed=0):
+    """
+    Streams the position distribution of each particle size through every section.
+
+    The state of one size is a (lateral bins, flux bins) distribution,
+    starting uniform over the inlet band (start, end) in micrometres (the
+    first tenth of the width by default) and over the gap. Each section
+    moves it with its cached TransferMap, so simulating a chip costs a few
+    matrix products per section instead of a pass per row, and devices that
+    share sections reuse their maps. Returns a DeviceResult.
+    """
+    diameters = np.asarray(diameters, dtype=float)
+    start, end = (0.0, device.width / 10) if inlet is None else inlet
+    num_lateral = int(np.ceil(device.width / lateral_bin))
+    centers = (np.arange(num_lateral) + 0.5) * device.width / num_lateral
+    inlet_bins = (centers >= start) & (centers <= end)
+    if not inlet_bins.any():
+        inlet_bins[min(int(start / device.width * num_lateral), num_lateral - 1)] = True
+
+    distributions = np.zeros((len(diameters), len(device.sections) + 1, num_lateral))
+    for s, diameter in enumerate(diameters):
+        state = np.zeros((num_lateral, bins))
+        state[inlet_bins] = 1.0 / (inlet_bins.sum() * bins)
+        distributions[s, 0] = state.sum(axis=1)
+        profile = None
+        for i, section in enumerate(device.sections):
+            if profile is not None and profile.digest() != section.profile.digest():
+                state = state @ profile_remap(profile, section.profile, bins)
+            profile = section.profile
+            transfer = transfer_map(diameter / section.gap, section.row_shift, section.num_rows, profile, jitter,
+                                    bins, samples, seed)
+            state = transfer.apply(state, section.pitch * num_lateral / device.width)
+            distributions[s, i + 1] = state.sum(axis=1)
+    return DeviceResult(diameters, centers, distributions)
+
+
+def trace_device(device, diameters, particles=1000, inlet=None, jitter=DEFAULT_JITTER, seed=0):
+    """
+    Monte Carlo reference for simulate_device: every particle moved through every row.
+
+    Returns (sizes, particles) lateral positions in micrometres at the
+    outlet of the last section.
+    """
+    return np.concatenate(list(trace_batches(device, diameters, particles, inlet, jitter, seed)), axis=1)
+
+
+def trace_batches(device, diameters, particles=1000, inlet=None, jitter=DEFAULT_JITTER, seed=0, batch=None):
+    """
+    trace_device a batch of particles at a time, for runs too large to hold at once.
+
+    Yields (sizes, batch) outlet positions for at most batch particles of
+    each size at a time (all of them by default). Batch k draws its
+    particles from seed + k (len(sections) + 1), so batches never share a
+    random stream and the first one matches trace_device with the same seed.
+    """
+    diameters = np.asarray(diameters, dtype=float)
+    start, end = (0.0, device.width / 10) if inlet is None else inlet
+    batch = particles if batch is None else batch
+    for number, low in enumerate(range(0, particles, batch)):
+        count = min(batch, particles - low)
+        batch_seed = seed + number * (len(device.sections) + 1)
+        rng = np.random.default_rng(batch_seed)
+        sizes = np.repeat(diameters, count)
+        lateral = start + rng.random(len(sizes)) * (end - start)
+        flux = rng.random(len(sizes))
+        profile = None
+        for i, section in enumerate(device.sections):
+            if profile is not None:
+                flux = section.profile.flux(profile.position(flux))
+            profile = section.profile
+            for row, flux, columns in particle_steps(sizes, section.gap, section.row_shift, section.num_rows,
+                                                     profile, jitter, flux, batch_seed + i + 1):
+                pass
+            lateral = np.clip(lateral + (section.row_shift * row + columns) * section.pitch, 0, device.width)
+        yield lateral.reshape(len(diameters), count)
+
+
+def format_outlets(result, bounds, names=None):
+    names = [f"{d:g} µm" for d in result.diameters] if names is None else names
+    fractions = result.outlet_fractions(bounds)
+    lines = [f"{'':>10}" + "".join(f"{f'{lo:.0f}-{hi:.0f} µm':>14}" for lo, hi in zip(bounds, bounds[1:]))]
+    for name, row in zip(names, fractions):
+        lines.append(f"{name:>10}" + "".join(f"{fraction:>14.3f}" for fraction in row))
+    return "\n".join(lines)
+
+
+# To stream the cells of introcells.py through a three-section chip, then through a variant
+# that shares two of its sections (width in µm):
+# python dlddevice.py 600
+if __name__ == "__main__":
+    width = float(sys.argv[1]) if len(sys.argv) > 1 else 600.0
+    names = list(CELL_DIAMETERS)
+    diameters = list(CELL_DIAMETERS.values())
+
+    # Sections sorting CTCs, then WBCs, then RBCs towards the far wall (cut-offs from designopt.py)
+    ctc = DLDDesign(34, 15, 0.1121, num_rows=60)
+    wbc = DLDDesign(29, 17.5, 0.0602, num_rows=60)
+    rbc = DLDDesign(20, 10, 0.05, num_rows=100)
+    device = DLDDevice([ctc, wbc, rbc], width)
+    print(f"lane-model critical diameters {', '.join(f'{dc:.1f}' for dc in device.critical_diameters())} µm, "
+          f"length {device.length / 1000:.1f} mm, {device.pressure_drop(20) / 1000:.1f} kPa at 20 µL/min")
+    # Outlet channels: platelets stay by the inlet wall, CTCs end up against the far one
+    bounds = np.array([0, 0.2, 0.53, 0.9, 1]) * width
+
+    start = time.perf_counter()
+    result = simulate_device(device, diameters)
+    first = time.perf_counter() - start
+    print(f"\nsimulated with new transfer maps in {first:.2f}s")
+    print(format_outlets(result, bounds, names))
+
+    start = time.perf_counter()
+    traced = trace_device(device, diameters)
+    traced_seconds = time.perf_counter() - start
+    traced_fractions = np.stack([np.histogram(positions, bounds)[0] / positions.size for positions in traced])
+    difference = np.abs(traced_fractions - result.outlet_fractions(bounds)).max()
+    print(f"row-by-row Monte Carlo of 1000 particles per size in {traced_seconds:.2f}s, "
+          f"largest outlet fraction difference {difference:.3f}")
+
+    # A variant with a longer RBC section reuses the CTC and WBC maps
+    variant = DLDDevice([ctc, wbc, DLDDesign(20, 10, 0.05, num_rows=110)], width)
+    start = time.perf_counter()
+    simulate_device(variant, diameters)
+    print(f"variant sharing two sections simulated in {time.perf_counter() - start:.2f}s")
+    start = time.perf_counter()
+    simulate_device(device, diameters)
+    print(f"original device again, every map cached, in {time.perf_counter() - start:.3f}s")
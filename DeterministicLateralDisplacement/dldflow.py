@@ -1,6 +1,9 @@
 from manim import *
 import numpy as np
 
+from pillars import PillarArray, pillar_lattice_centers
+from streamlines import StreamlineBundle
+
 class DeterministicLateralDisplacement(Scene):
     def construct(self):
         # Configuration
@@ -427,72 +430,58 @@ class DeterministicLateralDisplacement(Scene):
     
     def create_curved_streamlines(self, entire_array, num_flow_lines=15):
         """Creates curved streamlines that navigate around the pillar array"""
-        streamlines = VGroup()
-        
         # Get array bounds
         array_left = entire_array.get_left()[0] - 0.5
         array_right = entire_array.get_right()[0] + 0.5
         array_top = entire_array.get_top()[1] + 0.5
         array_bottom = entire_array.get_bottom()[1] - 0.5
         
-        # Create starting points at the top
-        for i in range(num_flow_lines):
-            # Distribute evenly across the width of the array
-            x_pos = array_left + (array_right - array_left) * i / (num_flow_lines - 1)
-            start_point = [x_pos, array_top + 1, 0]
-            
-            # Create a series of points to define the curved path
-            points = [start_point]
-            
-            # Number of control points to add for the curve
-            num_control_points = 12
-            
-            for j in range(1, num_control_points - 1):
-                # Calculate y position interpolating from top to bottom
-                y_pos = array_top + 1 - (j * ((array_top + 1) - (array_bottom - 1)) / (num_control_points - 1))
-                
-                # For even rows, add a slight rightward bias to simulate fluid flow around pillars
-                # For odd rows, add a slight leftward bias
-                if j % 2 == 0:
-                    x_offset = 0.15 * np.sin(j * PI / 4)
-                else:
-                    x_offset = -0.15 * np.sin(j * PI / 4)
-                
-                # Add some randomness to the path
-                x_random = 0.05 * np.random.randn()
-                
-                # Calculate new x position with offset
-                new_x = x_pos + x_offset + x_random
-                
-                # Add the point to the path
-                points.append([new_x, y_pos, 0])
-            
-            # Add final point at the bottom
-            points.append([x_pos, array_bottom - 1, 0])
-            
-            # Instead of creating multiple bezier segments, create a single curve
-            # Create a simple smooth path through the points
-            streamline = VMobject(color=TEAL, stroke_width=1.5, stroke_opacity=0.8)
-            streamline.set_points_smoothly(points)
-            
-            # Store the start point explicitly for easier access
-            streamline.flow_start = points[0]
-            
-            streamlines.add(streamline)
+        # Number of control points to add for each curve
+        num_control_points = 12
+        
+        # Starting x positions, distributed evenly across the width of the array
+        x_starts = array_left + (array_right - array_left) * np.arange(num_flow_lines) / (num_flow_lines - 1)
+        
+        # Interior control points, interpolating y from top to bottom
+        j = np.arange(1, num_control_points - 1)
+        y_positions = array_top + 1 - (j * ((array_top + 1) - (array_bottom - 1)) / (num_control_points - 1))
+        
+        # For even rows, add a slight rightward bias to simulate fluid flow around pillars
+        # For odd rows, add a slight leftward bias
+        x_offsets = np.where(j % 2 == 0, 1, -1) * 0.15 * np.sin(j * PI / 4)
+        
+        # Add some randomness to every path at once
+        x_random = 0.05 * np.random.randn(num_flow_lines, len(j))
+        
+        # Build all paths as one (num_flow_lines, num_control_points, 3) array
+        points = np.zeros((num_flow_lines, num_control_points, 3))
+        points[:, :, 0] = x_starts[:, None]
+        points[:, 1:-1, 0] += x_offsets + x_random
+        points[:, 0, 1] = array_top + 1
+        points[:, 1:-1, 1] = y_positions
+        points[:, -1, 1] = array_bottom - 1
+        
+        # Fit every streamline in one pass and keep them all in a single mobject
+        streamlines = StreamlineBundle(points, color=TEAL, stroke_width=1.5, stroke_opacity=0.8)
         
         return streamlines
     
     def create_particles_on_streamlines(self, streamlines):
         """Creates particles positioned along streamlines"""
-        particles = VGroup()
         particle_streamline_pairs = []
         particle_colors = [RED, YELLOW, GREEN]
         particle_sizes = [0.08, 0.06, 0.04]
         
-        for streamline in streamlines:
+        # Use the first anchor of every streamline in the bundle
+        start_points = streamlines.get_start_points()
+        
+        for index in range(streamlines.num_streamlines):
             # Determine how many particles to place on this streamline (1-3)
             num_particles = np.random.randint(1, 4)
             
+            # Every streamline carries a particle, so each gets a standalone path shared by its particles
+            path = streamlines.get_streamline(index)
+            
             for _ in range(num_particles):
                 color_idx = np.random.randint(0, len(particle_colors))
                 size_idx = np.random.randint(0, len(particle_sizes))
@@ -504,24 +493,56 @@ class DeterministicLateralDisplacement(Scene):
                 )
                 
                 # Position it at the start of the streamline
-                # Use the first point of the streamline
-                if hasattr(streamline, 'flow_start'):
-                    # Use the explicitly stored start point if available
-                    particle.move_to(streamline.flow_start)
-                else:
-                    # Otherwise try to get the first point from the points array
-                    if len(streamline.points) > 0:
-                        particle.move_to(streamline.points[0])
-                    else:
-                        # Fallback to a safe position at the top of the stream
-                        particle.move_to(streamline.get_top())
+                particle.move_to(start_points[index])
                 
-                # Add the particle to our collections
-                particles.add(particle)
-                particle_streamline_pairs.append((particle, streamline))
+                particle_streamline_pairs.append((particle, path))
         
         return particle_streamline_pairs
 
 
+class DLDDeviceOverview(MovingCameraScene):
+    def construct(self):
+        # Configuration for a full device rather than a handful of rows
+        num_rows = 60
+        num_columns = 200
+        pillar_color = BLUE
+
+        # Fit the whole device across the frame, keeping spacing = 2.5 * radius as above
+        pillar_spacing = (config.frame_width - 1) / num_columns
+        pillar_radius = pillar_spacing / 2.5
+        row_shift = pillar_spacing / 5  # Same Δλ = λ/5 as the main scene
+
+        centers = pillar_lattice_centers(
+            num_rows, num_columns, pillar_spacing, pillar_spacing, row_shift=row_shift
+        )
+
+        # One object for all 12,000 pillars; it picks its own level of detail
+        # from the camera frame, so the zoom below switches sprites to curves
+        pillars = PillarArray(centers, pillar_radius, color=pillar_color, frame=self.camera.frame)
+
+        title = Text("Full DLD Device", font_size=36)
+        title.to_edge(UP, buff=0.3)
+
+        self.play(FadeIn(pillars), Write(title))
+        self.wait(1)
+
+        # Zoom into the top left corner of the device until single pillars are visible
+        corner = centers[0] + RIGHT * 4 * pillar_spacing + DOWN * 2 * pillar_spacing
+        self.play(FadeOut(title))
+        self.play(
+            self.camera.frame.animate.set(width=12 * pillar_spacing).move_to(corner),
+            run_time=5
+        )
+        self.wait(2)
+
+        # And back out to the whole device
+        self.play(
+            self.camera.frame.animate.set(width=config.frame_width).move_to(ORIGIN),
+            run_time=3
+        )
+        self.wait(1)
+
+
 # To run this animation:
 # manim -pql dldflow.py DeterministicLateralDisplacement
+# manim -pql dldflow.py DLDDeviceOverview
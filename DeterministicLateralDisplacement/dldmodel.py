@@ -0,0 +1,239 @@
+import hashlib
+import sys
+
+import numpy as np
+
+# Points across a gap at which flow profiles are tabulated
+PROFILE_POINTS = 401
+
+# Viscosity of water in Pa s (plasma is about 1.2 times this)
+WATER_VISCOSITY = 1.0e-3
+
+# Channel depth in micrometres used when a design doesn't give one
+DEFAULT_DEPTH = 60.0
+
+# Array periods 1/ε simulated when measuring how a particle moves
+PERIODS_SIMULATED = 3
+
+# Particle diameters, as fractions of the gap, swept to locate a critical diameter
+CRITICAL_SWEEP = np.linspace(0.02, 0.95, 187)
+
+# Nominal diameters in micrometres of the cells shown in introcells.py
+CELL_DIAMETERS = {"platelet": 2.5, "rbc": 7.5, "wbc": 12.0, "ctc": 18.0}
+
+
+class GapProfile:
+    """
+    The flow through the gap between two neighbouring pillars, as cumulative flux.
+
+    x runs across the gap from the pillar on the bump side (0) to the other
+    pillar (1), and flux(x) is the fraction of the gap's flow passing
+    between 0 and x. A particle rides the streamline through its center, so
+    its flux position is what each row shift changes, and the critical
+    diameter is twice the width of the first flow lane: flux(Dc / 2G) = ε.
+    """
+
+    def __init__(self, velocity, name="custom"):
+        velocity = np.clip(np.asarray(velocity, dtype=float), 0, None)
+        self.x = np.linspace(0, 1, len(velocity))
+        cumulative = np.concatenate([[0], np.cumsum(velocity[1:] + velocity[:-1])])
+        self.cumulative = cumulative / cumulative[-1]
+        self.name = name
+
+    @classmethod
+    def parabolic(cls, points=PROFILE_POINTS):
+        """Plane Poiseuille flow, the usual model of a gap between round pillars"""
+        x = np.linspace(0, 1, points)
+        return cls(x * (1 - x), "parabolic")
+
+    def flux(self, x):
+        return np.interp(x, self.x, self.cumulative)
+
+    def position(self, flux):
+        return np.interp(flux, self.cumulative, self.x)
+
+    def digest(self):
+        """Short hash of the tabulated profile, for keying cached results"""
+        return hashlib.blake2b(self.cumulative.tobytes(), digest_size=10).hexdigest()
+
+
+PARABOLIC = GapProfile.parabolic()
+
+
+def critical_diameter(gap, row_shift, profile=PARABOLIC):
+    """Dc = 2 G x1, where the first flow lane 0..x1 carries a fraction ε of the gap's flow (Inglis et al. 2006)"""
+    return 2 * np.asarray(gap, dtype=float) * profile.position(row_shift)
+
+
+def davis_critical_diameter(gap, row_shift):
+    """Davis's empirical fit Dc = 1.4 G ε^0.48, measured on arrays with 0.006 < ε < 0.1"""
+    return 1.4 * np.asarray(gap, dtype=float) * np.asarray(row_shift, dtype=float) ** 0.48
+
+
+def particle_steps(diameters, gap, row_shift, num_rows, profile=PARABOLIC, jitter=0.0, start=None, seed=0):
+    """
+    Generator over the rows of a uniform array, moving every particle at once.
+
+    Yields (row, flux, columns) after each row: flux is each particle's
+    streamline position in its gap and columns how many gaps it has been
+    carried back against the row shift. Each row the pillars move ε across
+    the flow, so every streamline position drops by ε; one that drops below
+    zero passes on the far side of the next pillar and wraps into the
+    neighbouring gap (a zigzag step), while a particle whose radius reaches
+    past the first lane is pushed back out by the pillar (a bump step).
+    jitter adds Gaussian noise of that many flux units per row, standing in
+    for diffusion and deformability. start gives the starting flux positions;
+    by default they are spread uniformly over the positions each particle
+    can reach.
+    """
+    diameters = np.asarray(diameters, dtype=float)
+    radius_fraction = diameters / (2 * gap)
+    lowest = profile.flux(radius_fraction)
+    highest = np.maximum(profile.flux(1 - radius_fraction), lowest)
+    rng = np.random.default_rng(seed)
+    if start is None:
+        flux = lowest + rng.random(len(diameters)) * (highest - lowest)
+    else:
+        flux = np.clip(np.asarray(start, dtype=float), lowest, highest)
+    columns = np.zeros(len(diameters), dtype=np.int64)
+
+    for row in range(1, num_rows + 1):
+        flux = flux - row_shift
+        if jitter:
+            flux += rng.normal(0, jitter, len(flux))
+        wraps = np.floor(flux).astype(np.int64)
+        columns += wraps
+        flux -= wraps
+        np.clip(flux, lowest, highest, out=flux)
+        yield row, flux, columns
+
+
+def lateral_displacement(diameters, gap, row_shift, num_rows, profile=PARABOLIC, jitter=0.0, start=None, seed=0):
+    """Lateral movement of each particle after num_rows (at least one) rows, in pitches λ, and its final flux"""
+    for _, flux, columns in particle_steps(diameters, gap, row_shift, num_rows, profile, jitter, start, seed):
+        pass
+    return row_shift * num_rows + columns, flux
+
+
+def bump_fraction(diameters, row_shift, profile=PARABOLIC, jitter=0.0, particles=64, num_rows=None, seed=0):
+    """
+    Mean displacement of each particle size relative to full bump mode (1) and zigzag (0).
+
+    diameters are fractions of the gap. particles of each size start spread
+    across the gap and all sizes are simulated together.
+    """
+    diameters = np.asarray(diameters, dtype=float)
+    if num_rows is None:
+        num_rows = int(np.ceil(PERIODS_SIMULATED / row_shift))
+    sizes = np.repeat(diameters, particles)
+    displacement, _ = lateral_displacement(sizes, 1.0, row_shift, num_rows, profile, jitter, seed=seed)
+    return (displacement / (row_shift * num_rows)).reshape(len(diameters), particles).mean(axis=1)
+
+
+def simulated_critical_diameter(row_shift, profile=PARABOLIC, jitter=0.0, particles=64, seed=0,
+                                sweep=CRITICAL_SWEEP):
+    """Dc / G from the particle model: where the bump fraction first reaches one half, interpolated"""
+    fraction = bump_fraction(sweep, row_shift, profile, jitter, particles, seed=seed)
+    above = np.flatnonzero(fraction >= 0.5)
+    if not len(above):
+        return np.nan
+    i = above[0]
+    if i == 0:
+        return float(sweep[0])
+    weight = (0.5 - fraction[i - 1]) / (fraction[i] - fraction[i - 1])
+    return float(sweep[i - 1] + weight * (sweep[i] - sweep[i - 1]))
+
+
+def duct_resistance(width, height, length, viscosity=WATER_VISCOSITY):
+    """Hydraulic resistance in Pa s / m^3 of a rectangular duct, lengths in metres (lubrication approximation)"""
+    wide, narrow = np.maximum(width, height), np.minimum(width, height)
+    return 12 * viscosity * length / (wide * narrow**3 * (1 - 0.63 * narrow / wide))
+
+
+class DLDDesign:
+    """
+    One uniform DLD array, lengths in micrometres.
+
+    The pitch λ = gap + 2 r is the same along and across the flow, as in
+    dldflow.py, and each row is shifted ε λ across the flow from the last.
+    num_columns gaps sit side by side and the flow crosses num_rows rows.
+    profile is the flow through its gaps. Pillars are circles unless a
+    shape (a pillarshapes.PillarShape) is given, in which case
+    pillar_radius is the radius of its bounding circle and the pitch uses
+    the shape's width across the flow.
+    """
+
+    def __init__(self, gap, pillar_radius, row_shift, depth=DEFAULT_DEPTH, num_rows=1, num_columns=1,
+                 profile=PARABOLIC, shape=None):
+        self.gap = float(gap)
+        self.pillar_radius = float(pillar_radius)
+        self.row_shift = float(row_shift)
+        self.depth = float(depth)
+        self.num_rows = int(num_rows)
+        self.num_columns = int(num_columns)
+        self.profile = profile
+        self.shape = shape
+
+    @property
+    def pitch(self):
+        width = 2.0 if self.shape is None else self.shape.width
+        return self.gap + width * self.pillar_radius
+
+    @property
+    def period(self):
+        """Rows before the pillar pattern repeats, 1/ε"""
+        return 1 / self.row_shift
+
+    @property
+    def footprint(self):
+        """Area of the pillar array in mm^2"""
+        return self.num_rows * self.num_columns * self.pitch**2 * 1e-6
+
+    def critical_diameter(self):
+        return float(critical_diameter(self.gap, self.row_shift, self.profile))
+
+    def bump_displacement(self):
+        """Lateral distance in micrometres a bumping particle moves through the whole array"""
+        return self.num_rows * self.row_shift * self.pitch
+
+    def pressure_drop(self, flow_rate, viscosity=WATER_VISCOSITY):
+        """
+        Pressure in Pa to push flow_rate microlitres per minute through the array.
+
+        Each gap is a duct one pitch long, the gaps of a row are in
+        parallel and the rows in series.
+        """
+        gap_resistance = duct_resistance(self.gap * 1e-6, self.depth * 1e-6, self.pitch * 1e-6, viscosity)
+        return flow_rate * 1e-9 / 60 * gap_resistance * self.num_rows / self.num_columns
+
+    def lateral_positions(self, row, flux, columns):
+        """Particle centers across the array in micrometres, from the state particle_steps yields"""
+        edge = self.pillar_radius if self.shape is None else self.shape.vertices[:, 0].max() * self.pillar_radius
+        across = edge + self.gap * self.profile.position(flux)
+        return (columns + row * self.row_shift) * self.pitch + across
+
+    def as_dict(self):
+        return {
+            "gap": self.gap,
+            "pillar_radius": self.pillar_radius,
+            "row_shift": self.row_shift,
+            "depth": self.depth,
+            "num_rows": self.num_rows,
+            "num_columns": self.num_columns,
+        }
+
+    def __repr__(self):
+        return (f"DLDDesign(gap={self.gap:g}, pillar_radius={self.pillar_radius:g}, row_shift={self.row_shift:g}, "
+                f"depth={self.depth:g}, num_rows={self.num_rows}, num_columns={self.num_columns})")
+
+
+# To compare the particle model's critical diameter with the lane model and Davis's fit (gap in µm):
+# python dldmodel.py 20
+if __name__ == "__main__":
+    gap = float(sys.argv[1]) if len(sys.argv) > 1 else 20.0
+    print(f"{'ε':>7}{'lane Dc':>10}{'Davis Dc':>10}{'model Dc':>10}  (µm, gap {gap:g} µm)")
+    for row_shift in (0.02, 0.05, 0.1, 0.2):
+        lane = critical_diameter(gap, row_shift)
+        davis = davis_critical_diameter(gap, row_shift)
+        model = gap * simulated_critical_diameter(row_shift, jitter=0.01)
+        print(f"{row_shift:>7.3f}{lane:>10.2f}{davis:>10.2f}{model:>10.2f}")
@@ -1,6 +1,8 @@
 from manim import *
 import numpy as np
 
+from streamlines import StreamlineBundle
+
 class FlowLanesSimulation(Scene):
     def construct(self):
         # Configuration
@@ -111,10 +113,7 @@ class FlowLanesSimulation(Scene):
                 x_pos = last_x + x_diff  # Continue the same direction
                 lane1_points.append([x_pos, array_bottom, 0])
         
-        # Create the lane path
-        lane1 = VMobject(color=flow_lane_colors[0], stroke_width=3)
-        lane1.set_points_smoothly(lane1_points)
-        flow_lanes.add(lane1)
+        # Keep the lane path; all lanes are fitted together once both are known
         lane_paths.append(lane1_points)
         
         # Lane 2 (yellow) - still flows between second and third pillar, shows bounce behavior
@@ -150,11 +149,17 @@ class FlowLanesSimulation(Scene):
                 x_pos = last_x - x_diff
                 lane2_points.append([x_pos, array_bottom, 0])
         
-        lane2 = VMobject(color=flow_lane_colors[1], stroke_width=3)
-        lane2.set_points_smoothly(lane2_points)
-        flow_lanes.add(lane2)
         lane_paths.append(lane2_points)
         
+        # Fit the smooth curves for every lane in one vectorized pass
+        lane_bundle = StreamlineBundle(lane_paths)
+        
+        # The lanes are styled in different colors, so each gets its own
+        # mobject, cut from the already fitted bundle instead of refitted
+        for i in range(lane_bundle.num_streamlines):
+            lane = lane_bundle.get_streamline(i, color=flow_lane_colors[i], stroke_width=3)
+            flow_lanes.add(lane)
+        
         # Display all the flow lanes
         self.play(Create(flow_lanes), run_time=1.5)
         
@@ -186,9 +191,8 @@ class FlowLanesSimulation(Scene):
             particle.move_to(path_points[0])
             particles.add(particle)
             
-            # Create a mobject to animate along
-            path = VMobject()
-            path.set_points_smoothly(path_points)
+            # Reuse the fitted lane as the path to animate along
+            path = lane_bundle.get_streamline(i)
             
             particle_lane_pairs.append((particle, path))
         
@@ -0,0 +1,161 @@
+from manim import *
+import numpy as np
+
+# Levels of detail for a pillar, from largest to smallest on screen.
+# Each entry is (minimum radius in pixels, cubic Bézier segments per pillar).
+# A manim Circle uses 8 segments; 4 segments is already indistinguishable
+# from a true circle at a few dozen pixels. Anything smaller than the last
+# threshold is drawn as a single sprite pixel block instead of a curve.
+LOD_LEVELS = [
+    (40.0, 8),
+    (6.0, 4),
+    (2.0, 3),
+]
+
+# Fraction of a threshold that the radius has to move past before the level
+# flips again, so a slow zoom doesn't flicker between two levels
+LOD_HYSTERESIS = 0.15
+
+
+def pillar_lattice_centers(num_rows, num_columns, spacing_x, spacing_y, row_shift=0.0, origin=ORIGIN):
+    """Returns an (num_rows * num_columns, 3) array of pillar centers for a tilted DLD array"""
+    rows = np.arange(num_rows)
+    cols = np.arange(num_columns)
+
+    # Row-major grid, each row shifted right by row_shift (Δλ) more than the previous one
+    xs = cols[None, :] * spacing_x + rows[:, None] * row_shift
+    ys = -rows[:, None] * spacing_y + np.zeros_like(xs)
+
+    centers = np.zeros((num_rows * num_columns, 3))
+    centers[:, 0] = xs.ravel()
+    centers[:, 1] = ys.ravel()
+
+    # Center the array on the requested origin
+    centers -= (centers.max(axis=0) + centers.min(axis=0)) / 2
+    centers += np.array(origin, dtype=float)
+    return centers
+
+
+def unit_circle_curves(num_segments):
+    """Returns the (num_segments * 4, 3) Bézier control points of a unit circle"""
+    angles = np.linspace(0, TAU, num_segments + 1)
+    start, end = angles[:-1], angles[1:]
+
+    # Standard cubic approximation of an arc: handles along the tangent with
+    # length 4/3 * tan(dθ/4)
+    handle = 4 / 3 * np.tan((end - start) / 4)
+
+    curves = np.zeros((num_segments, 4, 3))
+    curves[:, 0, 0], curves[:, 0, 1] = np.cos(start), np.sin(start)
+    curves[:, 3, 0], curves[:, 3, 1] = np.cos(end), np.sin(end)
+    curves[:, 1, 0] = curves[:, 0, 0] - handle * curves[:, 0, 1]
+    curves[:, 1, 1] = curves[:, 0, 1] + handle * curves[:, 0, 0]
+    curves[:, 2, 0] = curves[:, 3, 0] + handle * curves[:, 3, 1]
+    curves[:, 2, 1] = curves[:, 3, 1] - handle * curves[:, 3, 0]
+    return curves.reshape(-1, 3)
+
+
+class PillarArray(Group):
+    """
+    An array of identical circular pillars (or particles) drawn as one object.
+
+    All pillars live in a single VMobject as separate subpaths, and the number
+    of Bézier segments per pillar is picked from the pillar's size on screen at
+    the current resolution. Pillars smaller than a couple of pixels are drawn
+    as a point cloud, one square sprite per pillar. With an updater attached
+    the level is re-picked every frame, so it follows camera zooms.
+
+    shape (a pillarshapes.PillarShape) draws polygon pillars instead of
+    circles, radius then being the radius of the shape's bounding circle;
+    its outline has a fixed number of segments at every curve level.
+    """
+
+    def __init__(self, centers, radius, color=BLUE, fill_opacity=0.8, frame=None, auto_lod=True, shape=None,
+                 **kwargs):
+        super().__init__(**kwargs)
+        centers = np.asarray(centers, dtype=float)
+        self.shape = shape
+        self.pillar_color = color
+        self.pillar_fill_opacity = fill_opacity
+        # Camera frame to measure against (self.camera.frame in a MovingCameraScene)
+        self.frame = frame
+        self.lod_segments = None
+
+        # Pillar centers, kept as a point cloud so they follow shift/scale/rotate
+        self.sprites = PMobject(stroke_width=1)
+        self.sprites.add_points(centers, color=color, alpha=fill_opacity)
+
+        # Invisible segment from the first center to its rim, which tracks the
+        # current radius through any transformation applied to the group
+        self.radius_ref = Line(centers[0], centers[0] + RIGHT * radius, stroke_width=0, stroke_opacity=0)
+
+        # Full-geometry pillars, all in one VMobject
+        self.body = VMobject(
+            stroke_color=color,
+            stroke_width=DEFAULT_STROKE_WIDTH,
+            fill_color=color,
+            fill_opacity=fill_opacity,
+        )
+
+        self.add(self.body, self.sprites, self.radius_ref)
+        self.update_lod(force=True)
+
+        if auto_lod:
+            self.add_updater(lambda m: m.update_lod())
+
+    @property
+    def num_pillars(self):
+        return len(self.sprites.points)
+
+    def get_centers(self):
+        """Returns the current pillar centers"""
+        return self.sprites.points
+
+    def get_radius(self):
+        """Returns the current pillar radius in scene units"""
+        return self.radius_ref.get_length()
+
+    def get_pixel_radius(self):
+        """Returns the pillar radius in pixels at the target resolution and current zoom"""
+        frame_width = self.frame.width if self.frame is not None else config.frame_width
+        return self.get_radius() * config.pixel_width / frame_width
+
+    def pick_segments(self, pixel_radius):
+        """Returns Bézier segments per pillar for a pixel radius, or 0 for sprites"""
+        current = self.lod_segments
+        for threshold, segments in LOD_LEVELS:
+            # Make it slightly harder to refine and slightly easier to stay put
+            if current is not None and segments > current:
+                threshold *= 1 + LOD_HYSTERESIS
+            elif current is not None:
+                threshold *= 1 - LOD_HYSTERESIS
+            if pixel_radius >= threshold:
+                return segments
+        return 0
+
+    def update_lod(self, force=False):
+        """Re-tessellates the pillars if their on-screen size moved to another level"""
+        pixel_radius = self.get_pixel_radius()
+        segments = self.pick_segments(pixel_radius)
+        if segments == 0:
+            # Sprites are squares whose side follows the zoom continuously
+            self.sprites.stroke_width = max(1, 2 * pixel_radius)
+        if segments == self.lod_segments and not force:
+            return self
+        self.lod_segments = segments
+
+        if segments == 0:
+            # Sprite mode: no curves at all, one square block per pillar
+            self.body.reset_points()
+            self.sprites.rgbas[:, 3] = self.pillar_fill_opacity
+        else:
+            # Curve mode: hide the sprites, build every pillar's subpath in one pass
+            self.sprites.rgbas[:, 3] = 0
+            template = unit_circle_curves(segments) if self.shape is None else self.shape.outline_curves()
+            points = self.get_centers()[:, None, :] + self.get_radius() * template[None, :, :]
+            self.body.points = points.reshape(-1, 3)
+        return self
+
+    def get_num_curves_drawn(self):
+        """Returns how many Bézier curves are drawn at the current level"""
+        return len(self.body.points) // 4
@@ -0,0 +1,498 @@
+import hashlib
+import os
+import sys
+import time
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import splu
+
+from designopt import DESIGN_CACHE_DIR, cached_npz
+from dldmodel import PROFILE_POINTS, DLDDesign, GapProfile, critical_diameter
+
+# Cell flow fields are kept here, one per pillar shape and size
+FLOW_CACHE_DIR = os.path.join(DESIGN_CACHE_DIR, "flow")
+
+# Grid points along each side of the lattice cell a flow field is solved on
+FLOW_RESOLUTION = 96
+
+# Drag on the flow inside a pillar, relative to the viscous term at the grid spacing (Brinkman penalization)
+FLOW_PENALTY = 1e4
+
+# Points tested against a polygon at once, so the (points, edges) temporaries stay a few MB
+DISTANCE_CHUNK = 1 << 14
+
+# Distance in pitches a particle moves along its streamline per step of particle_paths
+PATH_STEP = 0.02
+
+# Flow fields already loaded in this process, and how many of them are kept
+FLOW_FIELDS = {}
+MAX_FLOW_FIELDS = 32
+
+
+class PillarShape:
+    """
+    The outline of a pillar as a closed polygon, convex or not.
+
+    Vertices are scaled so the farthest one is 1 from the pillar's center,
+    so a shape is sized by the radius of its bounding circle, and put in
+    counter-clockwise order. x runs across the flow and y against it, as in
+    pillar_lattice_centers, so the flow arrives from +y.
+    """
+
+    def __init__(self, vertices, name="polygon"):
+        vertices = np.asarray(vertices, dtype=float)
+        twice_area = np.sum(vertices[:, 0] * np.roll(vertices[:, 1], -1) - np.roll(vertices[:, 0], -1) * vertices[:, 1])
+        if twice_area < 0:
+            vertices = vertices[::-1]
+        self.vertices = vertices / np.linalg.norm(vertices, axis=1).max()
+        self.name = name
+
+    @classmethod
+    def circle(cls, segments=48):
+        angles = np.linspace(0, 2 * np.pi, segments, endpoint=False)
+        return cls(np.column_stack([np.cos(angles), np.sin(angles)]), "circle")
+
+    @classmethod
+    def triangle(cls, rotation=0.0):
+        """Equilateral triangle, by default with a vertex pointing across the flow into the gap on its +x side"""
+        angles = rotation + np.array([0, 2, 4]) * np.pi / 3
+        return cls(np.column_stack([np.cos(angles), np.sin(angles)]), "triangle")
+
+    @classmethod
+    def i_shape(cls, flange=0.35, web=0.35):
+        """An I-beam across the flow: full-width flanges flange thick at both ends, joined by a web web wide"""
+        top, side = 1 - flange, web / 2
+        outline = [(-1, -1), (1, -1), (1, -top), (side, -top), (side, top), (1, top),
+                   (1, 1), (-1, 1), (-1, top), (-side, top), (-side, -top), (-1, -top)]
+        return cls(outline, "I")
+
+    @classmethod
+    def airfoil(cls, thickness=0.24, angle=0.0, points=32):
+        """Symmetric NACA four-digit section with its chord along the flow and the leading edge upstream"""
+        t = (1 - np.cos(np.linspace(0, np.pi, points))) / 2
+        half = 5 * thickness * (0.2969 * np.sqrt(t) - 0.1260 * t - 0.3516 * t**2 + 0.2843 * t**3 - 0.1036 * t**4)
+        # Closed trailing edge, and no duplicate points at either end
+        half[-1] = 0
+        along = 0.5 - t
+        outline = np.concatenate([np.column_stack([half, along]), np.column_stack([-half, along])[-2:0:-1]])
+        return cls(outline, "airfoil").rotated(angle)
+
+    def rotated(self, angle):
+        """The same outline turned angle radians counter-clockwise"""
+        cos, sin = np.cos(angle), np.sin(angle)
+        return PillarShape(self.vertices @ np.array([[cos, sin], [-sin, cos]]), self.name)
+
+    @property
+    def edges(self):
+        return np.roll(self.vertices, -1, axis=0) - self.vertices
+
+    @property
+    def width(self):
+        """Extent across the flow, in bounding radii (2 for a circle)"""
+        return float(np.ptp(self.vertices[:, 0]))
+
+    def digest(self):
+        """Short hash of the outline, for keying cached results"""
+        return hashlib.blake2b(self.vertices.tobytes(), digest_size=10).hexdigest()
+
+    def outline_curves(self):
+        """(vertices * 4, 3) Bézier control points of the outline, straight segments, for PillarArray"""
+        start = self.vertices
+        step = self.edges
+        curves = np.zeros((len(start), 4, 3))
+        for i in range(4):
+            curves[:, i, :2] = start + step * (i / 3)
+        return curves.reshape(-1, 3)
+
+    def signed_distance(self, points):
+        """
+        Distance from each (x, y) point to the outline, negative inside, and the outward normals.
+
+        Every point is tested against every edge at once, DISTANCE_CHUNK
+        points at a time: the nearest point on each edge gives the distance
+        and the normal, and an even-odd crossing count along +x decides
+        inside, which holds for concave outlines too.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        start_x, start_y = self.vertices.T
+        edge_x, edge_y = self.edges.T
+        lengths = edge_x**2 + edge_y**2
+        # Horizontal edges never straddle a horizontal ray; a unit slope keeps the division finite
+        slope = edge_x / np.where(edge_y == 0, 1.0, edge_y)
+        distance = np.empty(len(points))
+        normals = np.empty((len(points), 2))
+        for low in range(0, len(points), DISTANCE_CHUNK):
+            x, y = points[low:low + DISTANCE_CHUNK, 0:1], points[low:low + DISTANCE_CHUNK, 1:2]
+            offset_x, offset_y = x - start_x, y - start_y
+            along = np.clip((offset_x * edge_x + offset_y * edge_y) / lengths, 0, 1)
+            offset_x -= along * edge_x
+            offset_y -= along * edge_y
+            squared = offset_x**2 + offset_y**2
+            nearest = squared.argmin(axis=1)
+            rows = np.arange(len(x))
+            unsigned = np.sqrt(squared[rows, nearest])
+
+            straddles = (start_y > y) != (start_y + edge_y > y)
+            inside = np.count_nonzero(straddles & (x < start_x + (y - start_y) * slope), axis=1) % 2 == 1
+            sign = np.where(inside, -1.0, 1.0)
+
+            distance[low:low + len(x)] = sign * unsigned
+            scale = sign / np.maximum(unsigned, 1e-300)
+            normals[low:low + len(x), 0] = offset_x[rows, nearest] * scale
+            normals[low:low + len(x), 1] = offset_y[rows, nearest] * scale
+        return distance, normals
+
+
+CIRCLE = PillarShape.circle()
+
+
+def lattice_signed_distance(points, shape, radius, pitch, row_shift=0.0, cutoff=np.inf):
+    """
+    Signed distance from every point to the nearest pillar of a DLD lattice, and the outward normals.
+
+    Pillars of the given bounding radius sit at ((column + row ε) λ, -row λ)
+    as in pillar_lattice_centers (before it centers the array). Only the
+    four pillars around a point can be nearest, and only those whose
+    bounding circle comes closer than the far side of another's are tested
+    exactly. A pillar whose bounding circle is cutoff or more away isn't
+    tested either; points with no pillar that close get the bounding-circle
+    distance (a lower bound) instead. Collision tests only need distances
+    under the particle radius, so with that cutoff almost all the polygon
+    work goes to the few points actually touching a pillar.
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    distance = np.empty(len(points))
+    normals = np.empty((len(points), 2))
+    for low in range(0, len(points), DISTANCE_CHUNK):
+        x, y = points[low:low + DISTANCE_CHUNK, 0:1], points[low:low + DISTANCE_CHUNK, 1:2]
+        n = len(x)
+        rows = np.floor(-y / pitch) + np.array([0, 0, 1, 1])
+        columns = np.floor(x / pitch - rows * row_shift) + np.array([0, 1, 0, 1])
+        offset_x = x - (columns + rows * row_shift) * pitch
+        offset_y = y + rows * pitch
+        center_distance = np.sqrt(offset_x**2 + offset_y**2)
+
+        everywhere = np.arange(n)
+        nearest = center_distance.argmin(axis=1)
+        closest = center_distance[everywhere, nearest]
+        chunk_distance = closest - radius
+        scale = 1 / np.maximum(closest, 1e-300)
+        chunk_normals = np.column_stack([offset_x[everywhere, nearest] * scale, offset_y[everywhere, nearest] * scale])
+
+        candidates = center_distance - radius < np.minimum(closest + radius, cutoff)[:, None]
+        point, candidate = np.nonzero(candidates)
+        if len(point):
+            exact, exact_normals = shape.signed_distance(
+                np.column_stack([offset_x[point, candidate], offset_y[point, candidate]]) / radius)
+            # Points with an exact candidate take the least exact distance, not the bound
+            table = np.full((n, 4), np.inf)
+            table[point, candidate] = exact * radius
+            slot = np.zeros((n, 4), dtype=np.int64)
+            slot[point, candidate] = np.arange(len(point))
+            tested = np.flatnonzero(candidates.any(axis=1))
+            best = table[tested].argmin(axis=1)
+            chunk_distance[tested] = table[tested, best]
+            chunk_normals[tested] = exact_normals[slot[tested, best]]
+        distance[low:low + n] = chunk_distance
+        normals[low:low + n] = chunk_normals
+    return distance, normals
+
+
+def collide(points, radii, shape, radius, pitch, row_shift=0.0, passes=2):
+    """
+    Pushes every particle of radii (centers at points, changed in place) out of the lattice's pillars.
+
+    Each pass moves the overlapping particles along the outward normal by
+    their overlap; a second pass settles particles wedged into a concave
+    corner. Returns the number of particles moved in the first pass.
+    """
+    radii = np.broadcast_to(np.asarray(radii, dtype=float), len(points))
+    moved = 0
+    for i in range(passes):
+        distance, normals = lattice_signed_distance(points, shape, radius, pitch, row_shift, cutoff=radii.max())
+        overlap = radii - distance
+        touching = np.flatnonzero(overlap > 0)
+        points[touching] += overlap[touching, None] * normals[touching]
+        if i == 0:
+            moved = len(touching)
+    return moved
+
+
+class FlowField:
+    """
+    Steady Stokes flow through one cell of a pillar lattice, on a grid.
+
+    velocity[k, iy, ix] is the (u, v) velocity at ((ix + 1/2) / n - 1/2,
+    (iy + 1/2) / n - 1/2) in a one-pitch-square cell with the pillar at its
+    center, lengths in pitches and speeds relative to the mean speed: k = 0
+    is flow along the lattice towards -y and k = 1 flow across it towards
+    +x. solid marks the grid points inside the pillar. Stokes flow is
+    linear, so any mean direction through the lattice is a sum of the two.
+    """
+
+    def __init__(self, velocity, solid, key=None):
+        self.velocity = velocity
+        self.solid = solid
+        self.key = key
+
+    @property
+    def resolution(self):
+        return self.velocity.shape[1]
+
+    def sample(self, points, row_shift=0.0):
+        """
+        Bilinearly interpolated velocity at (x, y) points in pitches, shape (N, 2), for a row shift ε.
+
+        A DLD array is the square lattice sheared by x' = x + ε y, which
+        puts every pillar back on the grid; the flow runs straight down the
+        array, so in the lattice it runs along -y and ε against x per row.
+        The lattice field for that direction is mapped back through the
+        shear, which keeps it divergence-free, so a streamline's place in
+        its gap drops by exactly ε of the flux per row, as in the lane model.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        n = self.resolution
+        grid_x = (points[:, 0] + row_shift * points[:, 1] + 0.5) * n - 0.5
+        grid_y = (points[:, 1] + 0.5) * n - 0.5
+        ix, iy = np.floor(grid_x), np.floor(grid_y)
+        fx, fy = (grid_x - ix)[:, None], (grid_y - iy)[:, None]
+        ix, iy = ix.astype(np.int64) % n, iy.astype(np.int64) % n
+        ix1, iy1 = (ix + 1) % n, (iy + 1) % n
+        field = self.velocity[0] - row_shift * self.velocity[1]
+        lattice = ((1 - fy) * ((1 - fx) * field[iy, ix] + fx * field[iy, ix1])
+                   + fy * ((1 - fx) * field[iy1, ix] + fx * field[iy1, ix1]))
+        lattice[:, 0] -= row_shift * lattice[:, 1]
+        return lattice
+
+    def gap_profile(self, points=PROFILE_POINTS):
+        """
+        The GapProfile across the narrowest opening between the pillar and its neighbour on the +x side.
+
+        The cut runs along the grid row where the pillar is widest, from
+        the pillar's edge (x = 0, the bump side) to the next pillar's edge,
+        through the periodic boundary. For concave or slender outlines that
+        cut says less about where the lanes are decided, and particle_paths
+        is the better guide to their critical diameter.
+        """
+        widest = int(self.solid.sum(axis=1).argmax())
+        row = self.solid[widest]
+        # The pillar is the solid run through the cell's center; the gap is the rest of the row
+        n = self.resolution
+        right = left = n // 2
+        if not row[right] or row.all():
+            raise ValueError("the pillar doesn't leave a gap across the flow")
+        while row[(right + 1) % n]:
+            right += 1
+        while row[(left - 1) % n]:
+            left -= 1
+        cut = np.arange(right + 1, left + n) % n
+        speed = np.concatenate([[0], -self.velocity[0, widest, cut, 1], [0]])
+        x = np.concatenate([[0], (np.arange(len(cut)) + 0.5) / len(cut), [1]])
+        return GapProfile(np.interp(np.linspace(0, 1, points), x, speed), self.key or "flow")
+
+
+def cell_operators(n):
+    """Periodic forward differences across (x) and along (y) a flattened n x n grid, for a unit spacing"""
+    ring = sp.diags([-np.ones(n), np.ones(n - 1), np.ones(1)], [0, 1, -(n - 1)], format="csr")
+    identity = sp.identity(n, format="csr")
+    return sp.kron(identity, ring, format="csr"), sp.kron(ring, identity, format="csr")
+
+
+def solve_cell_flow(shape, radius_ratio, resolution=FLOW_RESOLUTION):
+    """
+    Stokes flow past one pillar of bounding radius radius_ratio pitches in a periodic cell, as a FlowField.
+
+    The streamfunction ψ = x + ψ' for flow along the lattice (y + ψ' across
+    it), one unit of flux through each cell and ψ' periodic, solves the
+    penalized biharmonic equation ∇⁴ψ - ∇·(χ/K ∇ψ) = 0, where χ marks the
+    pillar and K is a small permeability: the pillar becomes a nearly
+    impermeable porous block (Brinkman penalization), so any outline is
+    just a mask on the grid, and one sparse factorization serves both
+    directions. Velocities are u = ∂ψ/∂y, v = -∂ψ/∂x.
+    """
+    n = resolution
+    h = 1.0 / n
+    coordinates = (np.arange(n) + 0.5) * h - 0.5
+    x, y = np.meshgrid(coordinates, coordinates)
+    distance, _ = shape.signed_distance(np.column_stack([x.ravel(), y.ravel()]) / radius_ratio)
+    solid = (distance < 0).reshape(n, n)
+
+    dx, dy = cell_operators(n)
+    dx, dy = dx / h, dy / h
+    laplacian = -(dx.T @ dx + dy.T @ dy)
+    # Penalty on the faces between grid points, half strength where fluid meets solid
+    chi = solid.astype(float)
+    drag_x = FLOW_PENALTY / h**2 * (chi + np.roll(chi, -1, axis=1)).ravel() / 2
+    drag_y = FLOW_PENALTY / h**2 * (chi + np.roll(chi, -1, axis=0)).ravel() / 2
+    penalty = dx.T @ sp.diags(drag_x) @ dx + dy.T @ sp.diags(drag_y) @ dy
+    system = (laplacian @ laplacian + penalty).tocsc()
+    # ψ' is only fixed up to a constant; a tiny diagonal term picks one
+    system += sp.identity(n * n, format="csc") * (1e-10 / h**4)
+    factor = splu(system)
+
+    velocity = np.empty((2, n, n, 2))
+    for k, (linear_x, linear_y) in enumerate([(1.0, 0.0), (0.0, 1.0)]):
+        # The linear part's gradient is constant, so its penalty term is known without differencing across the wrap
+        psi = factor.solve(-(dx.T @ (drag_x * linear_x) + dy.T @ (drag_y * linear_y))).reshape(n, n)
+        velocity[k, :, :, 0] = linear_y + (np.roll(psi, -1, axis=0) - np.roll(psi, 1, axis=0)) / (2 * h)
+        velocity[k, :, :, 1] = -(linear_x + (np.roll(psi, -1, axis=1) - np.roll(psi, 1, axis=1)) / (2 * h))
+    velocity[0] /= -velocity[0, :, :, 1].mean()
+    velocity[1] /= velocity[1, :, :, 0].mean()
+    return FlowField(velocity, solid)
+
+
+def flow_field(shape, radius, pitch, resolution=FLOW_RESOLUTION, cache_dir=FLOW_CACHE_DIR):
+    """
+    The FlowField of a lattice of shape pillars, solved at most once.
+
+    The field only depends on the outline, the radius over the pitch and
+    the grid, so it is kept in memory (the last MAX_FLOW_FIELDS used) and
+    saved as .npz under cache_dir keyed by those; every array with the same
+    proportions shares it.
+    """
+    radius_ratio = float(radius) / float(pitch)
+
+    def build():
+        field = solve_cell_flow(shape, radius_ratio, resolution)
+        return {"velocity": field.velocity, "solid": field.solid}
+
+    return cached_npz(
+        (shape.digest(), radius_ratio, resolution), cache_dir, build,
+        lambda saved, key: FlowField(saved["velocity"], saved["solid"], key),
+        "flow", FLOW_FIELDS, MAX_FLOW_FIELDS,
+    )
+
+
+def shaped_design(shape, gap, pillar_radius, row_shift, resolution=FLOW_RESOLUTION, **kwargs):
+    """A DLDDesign with shape pillars whose gap profile comes from the shape's cached flow field"""
+    design = DLDDesign(gap, pillar_radius, row_shift, shape=shape, **kwargs)
+    design.profile = flow_field(shape, pillar_radius, design.pitch, resolution).gap_profile()
+    return design
+
+
+def particle_paths(design, diameters, start=None, field=None, step=PATH_STEP, jitter=0.0, max_steps=None, seed=0):
+    """
+    Generator moving particles through design's pillar lattice along the flow, every particle at once.
+
+    Particles follow the streamlines of the cell's flow field, a fixed
+    distance step (in pitches) per iteration with a midpoint rule, and are
+    pushed out of any pillar their radius reaches (see collide), which is
+    what makes large particles bump. start gives the starting points in
+    micrometres; by default they are spread across the gap above row 0,
+    whose pillars are at y = 0. jitter adds Gaussian noise of that many
+    pitches per unit path length across the flow. Yields (step, positions
+    in micrometres, done) after each iteration, done marking the particles
+    that have passed all design.num_rows rows and stopped.
+    """
+    shape = CIRCLE if design.shape is None else design.shape
+    pitch, row_shift = design.pitch, design.row_shift
+    radius = design.pillar_radius / pitch
+    if field is None:
+        field = flow_field(shape, design.pillar_radius, pitch)
+    radii = np.asarray(diameters, dtype=float) / (2 * pitch)
+    rng = np.random.default_rng(seed)
+    if start is None:
+        left = shape.vertices[:, 0].max() * radius + radii
+        right = 1 + shape.vertices[:, 0].min() * radius - radii
+        positions = np.column_stack([left + rng.random(len(radii)) * np.maximum(right - left, 0),
+                                     np.full(len(radii), 0.5)])
+    else:
+        positions = np.asarray(start, dtype=float).reshape(-1, 2) / pitch
+    end = -(design.num_rows - 0.5)
+    done = positions[:, 1] <= end
+    if max_steps is None:
+        max_steps = int(np.ceil(4 * (design.num_rows + 1) / step))
+
+    for iteration in range(1, max_steps + 1):
+        moving = np.flatnonzero(~done)
+        if not len(moving):
+            break
+        points = positions[moving]
+        direction = field.sample(points, row_shift)
+        direction /= np.maximum(np.linalg.norm(direction, axis=1), 1e-12)[:, None]
+        middle = field.sample(points + direction * (step / 2), row_shift)
+        middle /= np.maximum(np.linalg.norm(middle, axis=1), 1e-12)[:, None]
+        points += middle * step
+        if jitter:
+            points[:, 0] += rng.normal(0, jitter * np.sqrt(step), len(points))
+        collide(points, radii[moving], shape, radius, 1.0, row_shift)
+        positions[moving] = points
+        done[moving] = points[:, 1] <= end
+        yield iteration, positions * pitch, done
+
+
+def path_bump_fraction(design, diameters, particles=16, field=None, jitter=0.0, seed=0):
+    """
+    Mean displacement per row of each particle size through design, relative to full bump mode, from particle_paths.
+
+    Particles that never leave the array (stuck behind a pillar) count as
+    not displaced.
+    """
+    diameters = np.asarray(diameters, dtype=float)
+    sizes = np.repeat(diameters, particles)
+    start = None
+    for _, positions, done in particle_paths(design, sizes, field=field, jitter=jitter, seed=seed):
+        if start is None:
+            start = positions[:, 0].copy()
+    shift = np.where(done, positions[:, 0] - start, 0.0) / (design.pitch * design.num_rows * design.row_shift)
+    return shift.reshape(len(diameters), particles).mean(axis=1)
+
+
+def path_critical_diameter(design, sweep, particles=16, field=None, jitter=0.0, seed=0):
+    """Dc in micrometres from particle_paths: where the bump fraction over sweep (µm) first reaches one half"""
+    sweep = np.asarray(sweep, dtype=float)
+    fraction = path_bump_fraction(design, sweep, particles, field, jitter, seed)
+    above = np.flatnonzero(fraction >= 0.5)
+    if not len(above):
+        return np.nan
+    i = above[0]
+    if i == 0:
+        return float(sweep[0])
+    weight = (0.5 - fraction[i - 1]) / (fraction[i] - fraction[i - 1])
+    return float(sweep[i - 1] + weight * (sweep[i] - sweep[i - 1]))
+
+
+# Shapes compared by the example below, each sized to the same bounding radius
+SHAPES = {
+    "circle": CIRCLE,
+    "triangle": PillarShape.triangle(),
+    "triangle, flat side in": PillarShape.triangle(np.pi),
+    "I": PillarShape.i_shape(),
+    "airfoil": PillarShape.airfoil(),
+}
+
+
+# To compare the critical diameter of pillar shapes (gap and row shift), and time the collision kernel:
+# python pillarshapes.py 20 0.1
+if __name__ == "__main__":
+    gap = float(sys.argv[1]) if len(sys.argv) > 1 else 20.0
+    row_shift = float(sys.argv[2]) if len(sys.argv) > 2 else 0.1
+    radius = 10.0
+    num_rows = int(np.ceil(2 / row_shift))
+    sweep = np.linspace(0.1, 0.8, 15) * gap
+
+    print(f"{'shape':<24}{'flow (s)':>9}{'lane Dc':>9}{'path Dc':>9}  (µm, gap {gap:g} µm, ε {row_shift:g})")
+    for name, shape in SHAPES.items():
+        start = time.perf_counter()
+        design = shaped_design(shape, gap, radius, row_shift, num_rows=num_rows)
+        seconds = time.perf_counter() - start
+        lane = critical_diameter(gap, row_shift, design.profile)
+        path = path_critical_diameter(design, sweep)
+        print(f"{name:<24}{seconds:>9.2f}{lane:>9.2f}{path:>9.2f}")
+    print(f"parabolic profile lane Dc {critical_diameter(gap, row_shift):.2f} µm")
+
+    design = shaped_design(SHAPES["I"], gap, radius, row_shift, num_rows=num_rows)
+    points = np.random.default_rng(0).random((2_000_000, 2)) * design.pitch * np.array([40, -40])
+    for cutoff in (np.inf, 5.0):
+        start = time.perf_counter()
+        lattice_signed_distance(points, design.shape, radius, design.pitch, row_shift, cutoff)
+        seconds = time.perf_counter() - start
+        print(f"{len(points) * 4 / seconds / 1e6:.1f}M particle-pillar tests/s (cutoff {cutoff:g} µm)")
+
+    sizes = np.repeat(sweep, 200)
+    start = time.perf_counter()
+    for steps, _, _ in particle_paths(design, sizes):
+        pass
+    seconds = time.perf_counter() - start
+    print(f"{len(sizes) * steps / seconds / 1e6:.2f}M particle steps/s ({len(sizes)} particles, {steps} steps)")
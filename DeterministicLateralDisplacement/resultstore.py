@@ -0,0 +1,342 @@
+import json
+import os
+import sys
+import time
+import zipfile
+
+import numpy as np
+
+from dlddevice import DLDDevice, simulate_device, trace_batches
+from dldmodel import CELL_DIAMETERS, DLDDesign, particle_steps
+
+# Rows of a table written to each shard
+DEFAULT_CHUNK_ROWS = 1 << 18
+
+# Shard layouts: one .npz archive per shard, or one .npy file per column per shard
+FORMATS = ("npz", "npy")
+
+MANIFEST = "manifest.json"
+
+
+def write_npz(path, arrays, compression=None):
+    """Saves arrays like np.savez, deflated at zlib level compression (0-9) unless it is None"""
+    method = zipfile.ZIP_STORED if compression is None else zipfile.ZIP_DEFLATED
+    with zipfile.ZipFile(path, "w", method, compresslevel=compression, allowZip64=True) as archive:
+        for name, values in arrays.items():
+            with archive.open(f"{name}.npy", "w", force_zip64=True) as f:
+                np.lib.format.write_array(f, np.ascontiguousarray(values), allow_pickle=False)
+
+
+def string_width(dtype):
+    """Characters a string dtype holds, 0 for anything else"""
+    if dtype.kind == "U":
+        return dtype.itemsize // 4
+    return dtype.itemsize if dtype.kind == "S" else 0
+
+
+class ResultWriter:
+    """
+    Streams tables of simulation results to a directory of fixed-size shards.
+
+    A table is a set of named columns with one row per record, appended a
+    block of rows at a time; every append must give the same columns. Rows
+    are buffered until a table has chunk_rows of them, which are written out
+    as one shard, so a run only ever holds one chunk per table. Shards are
+    .npz archives (deflated at zlib level compression, stored if None) or,
+    with format "npy", one plain .npy file per column that a reader can
+    memory-map. manifest.json lists every table's columns and shards and is
+    rewritten after each shard, so an interrupted run leaves readable
+    results up to its last shard. attrs are saved in the manifest as they
+    are (anything json can write).
+    """
+
+    def __init__(self, directory, chunk_rows=DEFAULT_CHUNK_ROWS, format="npz", compression=None, attrs=None):
+        if format not in FORMATS:
+            raise ValueError(f"unknown shard format {format!r}, expected one of {FORMATS}")
+        if format == "npy" and compression is not None:
+            raise ValueError("npy shards can't be compressed, use the npz format")
+        self.directory = directory
+        self.chunk_rows = int(chunk_rows)
+        self.format = format
+        self.compression = compression
+        self.attrs = dict(attrs or {})
+        self.tables = {}
+        self.buffers = {}
+        os.makedirs(directory, exist_ok=True)
+        self.write_manifest()
+
+    def append(self, table, **columns):
+        """
+        Adds rows to table: each column an array with one entry (or sub-array) per row.
+
+        Scalars are repeated down every row. Columns keep the dtype and
+        trailing shape of their first append; a later block with another
+        trailing shape, longer strings or values of a kind the column's
+        dtype can't hold (floats in an int column, say) raises ValueError.
+        """
+        lengths = {len(values) for values in map(np.asarray, columns.values()) if np.ndim(values)}
+        if len(lengths) > 1:
+            raise ValueError(f"columns of {table!r} have different lengths {sorted(lengths)}")
+        rows = lengths.pop() if lengths else 1
+        block = {name: np.broadcast_to(np.asarray(values), (rows,) + np.shape(values)[1:]) if np.ndim(values)
+                 else np.full(rows, values) for name, values in columns.items()}
+
+        if table not in self.tables:
+            self.tables[table] = {
+                "columns": {name: {"dtype": values.dtype.str, "shape": list(values.shape[1:])}
+                            for name, values in block.items()},
+                "rows": 0,
+                "shards": [],
+            }
+            self.buffers[table] = []
+        spec = self.tables[table]["columns"]
+        if set(block) != set(spec):
+            raise ValueError(f"{table!r} has columns {sorted(spec)}, got {sorted(block)}")
+        for name, values in block.items():
+            dtype, shape = np.dtype(spec[name]["dtype"]), tuple(spec[name]["shape"])
+            if values.shape[1:] != shape:
+                raise ValueError(f"{table!r} column {name!r} has rows of shape {shape}, got {values.shape[1:]}")
+            # Casting would silently drop fractions, wrap integers or cut strings short
+            if not np.can_cast(values.dtype, dtype, "same_kind") or string_width(values.dtype) > string_width(dtype):
+                raise ValueError(f"{table!r} column {name!r} holds {dtype}, got {values.dtype}")
+        # Copies, since producers like particle_steps update their arrays in place
+        block = {name: np.array(values, dtype=spec[name]["dtype"]) for name, values in block.items()}
+
+        self.buffers[table].append(block)
+        buffered = sum(len(next(iter(part.values()))) for part in self.buffers[table])
+        if buffered >= self.chunk_rows:
+            merged = {name: np.concatenate([part[name] for part in self.buffers[table]]) for name in spec}
+            full = buffered - buffered % self.chunk_rows
+            for low in range(0, full, self.chunk_rows):
+                self.write_shard(table, {name: values[low:low + self.chunk_rows] for name, values in merged.items()})
+            self.buffers[table] = [{name: values[full:] for name, values in merged.items()}] if full < buffered else []
+
+    def write_shard(self, table, block):
+        """Writes one shard of table and records it in the manifest"""
+        info = self.tables[table]
+        name = f"{table}-{len(info['shards']):05d}"
+        rows = len(next(iter(block.values())))
+        if self.format == "npz":
+            partial_path = os.path.join(self.directory, f"{name}.partial.npz")
+            write_npz(partial_path, block, self.compression)
+            os.replace(partial_path, os.path.join(self.directory, f"{name}.npz"))
+            files = f"{name}.npz"
+        else:
+            files = {}
+            for column, values in block.items():
+                files[column] = f"{name}.{column}.npy"
+                partial_path = os.path.join(self.directory, f"{name}.{column}.partial.npy")
+                np.save(partial_path, np.ascontiguousarray(values), allow_pickle=False)
+                os.replace(partial_path, os.path.join(self.directory, files[column]))
+        info["shards"].append({"files": files, "rows": rows})
+        info["rows"] += rows
+        self.write_manifest()
+
+    def write_manifest(self):
+        manifest = {
+            "format": self.format,
+            "compression": self.compression,
+            "chunk_rows": self.chunk_rows,
+            "attrs": self.attrs,
+            "tables": self.tables,
+        }
+        partial_path = os.path.join(self.directory, f"{MANIFEST}.partial")
+        with open(partial_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(partial_path, os.path.join(self.directory, MANIFEST))
+
+    def flush(self):
+        """Writes every table's buffered rows out as a last, shorter shard"""
+        for table, parts in self.buffers.items():
+            if parts:
+                spec = self.tables[table]["columns"]
+                self.write_shard(table, {name: np.concatenate([part[name] for part in parts]) for name in spec})
+                self.buffers[table] = []
+
+    def close(self):
+        self.flush()
+        self.write_manifest()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ResultReader:
+    """
+    Reads a directory written by ResultWriter, one shard at a time.
+
+    Nothing but the manifest is read up front: shards iterates a table's
+    shards lazily, loading only the columns asked for (npy shards are
+    memory-mapped), and read puts a whole table together when it fits.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, MANIFEST)) as f:
+            self.manifest = json.load(f)
+
+    @property
+    def tables(self):
+        return list(self.manifest["tables"])
+
+    @property
+    def attrs(self):
+        return self.manifest["attrs"]
+
+    def columns(self, table):
+        return list(self.table(table)["columns"])
+
+    def num_rows(self, table):
+        return self.table(table)["rows"]
+
+    def table(self, table):
+        if table not in self.manifest["tables"]:
+            raise KeyError(f"no table {table!r}, expected one of {self.tables}")
+        return self.manifest["tables"][table]
+
+    def shards(self, table, columns=None):
+        """Yields a {column: array} dict per shard of table, with all columns or just the ones given"""
+        info = self.table(table)
+        columns = list(info["columns"]) if columns is None else list(columns)
+        for shard in info["shards"]:
+            if self.manifest["format"] == "npz":
+                with np.load(os.path.join(self.directory, shard["files"])) as archive:
+                    yield {name: archive[name] for name in columns}
+            else:
+                yield {name: np.load(os.path.join(self.directory, shard["files"][name]), mmap_mode="r")
+                       for name in columns}
+
+    def read(self, table, columns=None):
+        """The whole table as one {column: array} dict"""
+        info = self.table(table)
+        columns = list(info["columns"]) if columns is None else list(columns)
+        parts = list(self.shards(table, columns))
+        if not parts:
+            return {name: np.empty([0] + info["columns"][name]["shape"], dtype=info["columns"][name]["dtype"])
+                    for name in columns}
+        return {name: np.concatenate([part[name] for part in parts]) for name in columns}
+
+
+def write_particle_steps(writer, design, diameters, table="trajectories", every=1, **options):
+    """
+    Runs dldmodel.particle_steps through design and streams every particle's state each every rows.
+
+    Rows are (row, particle, diameter, flux, columns, lateral), lateral
+    being the position across the array in micrometres. options go to
+    particle_steps. Returns the final flux and columns.
+    """
+    diameters = np.asarray(diameters, dtype=float)
+    particle = np.arange(len(diameters))
+    flux = columns = None
+    for row, flux, columns in particle_steps(diameters, design.gap, design.row_shift, design.num_rows,
+                                             design.profile, **options):
+        if row % every == 0 or row == design.num_rows:
+            writer.append(table, row=row, particle=particle, diameter=diameters, flux=flux, columns=columns,
+                          lateral=design.lateral_positions(row, flux, columns))
+    return flux, columns
+
+
+def write_particle_paths(writer, paths, table="paths", every=1):
+    """
+    Streams the positions a pillarshapes.particle_paths generator yields, each every steps.
+
+    Rows are (step, particle, x, y, done), positions in micrometres.
+    Returns the last positions and done flags.
+    """
+    positions = done = None
+    for step, positions, done in paths:
+        if step % every == 0:
+            writer.append(table, step=step, particle=np.arange(len(positions)), x=positions[:, 0],
+                          y=positions[:, 1], done=done)
+    return positions, done
+
+
+def write_device_trace(writer, device, diameters, bounds, particles, batch, table="outlets", **options):
+    """
+    Streams a dlddevice Monte Carlo run of any size a batch at a time.
+
+    Every particle's outlet position goes into table as (size, diameter,
+    lateral) rows; the outlet histogram over the lateral bands between
+    bounds is accumulated on the way and written to "<table>_histogram" as
+    (size, diameter, outlet, low, high, count, fraction) rows at the end.
+    options go to trace_batches. Returns the (sizes, outlets) fractions.
+    """
+    diameters = np.asarray(diameters, dtype=float)
+    bounds = np.asarray(bounds, dtype=float)
+    counts = np.zeros((len(diameters), len(bounds) - 1), dtype=np.int64)
+    for lateral in trace_batches(device, diameters, particles, batch=batch, **options):
+        size = np.repeat(np.arange(len(diameters)), lateral.shape[1])
+        writer.append(table, size=size, diameter=diameters[size], lateral=lateral.ravel())
+        for s, positions in enumerate(lateral):
+            counts[s] += np.histogram(positions, bounds)[0]
+
+    size, outlet = np.indices(counts.shape)
+    fractions = counts / particles
+    writer.append(f"{table}_histogram", size=size.ravel(), diameter=diameters[size.ravel()], outlet=outlet.ravel(),
+                  low=bounds[:-1][outlet.ravel()], high=bounds[1:][outlet.ravel()], count=counts.ravel(),
+                  fraction=fractions.ravel())
+    return fractions
+
+
+def write_designs(writer, rows, table="designs"):
+    """
+    Writes the ranked rows of designopt.optimize_design (or the rows of every target of optimize_designs).
+
+    Each design becomes one row of its as_dict fields, its rank and the
+    row's numbers; verification columns are NaN where a search didn't verify.
+    """
+    if isinstance(rows, dict):
+        rows = [row for ranked in rows.values() for row in ranked]
+    if not rows:
+        return
+    fields = list(rows[0]["design"].as_dict())
+    numbers = ("target", "predicted_dc", "simulated_dc", "separation", "footprint", "pressure", "clog_margin",
+               "score")
+    ranks = []
+    for i, row in enumerate(rows):
+        ranks.append(ranks[-1] + 1 if i and row["target"] == rows[i - 1]["target"] else 0)
+    columns = {name: [row["design"].as_dict()[name] for row in rows] for name in fields}
+    columns.update({name: [row.get(name, np.nan) for row in rows] for name in numbers})
+    writer.append(table, rank=ranks, **columns)
+
+
+# To stream a Monte Carlo run through the three-section chip of dlddevice.py to disk, in batches
+# (output directory, particles per size, batch, optional zlib level), and read it back shard by shard:
+# python resultstore.py dld_results 1000000 100000 1
+if __name__ == "__main__":
+    directory = sys.argv[1] if len(sys.argv) > 1 else "dld_results"
+    particles = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000
+    batch = int(sys.argv[3]) if len(sys.argv) > 3 else 100_000
+    compression = int(sys.argv[4]) if len(sys.argv) > 4 else None
+
+    width = 600.0
+    sections = [DLDDesign(34, 15, 0.1121, num_rows=60), DLDDesign(29, 17.5, 0.0602, num_rows=60),
+                DLDDesign(20, 10, 0.05, num_rows=100)]
+    device = DLDDevice(sections, width)
+    diameters = list(CELL_DIAMETERS.values())
+    bounds = np.array([0, 0.2, 0.53, 0.9, 1]) * width
+
+    start = time.perf_counter()
+    with ResultWriter(directory, compression=compression, attrs={"diameters": diameters, "width": width}) as writer:
+        fractions = write_device_trace(writer, device, diameters, bounds, particles, batch)
+        write_particle_steps(writer, sections[-1], np.repeat(diameters, 25), every=5)
+    seconds = time.perf_counter() - start
+    size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+    print(f"{len(diameters) * particles} outlet positions written in {seconds:.2f}s, {size / 1e6:.1f} MB on disk")
+
+    reader = ResultReader(directory)
+    for table in reader.tables:
+        print(f"{table}: {reader.num_rows(table)} rows in {len(reader.table(table)['shards'])} shards, "
+              f"columns {', '.join(reader.columns(table))}")
+
+    # Outlet fractions again, from the shards one at a time
+    counts = np.zeros_like(fractions)
+    for shard in reader.shards("outlets", ["size", "lateral"]):
+        for s in range(len(diameters)):
+            counts[s] += np.histogram(shard["lateral"][shard["size"] == s], bounds)[0]
+    expected = simulate_device(device, diameters).outlet_fractions(bounds)
+    print(f"outlet fractions re-read from shards match the run: {np.allclose(counts / particles, fractions)}, "
+          f"largest difference from simulate_device {np.abs(fractions - expected).max():.4f}")
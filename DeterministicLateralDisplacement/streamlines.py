@@ -0,0 +1,116 @@
+from manim import *
+import numpy as np
+
+
+def smooth_bezier_points(anchors):
+    """
+    Fits smooth cubic Bézier curves through many paths at once.
+
+    anchors is a (num_paths, num_anchors, 3) array. Returns the control points
+    as a (num_paths, (num_anchors - 1) * 4, 3) array in manim's layout, with
+    the same C2 spline that VMobject.set_points_smoothly uses, but with the
+    tridiagonal system solved for every path in one vectorized Thomas sweep.
+    """
+    anchors = np.asarray(anchors, dtype=float)
+    num_paths, num_anchors, dim = anchors.shape
+    n = num_anchors - 1  # Curves per path
+
+    if n == 1:
+        # A single segment is just a straight line with handles at the thirds
+        first = anchors[:, 0] + (anchors[:, 1] - anchors[:, 0]) / 3
+        second = anchors[:, 0] + 2 * (anchors[:, 1] - anchors[:, 0]) / 3
+        curves = np.stack([anchors[:, 0], first, second, anchors[:, 1]], axis=1)
+        return curves
+
+    # Tridiagonal system for the first handle of every curve, shared by all paths
+    lower = np.ones(n)
+    diag = np.full(n, 4.0)
+    upper = np.ones(n)
+    diag[0], diag[-1] = 2.0, 7.0
+    lower[-1] = 2.0
+
+    rhs = 4 * anchors[:, :-1] + 2 * anchors[:, 1:]
+    rhs[:, 0] = anchors[:, 0] + 2 * anchors[:, 1]
+    rhs[:, -1] = 8 * anchors[:, -2] + anchors[:, -1]
+
+    # Forward sweep: the coefficients don't depend on the path, only the right side does
+    c_prime = np.zeros(n)
+    d_prime = np.zeros_like(rhs)
+    c_prime[0] = upper[0] / diag[0]
+    d_prime[:, 0] = rhs[:, 0] / diag[0]
+    for i in range(1, n):
+        denom = diag[i] - lower[i] * c_prime[i - 1]
+        c_prime[i] = upper[i] / denom
+        d_prime[:, i] = (rhs[:, i] - lower[i] * d_prime[:, i - 1]) / denom
+
+    # Back substitution
+    first = np.zeros_like(rhs)
+    first[:, -1] = d_prime[:, -1]
+    for i in range(n - 2, -1, -1):
+        first[:, i] = d_prime[:, i] - c_prime[i] * first[:, i + 1]
+
+    # Second handles follow from C1/C2 continuity and the natural end condition
+    second = np.zeros_like(first)
+    second[:, :-1] = 2 * anchors[:, 1:-1] - first[:, 1:]
+    second[:, -1] = (anchors[:, -1] + first[:, -1]) / 2
+
+    curves = np.stack([anchors[:, :-1], first, second, anchors[:, 1:]], axis=2)
+    return curves.reshape(num_paths, n * 4, dim)
+
+
+class StreamlineBundle(VMobject):
+    """
+    A whole set of streamlines stored as subpaths of a single VMobject.
+
+    All curves live in one contiguous point array, so fading, styling or
+    moving thousands of streamlines costs the same as one. Individual
+    streamlines can still be pulled out with get_streamline when something
+    needs to follow a single path (e.g. MoveAlongPath for a particle).
+    """
+
+    def __init__(self, paths=None, **kwargs):
+        super().__init__(**kwargs)
+        self.curves_per_streamline = np.zeros(0, dtype=int)
+        if paths is not None:
+            self.set_streamlines(paths)
+
+    def set_streamlines(self, paths):
+        """Fits smooth curves through each path's anchor points and stores them all at once"""
+        # Paths of equal length are fitted together; ragged input is grouped by length
+        paths = [np.asarray(path, dtype=float) for path in paths]
+        lengths = np.array([len(path) for path in paths])
+        fitted = [None] * len(paths)
+        for length in np.unique(lengths):
+            indices = np.flatnonzero(lengths == length)
+            curves = smooth_bezier_points(np.stack([paths[i] for i in indices]))
+            for i, curve in zip(indices, curves):
+                fitted[i] = curve
+
+        self.curves_per_streamline = lengths - 1
+        self.points = np.concatenate(fitted) if fitted else np.zeros((0, 3))
+        return self
+
+    @property
+    def num_streamlines(self):
+        return len(self.curves_per_streamline)
+
+    def get_streamline_slice(self, index):
+        """Returns the slice of self.points that belongs to one streamline"""
+        offsets = np.concatenate([[0], np.cumsum(self.curves_per_streamline) * 4])
+        return slice(offsets[index], offsets[index + 1])
+
+    def get_start_points(self):
+        """Returns the first anchor of every streamline"""
+        offsets = np.concatenate([[0], np.cumsum(self.curves_per_streamline)[:-1] * 4])
+        return self.points[offsets]
+
+    def get_end_points(self):
+        """Returns the last anchor of every streamline"""
+        offsets = np.cumsum(self.curves_per_streamline) * 4 - 1
+        return self.points[offsets]
+
+    def get_streamline(self, index, **kwargs):
+        """Returns a standalone VMobject for one streamline, e.g. as a MoveAlongPath path"""
+        streamline = VMobject(**kwargs)
+        streamline.points = self.points[self.get_streamline_slice(index)].copy()
+        return streamline
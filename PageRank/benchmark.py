@@ -0,0 +1,125 @@
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import scipy
+
+from generators import GENERATORS, make_graph
+from rankengine import pagerank
+from solvers import SOLVERS, solve
+
+# Sizes and graph kinds run when none are given
+DEFAULT_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+DEFAULT_KINDS = ("erdos_renyi", "barabasi_albert", "web")
+
+
+def measure(graph, method, damping, tol, max_iter, track_memory=True):
+    """
+    Runs one solver, returning (result, seconds, peak bytes).
+
+    Time comes from an untraced run; the peak allocation comes from a second
+    run under tracemalloc (numpy reports its buffers to it), since tracing
+    slows allocation-heavy code down. peak is None without track_memory.
+    """
+    start = time.perf_counter()
+    result = solve(graph, method, damping, tol=tol, max_iter=max_iter)
+    seconds = time.perf_counter() - start
+
+    peak = None
+    if track_memory:
+        tracemalloc.start()
+        try:
+            solve(graph, method, damping, tol=tol, max_iter=max_iter)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return result, seconds, peak
+
+
+def run_benchmark(sizes=DEFAULT_SIZES, kinds=DEFAULT_KINDS, methods=None, damping=0.85, tol=1e-8, max_iter=1000,
+                  seed=0, track_memory=True, log=None):
+    """
+    Runs every solver over generated graphs of each kind and size.
+
+    Returns one row per (kind, size, method) with wall time, peak memory,
+    iterations and the L1 error against a power iteration converged far
+    below tol. The seed fixes every generated graph, so runs are reproducible.
+    """
+    methods = methods or list(SOLVERS)
+    rows = []
+    for kind in kinds:
+        for num_nodes in sizes:
+            start = time.perf_counter()
+            graph = make_graph(kind, int(num_nodes), seed=seed)
+            build_seconds = time.perf_counter() - start
+            reference = pagerank(graph, damping, tol=min(tol, 1e-12) / 100, max_iter=10 * max_iter).ranks
+            if log:
+                log(f"{kind} {graph.num_nodes} nodes, {graph.num_edges} edges, built in {build_seconds:.2f}s")
+
+            for method in methods:
+                result, seconds, peak = measure(graph, method, damping, tol, max_iter, track_memory)
+                rows.append({
+                    "kind": kind,
+                    "nodes": graph.num_nodes,
+                    "edges": graph.num_edges,
+                    "method": method,
+                    "seconds": seconds,
+                    "peak_mb": None if peak is None else peak / 2**20,
+                    "iterations": result.iterations,
+                    "error": float(np.abs(result.ranks - reference).sum()),
+                    "converged": bool(result.converged),
+                })
+                if log:
+                    log(format_benchmark(rows[-1:], header=False))
+    return rows
+
+
+def format_benchmark(rows, header=True):
+    """Formats run_benchmark rows as a table"""
+    lines = [f"{'graph':<17}{'nodes':>10}{'edges':>11}{'method':>14}{'time (s)':>10}{'peak MB':>10}"
+             f"{'iters':>7}{'L1 error':>11}"] if header else []
+    for row in rows:
+        peak = "-" if row["peak_mb"] is None else f"{row['peak_mb']:.1f}"
+        lines.append(
+            f"{row['kind']:<17}{row['nodes']:>10}{row['edges']:>11}{row['method']:>14}{row['seconds']:>10.3f}"
+            f"{peak:>10}{row['iterations']:>7}{row['error']:>11.2e}{'' if row['converged'] else '  (not converged)'}"
+        )
+    return "\n".join(lines)
+
+
+def save_benchmark(path, rows, **settings):
+    """Writes the rows with the settings and software versions that produced them, as JSON"""
+    record = {
+        "settings": settings,
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "scipy": scipy.__version__,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+        },
+        "rows": rows,
+    }
+    with open(path, "w") as f:
+        json.dump(record, f, indent=2)
+    return path
+
+
+# To benchmark every solver (comma-separated sizes and graph kinds, optional JSON output):
+# python benchmark.py 1000,10000,100000 erdos_renyi,barabasi_albert,web results.json
+if __name__ == "__main__":
+    sizes = [int(float(size)) for size in sys.argv[1].split(",")] if len(sys.argv) > 1 else DEFAULT_SIZES
+    kinds = sys.argv[2].split(",") if len(sys.argv) > 2 else DEFAULT_KINDS
+    unknown = set(kinds) - set(GENERATORS)
+    if unknown:
+        sys.exit(f"unknown graph kinds {sorted(unknown)}, expected some of {sorted(GENERATORS)}")
+
+    print(format_benchmark([]))
+    settings = {"sizes": list(sizes), "kinds": list(kinds), "damping": 0.85, "tol": 1e-8, "seed": 0}
+    rows = run_benchmark(sizes, kinds, damping=0.85, tol=1e-8, seed=0, log=print)
+    if len(sys.argv) > 3:
+        print(f"saved {save_benchmark(sys.argv[3], rows, **settings)}")
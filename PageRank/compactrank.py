@@ -0,0 +1,201 @@
+import sys
+import time
+
+import numpy as np
+import scipy.sparse as sp
+
+from rankengine import DEFAULT_DAMPING, RankResult, SparseGraph, pagerank, row_blocks
+from solvers import transition_setup
+
+# Below this L1 change float32 rounding of the gathered vector (about 6e-8
+# relative per entry) is no longer small next to the change itself
+FLOAT32_SWITCH = 1e-6
+
+# Nonzeros per row block of the compact SpMV; the shared ones array of this
+# length stays in cache, so uniform graphs read no per-edge values from memory
+COMPACT_BLOCK_NNZ = 1 << 20
+
+
+def index_dtype(limit):
+    """int32 when every value stays below limit, int64 otherwise"""
+    return np.int32 if limit < 2**31 else np.int64
+
+
+def compact_graph(graph):
+    """
+    The same graph with the narrowest arrays that hold it.
+
+    indptr and out_degree become int32 when the edge count fits, indices
+    when the node count fits, and weights (if any) float32. Unweighted graphs
+    keep storing no per-edge values at all, since every out-link of a node
+    has the same probability 1/outdegree. Arrays already narrow are not copied.
+    """
+    edge_type = index_dtype(graph.num_edges + 1)
+    node_type = index_dtype(graph.num_nodes + 1)
+    weights = None if graph.weights is None else np.asarray(graph.weights).astype(np.float32, copy=False)
+    return SparseGraph(
+        np.asarray(graph.indptr).astype(edge_type, copy=False),
+        np.asarray(graph.indices).astype(node_type, copy=False),
+        np.asarray(graph.out_degree).astype(edge_type, copy=False),
+        weights,
+    )
+
+
+def graph_bytes(graph):
+    """Bytes held by a graph's CSR arrays"""
+    arrays = [graph.indptr, graph.indices, graph.out_degree, graph.weights]
+    return sum(np.asarray(array).nbytes for array in arrays if array is not None)
+
+
+class CompactOperator:
+    """
+    y = P^T-style in-link sums over a compact graph, for float32 or float64 vectors.
+
+    Rows are cut into blocks of about block_nnz nonzeros and each block is
+    a scipy CSR matrix over views of the graph's own int32 index arrays (only
+    the block's rebased indptr is new), so the sums run in compiled code.
+    Unweighted graphs get one shared array of ones as every block's values
+    instead of a per-edge array. A set of blocks is made per vector dtype,
+    since scipy would otherwise upcast the values on every product.
+    """
+
+    def __init__(self, graph, block_nnz=COMPACT_BLOCK_NNZ):
+        self.graph = graph
+        self.bounds = row_blocks(np.asarray(graph.indptr), block_nnz)
+        self.blocks = {}
+
+    def blocks_for(self, dtype):
+        dtype = np.dtype(dtype)
+        if dtype not in self.blocks:
+            graph = self.graph
+            indptr, indices = np.asarray(graph.indptr), np.asarray(graph.indices)
+            index_type = indices.dtype
+            largest = max((int(indptr[hi] - indptr[lo]) for lo, hi in self.bounds), default=0)
+            ones = np.ones(largest, dtype=dtype) if graph.weights is None else None
+            weights = None if graph.weights is None else np.asarray(graph.weights).astype(dtype, copy=False)
+
+            blocks = []
+            for lo, hi in self.bounds:
+                first, last = int(indptr[lo]), int(indptr[hi])
+                # Assigned after construction: scipy's constructor copies small views of large arrays
+                block = sp.csr_matrix((hi - lo, graph.num_nodes), dtype=dtype)
+                block.indptr = (indptr[lo:hi + 1] - first).astype(index_type)
+                block.indices = indices[first:last]
+                block.data = ones[:last - first] if weights is None else weights[first:last]
+                blocks.append((lo, hi, block))
+            self.blocks[dtype] = blocks
+        return self.blocks[dtype]
+
+    def __call__(self, z, out=None):
+        """Returns the in-link sums of z as float64, accumulated in z's dtype"""
+        if out is None:
+            out = np.empty(self.graph.num_nodes)
+        for lo, hi, block in self.blocks_for(z.dtype):
+            out[lo:hi] = block @ z
+        return out
+
+
+def compact_pagerank(graph, damping=DEFAULT_DAMPING, teleport=None, tol=1e-10, max_iter=1000, x0=None,
+                     precision="mixed"):
+    """
+    Power iteration over the compact graph with a float32 gathered vector.
+
+    The ranks, the dangling and teleport terms and the renormalizing sum stay
+    float64; only the vector the SpMV gathers per edge, x / outdegree, is
+    rounded to float32. With int32 indices that halves the bytes read per
+    edge, and unweighted graphs still read no per-edge values (see
+    CompactOperator). Rounding the gathered vector leaves its fixed point
+    about 1e-7 (L1) from the float64 one, so precision="mixed" switches to
+    the float64 blocks once the change drops below FLOAT32_SWITCH and the
+    result matches the float64 solve. "float32" is the lossy mode: it keeps
+    float32 gathers throughout (stopping early if the change stalls) and is
+    for callers that only need the ordering.
+    """
+    if precision not in ("mixed", "float32"):
+        raise ValueError(f"unknown precision {precision!r}, expected 'mixed' or 'float32'")
+    operator = CompactOperator(compact_graph(graph))
+    v, dangling, inv_out = transition_setup(graph, teleport)
+    x = v.copy() if x0 is None else np.asarray(x0, dtype=np.float64) / np.sum(x0)
+
+    gather_type = np.float32
+    residuals = []
+    iteration = 0
+    for iteration in range(1, max_iter + 1):
+        z = x * inv_out
+        x_next = operator(z.astype(gather_type, copy=False))
+        x_next *= damping
+        x_next += (damping * x[dangling].sum() + (1 - damping)) * v
+        x_next /= x_next.sum()
+        residual = np.abs(x_next - x).sum()
+        x = x_next
+
+        stalled = gather_type == np.float32 and residual < FLOAT32_SWITCH and residuals and residual >= residuals[-1]
+        residuals.append(residual)
+        if residual < tol:
+            break
+        if stalled or (precision == "mixed" and residual < FLOAT32_SWITCH):
+            if precision == "float32":
+                break
+            gather_type = np.float64
+    converged = bool(residuals) and residuals[-1] < tol
+    return RankResult(x, iteration, residuals, converged, method=f"compact_{precision}")
+
+
+def precision_report(graph, damping=DEFAULT_DAMPING, tol=1e-10, top_k=100):
+    """
+    Compares float32 and mixed compact solves against the float64 engine.
+
+    Returns one row per mode with graph bytes, seconds, iterations, L1 and
+    largest relative error against a tightly converged float64 reference,
+    and how many of the reference top_k nodes each mode ranks in its own top_k.
+    """
+    reference = pagerank(graph, damping, tol=min(tol, 1e-13) / 100, max_iter=10_000)
+    top = set(reference.top(top_k)[0].tolist())
+    compact_size = graph_bytes(compact_graph(graph))
+
+    rows = []
+    for mode, solver in [
+        ("float64", lambda: pagerank(graph, damping, tol=tol)),
+        ("mixed", lambda: compact_pagerank(graph, damping, tol=tol, precision="mixed")),
+        ("float32", lambda: compact_pagerank(graph, damping, tol=tol, precision="float32")),
+    ]:
+        start = time.perf_counter()
+        result = solver()
+        seconds = time.perf_counter() - start
+        error = np.abs(result.ranks - reference.ranks)
+        rows.append({
+            "mode": mode,
+            "graph_bytes": graph_bytes(graph) if mode == "float64" else compact_size,
+            "seconds": seconds,
+            "iterations": result.iterations,
+            "seconds_per_iteration": seconds / max(result.iterations, 1),
+            "l1_error": float(error.sum()),
+            "max_relative_error": float((error / reference.ranks).max()),
+            "top_k_agreement": len(top & set(result.top(top_k)[0].tolist())) / max(len(top), 1),
+            "converged": result.converged,
+        })
+    return rows
+
+
+def format_precision_report(rows):
+    lines = [f"{'mode':<9}{'graph MB':>10}{'time (s)':>10}{'iters':>7}{'ms/iter':>9}{'L1 error':>11}"
+             f"{'max rel':>10}{'top-k':>7}"]
+    for row in rows:
+        lines.append(
+            f"{row['mode']:<9}{row['graph_bytes'] / 2**20:>10.1f}{row['seconds']:>10.2f}{row['iterations']:>7}"
+            f"{row['seconds_per_iteration'] * 1000:>9.1f}{row['l1_error']:>11.2e}{row['max_relative_error']:>10.2e}"
+            f"{row['top_k_agreement']:>7.2f}{'' if row['converged'] else '  (not converged)'}"
+        )
+    return "\n".join(lines)
+
+
+# To compare compact float32 / mixed precision with float64 on a random web graph (nodes, damping):
+# python compactrank.py 2000000 0.85
+if __name__ == "__main__":
+    from generators import make_graph
+
+    num_nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    damping = float(sys.argv[2]) if len(sys.argv) > 2 else 0.85
+    graph = make_graph("web", num_nodes, seed=0)
+    print(f"{graph.num_nodes} nodes, {graph.num_edges} edges")
+    print(format_precision_report(precision_report(graph, damping)))
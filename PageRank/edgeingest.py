@@ -0,0 +1,226 @@
+import io
+import json
+import os
+import sys
+import warnings
+
+import numpy as np
+
+from rankengine import SparseGraph
+
+# Bytes of text parsed per chunk; each chunk becomes one (E_chunk, 2) array
+DEFAULT_CHUNK_BYTES = 64 << 20
+
+# Edges sorted and deduplicated at once during the cleanup pass
+DEFAULT_BLOCK_EDGES = 1 << 24
+
+INDEX_DTYPE = np.int64
+
+
+def read_text_blocks(path, chunk_bytes=DEFAULT_CHUNK_BYTES, comments=(b"#", b"%")):
+    """
+    Yields a text file as blocks of about chunk_bytes, each cut at its last newline.
+
+    Commas are replaced by spaces so they separate columns like whitespace,
+    and lines starting with a comment marker are dropped.
+    """
+    with open(path, "rb") as f:
+        leftover = b""
+        while True:
+            block = f.read(chunk_bytes)
+            if block:
+                # Keep the partial last line for the next block
+                block = leftover + block
+                cut = block.rfind(b"\n") + 1
+                block, leftover = block[:cut], block[cut:]
+            elif leftover:
+                block, leftover = leftover, b""
+            else:
+                break
+
+            if any(marker in block for marker in comments):
+                lines = block.splitlines()
+                block = b"\n".join(line for line in lines if not line.lstrip().startswith(comments))
+            if block.strip():
+                yield block.replace(b",", b" ")
+
+
+def parse_edge_block(block, dtype, path):
+    """(E, 2) array of the first two columns of each line; raises ValueError if a line has fewer"""
+    try:
+        with warnings.catch_warnings():
+            # Flexible dtypes read in pieces and warn about blank lines not counting towards max_rows
+            warnings.filterwarnings("ignore", "Input line", UserWarning)
+            # latin1 maps every byte to one character, so "S" columns come back as the file's own bytes
+            return np.loadtxt(io.BytesIO(block), dtype=dtype, usecols=(0, 1), comments=None, ndmin=2,
+                              encoding="latin1")
+    except ValueError as error:
+        raise ValueError(f"{path}: every edge needs a start and an end column ({error})") from error
+
+
+def read_label_chunks(path, chunk_bytes=DEFAULT_CHUNK_BYTES, comments=(b"#", b"%")):
+    """
+    Yields (E_chunk, 2) arrays of the raw (start, end) tokens of a text edge list, as bytes.
+
+    Columns may be separated by whitespace, tabs or commas. Extra columns
+    (weights, timestamps) are ignored, rows may differ in how many they
+    have, and comment lines are skipped.
+    """
+    for block in read_text_blocks(path, chunk_bytes, comments):
+        yield parse_edge_block(block, "S", path)
+
+
+def read_edge_chunks(path, chunk_bytes=DEFAULT_CHUNK_BYTES, comments=(b"#", b"%")):
+    """Yields (E_chunk, 2) int64 arrays of (start, end) edges from a text edge list of integer ids"""
+    for block in read_text_blocks(path, chunk_bytes, comments):
+        yield parse_edge_block(block, np.int64, path)
+
+
+def array_edge_chunks(edges, chunk_edges=DEFAULT_BLOCK_EDGES):
+    """Yields an in-memory (E, 2) edge array in chunks, for sources that are already arrays"""
+    edges = np.asarray(edges).reshape(-1, 2)
+    for lo in range(0, len(edges), chunk_edges):
+        yield np.asarray(edges[lo:lo + chunk_edges], dtype=np.int64)
+
+
+def count_degrees(chunks):
+    """First pass: returns in-degree and out-degree counts over all chunks"""
+    in_counts = np.zeros(0, dtype=np.int64)
+    out_counts = np.zeros(0, dtype=np.int64)
+    for chunk in chunks:
+        if len(chunk) == 0:
+            continue
+        size = int(chunk.max()) + 1
+        if size > len(in_counts):
+            in_counts = np.concatenate([in_counts, np.zeros(size - len(in_counts), dtype=np.int64)])
+            out_counts = np.concatenate([out_counts, np.zeros(size - len(out_counts), dtype=np.int64)])
+        in_counts += np.bincount(chunk[:, 1], minlength=len(in_counts))
+        out_counts += np.bincount(chunk[:, 0], minlength=len(out_counts))
+    return in_counts, out_counts
+
+
+def fill_indices(chunks, indptr, indices):
+    """Second pass: scatters every chunk's sources into their rows of the CSR"""
+    cursor = np.array(indptr[:-1], dtype=np.int64)
+    for chunk in chunks:
+        if len(chunk) == 0:
+            continue
+        # Group the chunk by destination row, then place each group at the row's cursor
+        order = np.argsort(chunk[:, 1], kind="stable")
+        ends = chunk[order, 1]
+        starts = chunk[order, 0]
+
+        rows, first, counts = np.unique(ends, return_index=True, return_counts=True)
+        offset_in_row = np.arange(len(ends)) - np.repeat(first, counts)
+        indices[cursor[ends] + offset_in_row] = starts
+        cursor[rows] += counts
+
+
+def dedupe_rows(indptr, indices, block_edges=DEFAULT_BLOCK_EDGES):
+    """
+    Removes repeated links within every row, compacting indices in place.
+
+    Returns the new indptr; the caller truncates indices to indptr[-1].
+    Writes never overtake reads, so the compaction is safe on a memmap.
+    """
+    num_rows = len(indptr) - 1
+    new_indptr = np.zeros(num_rows + 1, dtype=np.int64)
+    write = 0
+    row = 0
+    while row < num_rows:
+        # Take as many whole rows as fit in one block (at least one)
+        stop = int(np.searchsorted(indptr, indptr[row] + block_edges, side="right")) - 1
+        stop = min(max(stop, row + 1), num_rows)
+        lo, hi = int(indptr[row]), int(indptr[stop])
+
+        block = np.array(indices[lo:hi])
+        row_ids = np.repeat(np.arange(row, stop), np.diff(indptr[row:stop + 1]))
+        order = np.lexsort((block, row_ids))
+        block, row_ids = block[order], row_ids[order]
+        keep = np.ones(len(block), dtype=bool)
+        keep[1:] = (block[1:] != block[:-1]) | (row_ids[1:] != row_ids[:-1])
+
+        kept = block[keep]
+        indices[write:write + len(kept)] = kept
+        new_indptr[row + 1:stop + 1] = write + np.cumsum(np.bincount(row_ids[keep] - row, minlength=stop - row))
+        write += len(kept)
+        row = stop
+    return new_indptr
+
+
+def ingest_edges(chunk_source, out_dir, num_nodes=None, dedupe=True):
+    """
+    Builds a memory-mapped in-link CSR from a re-iterable edge source.
+
+    chunk_source is a callable returning a fresh iterator of (E_chunk, 2)
+    edge arrays, since the build makes two passes: one to count degrees and
+    one to fill indices straight into a file-backed memmap. Only O(n) arrays
+    (degrees and row cursors) are held in RAM, never the edge list.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+
+    in_counts, out_counts = count_degrees(chunk_source())
+    n = max(len(in_counts), num_nodes or 0)
+    in_counts = np.concatenate([in_counts, np.zeros(n - len(in_counts), dtype=np.int64)])
+    out_counts = np.concatenate([out_counts, np.zeros(n - len(out_counts), dtype=np.int64)])
+
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(in_counts, out=indptr[1:])
+    num_edges = int(indptr[-1])
+
+    indices_path = os.path.join(out_dir, "indices.bin")
+    indices = np.memmap(indices_path, dtype=INDEX_DTYPE, mode="w+", shape=(max(num_edges, 1),))
+    fill_indices(chunk_source(), indptr, indices)
+
+    if dedupe and num_edges:
+        indptr = dedupe_rows(indptr, indices)
+        num_edges = int(indptr[-1])
+
+        # Out-degrees change when repeated links are dropped; recount from the file
+        out_counts = np.zeros(n, dtype=np.int64)
+        for lo in range(0, num_edges, DEFAULT_BLOCK_EDGES):
+            out_counts += np.bincount(indices[lo:min(lo + DEFAULT_BLOCK_EDGES, num_edges)], minlength=n)
+    indices.flush()
+    del indices
+    os.truncate(indices_path, max(num_edges, 1) * np.dtype(INDEX_DTYPE).itemsize)
+
+    indptr.tofile(os.path.join(out_dir, "indptr.bin"))
+    out_counts.tofile(os.path.join(out_dir, "out_degree.bin"))
+    with open(os.path.join(out_dir, "meta.json"), "w") as f:
+        json.dump({
+            "num_nodes": int(n),
+            "num_edges": int(num_edges),
+            "index_dtype": np.dtype(INDEX_DTYPE).name,
+        }, f, indent=2)
+    return open_mmap_graph(out_dir)
+
+
+def ingest_edge_file(path, out_dir, num_nodes=None, chunk_bytes=DEFAULT_CHUNK_BYTES, dedupe=True):
+    """Streams a text edge list from disk into a memory-mapped CSR directory"""
+    return ingest_edges(lambda: read_edge_chunks(path, chunk_bytes), out_dir, num_nodes, dedupe)
+
+
+def open_mmap_graph(out_dir):
+    """Opens a CSR directory written by ingest_edges as a read-only, memory-mapped SparseGraph"""
+    with open(os.path.join(out_dir, "meta.json")) as f:
+        meta = json.load(f)
+    n, num_edges = meta["num_nodes"], meta["num_edges"]
+    index_dtype = np.dtype(meta["index_dtype"])
+
+    indptr = np.memmap(os.path.join(out_dir, "indptr.bin"), dtype=np.int64, mode="r", shape=(n + 1,))
+    indices = np.memmap(os.path.join(out_dir, "indices.bin"), dtype=index_dtype, mode="r", shape=(max(num_edges, 1),))
+    out_degree = np.memmap(os.path.join(out_dir, "out_degree.bin"), dtype=np.int64, mode="r", shape=(n,))
+    return SparseGraph(indptr, indices[:num_edges], out_degree)
+
+
+# To ingest an edge list and rank it without loading it into memory:
+# python edgeingest.py edges.txt graph_dir
+if __name__ == "__main__":
+    from rankengine import pagerank
+
+    graph = ingest_edge_file(sys.argv[1], sys.argv[2])
+    result = pagerank(graph)
+    nodes, ranks = result.top(10)
+    print(f"{graph.num_nodes} nodes, {graph.num_edges} edges, {result.iterations} iterations")
+    for node, rank in zip(nodes, ranks):
+        print(f"{node}\t{rank:.6g}")
@@ -0,0 +1,173 @@
+from manim import *
+import numpy as np
+
+# Opacities closer than this share a style bucket (and so a child VMobject)
+OPACITY_STEP = 0.05
+
+
+def arc_curves(starts, ends, angle):
+    """
+    Cubic Bézier control points (E, 4, 3) for arcs from starts to ends.
+
+    Each arc turns by angle, like ArcBetweenPoints, and is approximated by
+    one cubic with handles of length 4/3 * tan(angle / 4) * radius. Also
+    returns the unit tangents at the end points, shape (E, 3). angle = 0
+    gives straight segments.
+    """
+    starts = np.asarray(starts, dtype=np.float64)
+    ends = np.asarray(ends, dtype=np.float64)
+    chord = ends - starts
+    length = np.maximum(np.linalg.norm(chord, axis=1), 1e-12)
+    direction = chord / length[:, None]
+
+    curves = np.empty((len(starts), 4, 3))
+    curves[:, 0], curves[:, 3] = starts, ends
+    if abs(angle) < 1e-6:
+        curves[:, 1] = starts + chord / 3
+        curves[:, 2] = starts + 2 * chord / 3
+        return curves, direction
+
+    # Rotating the chord direction by -angle/2 gives the tangent at the start,
+    # by +angle/2 the tangent at the end (the arc is symmetric about the chord)
+    def rotate(vectors, theta):
+        rotated = np.zeros_like(vectors)
+        rotated[:, 0] = np.cos(theta) * vectors[:, 0] - np.sin(theta) * vectors[:, 1]
+        rotated[:, 1] = np.sin(theta) * vectors[:, 0] + np.cos(theta) * vectors[:, 1]
+        return rotated
+
+    start_tangent = rotate(direction, -angle / 2)
+    end_tangent = rotate(direction, angle / 2)
+    radius = length / (2 * np.sin(abs(angle) / 2))
+    handle = 4 / 3 * np.tan(abs(angle) / 4) * radius
+    curves[:, 1] = starts + handle[:, None] * start_tangent
+    curves[:, 2] = ends - handle[:, None] * end_tangent
+    return curves, end_tangent
+
+
+def tip_triangles(points, directions, length, width):
+    """Control points (E, 12, 3) of filled triangular tips ending at points, as three straight cubics each"""
+    normal = np.zeros_like(directions)
+    normal[:, 0], normal[:, 1] = -directions[:, 1], directions[:, 0]
+    base = points - length * directions
+    corners = np.stack([points, base + width / 2 * normal, base - width / 2 * normal, points], axis=1)
+
+    triangles = np.empty((len(points), 3, 4, 3))
+    for side in range(3):
+        a, b = corners[:, side], corners[:, side + 1]
+        for k in range(4):
+            triangles[:, side, k] = a + (b - a) * k / 3
+    return triangles.reshape(len(points), 12, 3)
+
+
+class EdgeSet(VGroup):
+    """
+    Every edge of a graph, with arrow tips, drawn as a handful of VMobjects.
+
+    All arcs and tips are computed as arrays at once. Edges are bucketed by
+    their (color, opacity) style and each bucket is a single VMobject whose
+    subpaths are its edges (plus one filled VMobject for the bucket's tips),
+    so the number of objects doesn't grow with the number of edges. Colors and
+    opacities are per-edge arrays; changing them only regroups the points.
+    """
+
+    def __init__(self, starts, ends, angle=TAU / 4, color=WHITE, opacity=1.0, stroke_width=DEFAULT_STROKE_WIDTH,
+                 tip_length=DEFAULT_ARROW_TIP_LENGTH, tip_width=None, node_radius=0.0, **kwargs):
+        super().__init__(**kwargs)
+        starts = np.asarray(starts, dtype=np.float64)
+        ends = np.asarray(ends, dtype=np.float64)
+        self.edge_stroke_width = stroke_width
+        self.num_edges = len(starts)
+        self.edge_keys = {}
+
+        # Pull both ends back to the node boundaries along the straight line
+        chord = ends - starts
+        direction = chord / np.maximum(np.linalg.norm(chord, axis=1), 1e-12)[:, None]
+        starts = starts + direction * node_radius
+        ends = ends - direction * node_radius
+
+        self.has_tips = tip_length > 0
+        if self.has_tips:
+            # Stop the curve at the base of its tip, aiming the tip along the end tangent
+            _, tangent = arc_curves(starts, ends, angle)
+            tips = tip_triangles(ends, tangent, tip_length, tip_width or tip_length)
+            curves, _ = arc_curves(starts, ends - tip_length * tangent, angle)
+        else:
+            curves, _ = arc_curves(starts, ends, angle)
+            tips = np.zeros((len(starts), 0, 3))
+
+        self.colors = np.tile(color_to_rgb(color), (self.num_edges, 1))
+        self.opacities = np.full(self.num_edges, float(opacity))
+        self.regroup(curves, tips)
+
+    @classmethod
+    def from_graph(cls, edges, positions, **kwargs):
+        """Builds the edge set of (start, end) node pairs from an (n, 3) array of node positions"""
+        edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        positions = np.asarray(positions, dtype=np.float64)
+        edge_set = cls(positions[edges[:, 0]], positions[edges[:, 1]], **kwargs)
+        edge_set.edge_keys = {(int(start), int(end)): i for i, (start, end) in enumerate(edges)}
+        return edge_set
+
+    def get_edge_index(self, start, end):
+        return self.edge_keys[(start, end)]
+
+    def get_edge_points(self):
+        """Returns the current (E, 4, 3) curve and (E, 12, 3) tip control points, following any transforms"""
+        curves = np.zeros((self.num_edges, 4, 3))
+        tips = np.zeros((self.num_edges, 12 if self.has_tips else 0, 3))
+        for child in self.submobjects:
+            target = tips if child.edge_part == "tip" else curves
+            target[child.edge_indices] = child.points.reshape(len(child.edge_indices), -1, 3)
+        return curves, tips
+
+    def regroup(self, curves=None, tips=None):
+        """Rebuilds the per-style children from the per-edge points, colors and opacities"""
+        if curves is None:
+            curves, tips = self.get_edge_points()
+
+        opacity_level = np.round(self.opacities / OPACITY_STEP).astype(np.int64)
+        color_level = np.round(self.colors * 255).astype(np.int64)
+        keys = np.column_stack([color_level, opacity_level])
+        styles, bucket = np.unique(keys, axis=0, return_inverse=True)
+        bucket = bucket.ravel()
+
+        lines, heads = [], []
+        for index, style in enumerate(styles):
+            members = np.flatnonzero(bucket == index)
+            color = rgb_to_color(style[:3] / 255)
+            opacity = style[3] * OPACITY_STEP
+
+            line = VMobject(stroke_color=color, stroke_width=self.edge_stroke_width, stroke_opacity=opacity)
+            line.points = curves[members].reshape(-1, 3)
+            line.edge_part, line.edge_indices = "curve", members
+            lines.append(line)
+
+            if self.has_tips:
+                head = VMobject(fill_color=color, fill_opacity=opacity, stroke_width=0)
+                head.points = tips[members].reshape(-1, 3)
+                head.edge_part, head.edge_indices = "tip", members
+                heads.append(head)
+        self.submobjects = []
+        self.add(*lines, *heads)
+        return self
+
+    def set_edge_colors(self, color, indices=None):
+        """Sets the color of the given edges (all edges by default), one color or one per edge"""
+        indices = slice(None) if indices is None else np.asarray(indices)
+        if isinstance(color, (list, tuple, np.ndarray)) and not isinstance(color[0], (int, float, np.number)):
+            self.colors[indices] = np.array([color_to_rgb(each) for each in color])
+        else:
+            self.colors[indices] = color_to_rgb(color)
+        return self.regroup()
+
+    def set_edge_opacities(self, opacity, indices=None):
+        """Sets the opacity of the given edges, a scalar or one value per edge"""
+        indices = slice(None) if indices is None else np.asarray(indices)
+        self.opacities[indices] = opacity
+        return self.regroup()
+
+    def highlight(self, indices, color=YELLOW, base_color=WHITE):
+        """Colors the given edges and resets every other edge to base_color"""
+        self.colors[:] = color_to_rgb(base_color)
+        self.colors[np.asarray(indices)] = color_to_rgb(color)
+        return self.regroup()
@@ -0,0 +1,158 @@
+import numpy as np
+
+from rankengine import SparseGraph
+
+
+def node_dtype(num_nodes):
+    """int32 node ids when they fit, halving the size of generated edge arrays"""
+    return np.int32 if num_nodes < 2**31 else np.int64
+
+
+def power_law_nodes(rng, num_nodes, size, exponent):
+    """
+    size node ids drawn with probability about (i + 1)^(-1 / (exponent - 1)).
+
+    The weights are sampled by inverting their continuous CDF rather than
+    searching a cumulative table, so each draw is O(1).
+    """
+    power = 1 - 1 / (exponent - 1)
+    if abs(power) < 1e-12:
+        x = np.exp(rng.random(size) * np.log(num_nodes + 1))
+    else:
+        x = (1 + rng.random(size) * ((num_nodes + 1) ** power - 1)) ** (1 / power)
+    return np.minimum(x.astype(np.int64) - 1, num_nodes - 1).astype(node_dtype(num_nodes))
+
+
+def erdos_renyi(num_nodes, average_degree=8.0, seed=None):
+    """
+    Directed G(n, m) edges with m = average_degree * n, as an (E, 2) array.
+
+    Start and end are drawn independently and uniformly; self-loops are
+    dropped and the rare repeated pair collapses when the graph is built.
+    """
+    rng = np.random.default_rng(seed)
+    edges = rng.integers(0, num_nodes, size=(int(average_degree * num_nodes), 2), dtype=node_dtype(num_nodes))
+    return edges[edges[:, 0] != edges[:, 1]]
+
+
+def barabasi_albert(num_nodes, links_per_node=4, seed=None):
+    """
+    Preferential attachment edges (new node -> older node), as an (E, 2) array.
+
+    Node t adds links_per_node links. Each picks a uniformly random earlier
+    link and, with a fair coin, takes either its start or its end, which
+    chooses an old node with probability proportional to its degree. Ends of
+    earlier links may themselves still be unresolved, so the choices are
+    followed as pointers, doubling the jump each round (O(E log E) overall),
+    instead of growing the graph one node at a time.
+    """
+    rng = np.random.default_rng(seed)
+    m = links_per_node
+    seed_nodes = max(m, 2)
+
+    # A ring on the first nodes gets every choice started
+    ring = np.arange(seed_nodes)
+    num_new = max(num_nodes - seed_nodes, 0) * m
+    starts = np.concatenate([ring, seed_nodes + np.arange(num_new) // m])
+    ends = np.concatenate([np.roll(ring, -1), np.full(num_new, -1)])
+
+    # Only links made by earlier nodes can be copied
+    batch_start = seed_nodes + (np.arange(num_new) // m) * m
+    picked = (rng.random(num_new) * batch_start).astype(np.int64)
+    take_start = rng.random(num_new) < 0.5
+
+    new = np.arange(seed_nodes, seed_nodes + num_new)
+    ends[new[take_start]] = starts[picked[take_start]]
+    link = np.full(len(starts), -1)
+    link[new[~take_start]] = picked[~take_start]
+
+    # Pointer jumping: an end is known once the link it copies is known. Every jump
+    # is read before this round's writes, since a target resolved in the same round
+    # has its link cleared to -1
+    pending = np.flatnonzero(link >= 0)
+    while len(pending):
+        target = link[pending]
+        known = ends[target] >= 0
+        jump = link[target[~known]]
+        ends[pending[known]] = ends[target[known]]
+        link[pending[known]] = -1
+        link[pending[~known]] = jump
+        pending = pending[~known]
+    # Every new link points back to an older node
+    assert (ends[seed_nodes:] >= 0).all() and (ends[seed_nodes:] < starts[seed_nodes:]).all()
+    edges = np.column_stack([starts, ends]).astype(node_dtype(num_nodes))
+    return edges[edges[:, 0] != edges[:, 1]]
+
+
+def chung_lu(num_nodes, average_degree=8.0, exponent=2.1, seed=None):
+    """
+    Power-law edges from the Chung-Lu model, as an (E, 2) array.
+
+    Node i gets weight (i + 1)^(-1 / (exponent - 1)); starts and ends
+    are drawn in proportion to the weights, so expected degrees follow a power
+    law with the given exponent. Unlike preferential attachment, nothing is
+    sequential, so it is a single sampling pass even at 1e7 nodes.
+    """
+    rng = np.random.default_rng(seed)
+    num_edges = int(average_degree * num_nodes)
+    # Shuffle ids so popularity isn't tied to node order
+    relabel = rng.permutation(num_nodes).astype(node_dtype(num_nodes))
+    edges = np.empty((num_edges, 2), dtype=node_dtype(num_nodes))
+    edges[:, 0] = relabel[power_law_nodes(rng, num_nodes, num_edges, exponent)]
+    edges[:, 1] = relabel[power_law_nodes(rng, num_nodes, num_edges, exponent)]
+    return edges[edges[:, 0] != edges[:, 1]]
+
+
+def web_graph(num_nodes, average_degree=8.0, dangling_fraction=0.2, locality=0.8, host_size=50,
+              exponent=2.1, seed=None):
+    """
+    Web-like edges, as an (E, 2) array.
+
+    Pages sit on hosts of geometric size (mean host_size). A locality
+    fraction of links stay on the page's own host; the rest go to pages
+    drawn with power-law popularity across the whole web. A dangling_fraction
+    of pages (PDFs, images, pages not yet crawled) have no out-links at all.
+    """
+    rng = np.random.default_rng(seed)
+    dtype = node_dtype(num_nodes)
+    sizes = rng.geometric(1 / host_size, size=num_nodes // max(host_size // 4, 1) + 1)
+    bounds = np.concatenate([[0], np.cumsum(sizes)])
+    bounds = np.append(bounds[bounds < num_nodes], num_nodes).astype(dtype)
+
+    linking = np.flatnonzero(rng.random(num_nodes) >= dangling_fraction).astype(dtype)
+    if len(linking) == 0:
+        return np.zeros((0, 2), dtype=dtype)
+    num_edges = int(average_degree * num_nodes)
+    edges = np.empty((num_edges, 2), dtype=dtype)
+    edges[:, 0] = linking[rng.integers(0, len(linking), size=num_edges)]
+
+    # Local links: uniform within the start's host
+    is_local = rng.random(num_edges) < locality
+    local = np.flatnonzero(is_local)
+    host = np.searchsorted(bounds, edges[local, 0], side="right") - 1
+    lo, hi = bounds[host], bounds[host + 1]
+    edges[local, 1] = lo + (rng.random(len(local)) * (hi - lo)).astype(dtype)
+    del local, host, lo, hi
+
+    # Remote links: power-law popularity over shuffled ids
+    remote = np.flatnonzero(~is_local)
+    relabel = rng.permutation(num_nodes).astype(dtype)
+    edges[remote, 1] = relabel[power_law_nodes(rng, num_nodes, len(remote), exponent)]
+    del remote, relabel
+    return edges[edges[:, 0] != edges[:, 1]]
+
+
+# Generator name -> function(num_nodes, seed=...) returning an (E, 2) edge array
+GENERATORS = {
+    "erdos_renyi": erdos_renyi,
+    "barabasi_albert": barabasi_albert,
+    "chung_lu": chung_lu,
+    "web": web_graph,
+}
+
+
+def make_graph(kind, num_nodes, seed=0, **kwargs):
+    """Builds a SparseGraph from one of GENERATORS"""
+    if kind not in GENERATORS:
+        raise ValueError(f"unknown graph generator {kind!r}, expected one of {sorted(GENERATORS)}")
+    return SparseGraph.from_edges(GENERATORS[kind](num_nodes, seed=seed, **kwargs), num_nodes)
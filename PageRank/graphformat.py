@@ -0,0 +1,246 @@
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+
+from edgeingest import DEFAULT_CHUNK_BYTES, ingest_edges, read_edge_chunks, read_label_chunks
+from rankengine import SparseGraph
+
+# First bytes of every graph file, followed by the header length as a little-endian uint64
+MAGIC = b"RGRAPH01"
+
+# Every array starts on a multiple of this many bytes, so memmaps are aligned
+ALIGNMENT = 64
+
+# Bytes hashed at a time when fingerprinting a source file
+HASH_BLOCK_BYTES = 16 << 20
+
+
+def aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+class GraphFile:
+    """
+    A graph opened from a .rgraph file: the SparseGraph plus its node-ID map and metadata.
+
+    All arrays are read-only memmaps into the one file, so opening is O(1)
+    regardless of size. node_ids[i] is the label node i had in the source
+    (sorted, so lookups are a binary search), or None when the source ids
+    were already 0..n-1.
+    """
+
+    def __init__(self, path, graph, node_ids, meta):
+        self.path = path
+        self.graph = graph
+        self.node_ids = node_ids
+        self.meta = meta
+
+    def index_of(self, labels):
+        """Maps source labels to node indices, raising KeyError for unknown labels"""
+        labels = np.asarray(labels)
+        if self.node_ids is None:
+            return labels.astype(np.int64)
+        ids_kind = self.node_ids.dtype.kind
+        query = labels
+        if ids_kind in "SU":
+            # Text imports store bytes (S<k>); str labels are looked up by their UTF-8 encoding
+            if query.dtype.kind not in "SU":
+                query = query.astype(str)
+            if ids_kind == "S" and query.dtype.kind == "U":
+                query = np.char.encode(query, "utf-8")
+            cast = query.astype(self.node_ids.dtype)
+            # The cast truncates labels longer than the map's width, so those are unknown
+            known = np.asarray(np.char.str_len(cast) == np.char.str_len(query))
+        else:
+            cast = query.astype(self.node_ids.dtype)
+            # Fractional numbers are rounded by the cast, so those are unknown too
+            known = np.asarray(cast == query)
+        if len(self.node_ids):
+            found = np.minimum(np.searchsorted(self.node_ids, cast), len(self.node_ids) - 1)
+            known &= self.node_ids[found] == cast
+        else:
+            found = np.zeros(labels.shape, dtype=np.int64)
+            known = np.zeros(labels.shape, dtype=bool)
+        if not np.all(known):
+            raise KeyError(f"labels not in graph: {labels[~known][:5]}")
+        return found
+
+    def label_of(self, nodes):
+        """Maps node indices back to their source labels"""
+        nodes = np.asarray(nodes, dtype=np.int64)
+        return nodes if self.node_ids is None else self.node_ids[nodes]
+
+    def __repr__(self):
+        return f"GraphFile({self.path!r}, nodes={self.graph.num_nodes}, edges={self.graph.num_edges})"
+
+
+def write_graph(path, graph, node_ids=None, meta=None, block_items=1 << 24):
+    """
+    Writes a SparseGraph (and optional node-ID map) as one .rgraph file.
+
+    Layout: MAGIC, header length, a JSON header describing every array's
+    dtype, shape and offset, then the raw arrays at aligned offsets. Arrays
+    are copied in blocks, so memory-mapped graphs larger than RAM can be written.
+    The file is written under a temporary name and renamed at the end.
+    """
+    arrays = {
+        "indptr": graph.indptr,
+        "indices": graph.indices,
+        "out_degree": graph.out_degree,
+    }
+    if graph.weights is not None:
+        arrays["weights"] = graph.weights
+    if node_ids is not None:
+        arrays["node_ids"] = node_ids
+
+    header = {
+        "version": 1,
+        "num_nodes": graph.num_nodes,
+        "num_edges": graph.num_edges,
+        "meta": meta or {},
+        "arrays": {},
+    }
+    # Offsets depend on the header size, which depends on the offsets' digits;
+    # reserve room by sizing the header with maximal placeholder offsets first
+    for name, array in arrays.items():
+        header["arrays"][name] = {"dtype": np.dtype(array.dtype).str, "shape": list(np.shape(array)), "offset": 1 << 62}
+    start = aligned(len(MAGIC) + 8 + len(json.dumps(header).encode()))
+    offset = start
+    for name, array in arrays.items():
+        header["arrays"][name]["offset"] = offset
+        offset = aligned(offset + np.dtype(array.dtype).itemsize * int(np.prod(np.shape(array))))
+    header_bytes = json.dumps(header).encode().ljust(start - len(MAGIC) - 8)
+
+    partial = path + ".partial"
+    with open(partial, "wb") as f:
+        f.write(MAGIC)
+        f.write(np.uint64(len(header_bytes)).tobytes())
+        f.write(header_bytes)
+        for name, array in arrays.items():
+            f.seek(header["arrays"][name]["offset"])
+            flat = np.asarray(array).reshape(-1)
+            for lo in range(0, len(flat), block_items):
+                f.write(np.ascontiguousarray(flat[lo:lo + block_items]).tobytes())
+        f.truncate(max(offset, f.tell()))
+    os.replace(partial, path)
+    return path
+
+
+def open_graph(path):
+    """Opens a .rgraph file zero-copy, returning a GraphFile of read-only memmaps"""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a graph file")
+        length = int(np.frombuffer(f.read(8), dtype=np.uint64)[0])
+        header = json.loads(f.read(length).decode())
+
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        shape = tuple(spec["shape"])
+        if int(np.prod(shape)) == 0:
+            arrays[name] = np.zeros(shape, dtype=spec["dtype"])
+        else:
+            arrays[name] = np.memmap(path, dtype=spec["dtype"], mode="r", offset=spec["offset"], shape=shape)
+
+    graph = SparseGraph(arrays["indptr"], arrays["indices"], arrays["out_degree"], arrays.get("weights"))
+    return GraphFile(path, graph, arrays.get("node_ids"), header["meta"])
+
+
+def file_digest(path, cache_dir=None):
+    """
+    BLAKE2 digest of a file's contents, streamed in blocks.
+
+    With a cache_dir the digest is remembered against the file's path, size
+    and modification time, so an unchanged file isn't read again.
+    """
+    stat = os.stat(path)
+    stamp = f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    index_path = os.path.join(cache_dir, "digests.json") if cache_dir else None
+    index = {}
+    if index_path and os.path.exists(index_path):
+        with open(index_path) as f:
+            index = json.load(f)
+        if stamp in index:
+            return index[stamp]
+
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_BYTES), b""):
+            digest.update(block)
+    digest = digest.hexdigest()
+
+    if index_path:
+        index[stamp] = digest
+        with open(index_path, "w") as f:
+            json.dump(index, f, indent=2)
+    return digest
+
+
+def collect_labels(chunks, numeric):
+    """Sorted unique labels over all chunks, merged chunk by chunk so only distinct labels are held"""
+    labels = None
+    for chunk in chunks:
+        chunk_labels = np.unique(chunk.astype(np.int64, copy=False) if numeric else chunk)
+        labels = chunk_labels if labels is None else np.union1d(labels, chunk_labels)
+    return np.zeros(0, dtype=np.int64) if labels is None else labels
+
+
+def import_edge_list(path, cache_dir, numeric=True, dedupe=True, chunk_bytes=DEFAULT_CHUNK_BYTES):
+    """
+    Returns the GraphFile for a text edge list, converting it only if it isn't cached.
+
+    The cache file is named after the source's content digest (and the
+    import options), so an edited source gets a fresh conversion and an
+    unchanged one opens instantly. Labels are remapped to 0..n-1 in sorted
+    order and the map is stored as node_ids: numeric labels as int64,
+    anything else (numeric=False) as fixed-width byte strings.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    digest = file_digest(path, cache_dir)
+    options = f"{'n' if numeric else 's'}{'d' if dedupe else 'k'}"
+    cached = os.path.join(cache_dir, f"{digest}-{options}.rgraph")
+    if os.path.exists(cached):
+        return open_graph(cached)
+
+    read_chunks = read_edge_chunks if numeric else read_label_chunks
+    labels = collect_labels(read_chunks(path, chunk_bytes), numeric)
+
+    def remapped():
+        for chunk in read_chunks(path, chunk_bytes):
+            chunk = chunk if numeric else chunk.astype(labels.dtype)
+            yield np.searchsorted(labels, chunk).astype(np.int64)
+
+    # Build the CSR with the streaming two-pass ingest, then pack it into one file
+    scratch = tempfile.mkdtemp(dir=cache_dir)
+    try:
+        graph = ingest_edges(remapped, scratch, num_nodes=len(labels), dedupe=dedupe)
+        # Integer labels that already are 0..n-1 need no map
+        identity = numeric and (len(labels) == 0 or (labels[0] == 0 and labels[-1] == len(labels) - 1))
+        meta = {"source": os.path.abspath(path), "source_digest": digest, "dedupe": dedupe}
+        write_graph(cached, graph, None if identity else labels, meta)
+        del graph
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    return open_graph(cached)
+
+
+# To convert (once) and open a text edge list:
+# python graphformat.py edges.txt cache_dir
+if __name__ == "__main__":
+    import time
+
+    from rankengine import pagerank
+
+    start = time.perf_counter()
+    stored = import_edge_list(sys.argv[1], sys.argv[2])
+    print(f"{stored!r} ready in {time.perf_counter() - start:.2f}s")
+
+    result = pagerank(stored.graph)
+    nodes, ranks = result.top(10)
+    for label, rank in zip(stored.label_of(nodes), ranks):
+        print(f"{label.decode() if isinstance(label, bytes) else label}\t{rank:.6g}")
@@ -0,0 +1,304 @@
+import numpy as np
+
+from rankengine import (
+    DEFAULT_DAMPING,
+    SparseGraph,
+    in_link_sums,
+    pagerank,
+    teleport_vector,
+)
+
+
+class DynamicAdjacency:
+    """
+    Out-link lists in a CSR layout with slack, patched in place.
+
+    Every row owns a slot range [start, start + capacity) in one targets
+    array, of which the first length entries are in use. Insertions fill
+    free slots; a full row is moved to the end of the array with double the
+    capacity. Deletions swap the removed target with the row's last one.
+    """
+
+    def __init__(self, num_nodes, edges=(), slack=2.0):
+        edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        edges = np.unique(edges, axis=0)  # Sorted by source, repeated links dropped
+        degree = np.bincount(edges[:, 0], minlength=num_nodes)
+
+        self.length = degree.astype(np.int64)
+        self.capacity = np.maximum(np.ceil(degree * slack).astype(np.int64), 2)
+        self.start = np.zeros(num_nodes, dtype=np.int64)
+        np.cumsum(self.capacity[:-1], out=self.start[1:])
+        self.end = int(self.start[-1] + self.capacity[-1]) if num_nodes else 0
+
+        self.targets = np.full(max(self.end, 16), -1, dtype=np.int64)
+        row_starts = np.repeat(self.start, degree)
+        offsets = np.arange(len(edges)) - np.repeat(np.cumsum(degree) - degree, degree)
+        self.targets[row_starts + offsets] = edges[:, 1]
+        self.edge_count = len(edges)
+
+    @classmethod
+    def from_graph(cls, graph, slack=2.0):
+        return cls(graph.num_nodes, graph.edges(), slack)
+
+    @property
+    def num_nodes(self):
+        return len(self.length)
+
+    @property
+    def num_edges(self):
+        return self.edge_count
+
+    def neighbors(self, node):
+        """Returns a view of node's current out-links"""
+        start = self.start[node]
+        return self.targets[start:start + self.length[node]]
+
+    def gather(self, nodes):
+        """Returns (position in nodes, target) pairs for all out-links of nodes, vectorized"""
+        lengths = self.length[nodes]
+        owners = np.repeat(np.arange(len(nodes)), lengths)
+        offsets = np.arange(int(lengths.sum())) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        return owners, self.targets[self.start[nodes][owners] + offsets]
+
+    def add_edge(self, u, v):
+        """Adds u -> v, returning False if the link already exists"""
+        if np.any(self.neighbors(u) == v):
+            return False
+        if self.length[u] == self.capacity[u]:
+            self.relocate(u, max(4, 2 * int(self.capacity[u])))
+        self.targets[self.start[u] + self.length[u]] = v
+        self.length[u] += 1
+        self.edge_count += 1
+        return True
+
+    def remove_edge(self, u, v):
+        """Removes u -> v, returning False if there was no such link"""
+        row = self.neighbors(u)
+        found = np.flatnonzero(row == v)
+        if len(found) == 0:
+            return False
+        row[found[0]] = row[-1]
+        row[-1] = -1
+        self.length[u] -= 1
+        self.edge_count -= 1
+        return True
+
+    def relocate(self, node, capacity):
+        """Moves a row to fresh space at the end of the targets array"""
+        if self.end + capacity > len(self.targets):
+            grown = np.full(max(2 * len(self.targets), self.end + capacity), -1, dtype=np.int64)
+            grown[:self.end] = self.targets[:self.end]
+            self.targets = grown
+        row = self.neighbors(node).copy()
+        self.start[node] = self.end
+        self.capacity[node] = capacity
+        self.targets[self.end:self.end + len(row)] = row
+        self.end += capacity
+
+    def to_graph(self):
+        """Compacts the current links into an in-link SparseGraph, O(E)"""
+        owners, targets = self.gather(np.arange(self.num_nodes))
+        return SparseGraph.from_edges(np.column_stack([owners, targets]), self.num_nodes)
+
+
+class IncrementalPageRank:
+    """
+    PageRank kept up to date under batches of edge insertions and deletions.
+
+    Alongside the ranks x it keeps the residual r = (1-d) v + d P x - x of the
+    PageRank linear system, which bounds the error: ||pi - x||_1 <= ||r||_1 / (1-d).
+    An edge change at u only touches r on u's old and new out-links, and the
+    residual is then pushed locally (Gauss-Southwell style), largest first,
+    until the error bound is back under staleness_bound, an L1 bound on ranks
+    that sum to one. Work is proportional to the neighborhood that actually
+    changes. If pushing would touch more than max_work_fraction of the graph,
+    or the error bound can't be brought under staleness_bound, the ranks are
+    recomputed from scratch, warm-started from the current estimate.
+    """
+
+    def __init__(self, graph, damping=DEFAULT_DAMPING, teleport=None, tol=1e-10,
+                 staleness_bound=1e-4, max_work_fraction=0.1):
+        self.adjacency = DynamicAdjacency.from_graph(graph)
+        self.damping = damping
+        self.teleport = teleport
+        self.tol = tol
+        self.staleness_bound = staleness_bound
+        self.max_work_fraction = max_work_fraction
+        self.v = teleport_vector(graph.num_nodes, teleport)
+        self.x = None
+        self.full_recompute()
+
+    @property
+    def num_nodes(self):
+        return self.adjacency.num_nodes
+
+    @property
+    def ranks(self):
+        return self.x / self.x.sum()
+
+    @property
+    def error_bound(self):
+        """Upper bound on the L1 distance between the current ranks and the exact PageRank"""
+        return (self.residual_l1 + abs(self.uniform_residual)) / (1 - self.damping)
+
+    def full_recompute(self):
+        """Recomputes ranks and the exact residual over the whole graph"""
+        graph = self.adjacency.to_graph()
+        result = pagerank(graph, self.damping, self.v, self.tol, x0=self.x)
+        self.x = result.ranks.copy()
+
+        # Exact residual of the linear system for the new estimate
+        totals = graph.out_weight_totals()
+        dangling = totals == 0
+        inv_out = np.zeros(self.num_nodes)
+        inv_out[~dangling] = 1.0 / totals[~dangling]
+        follow = in_link_sums(graph, self.x * inv_out) + self.x[dangling].sum() * self.v
+        self.r = (1 - self.damping) * self.v + self.damping * follow - self.x
+        self.residual_l1 = np.abs(self.r).sum()
+
+        # Residual waiting to be spread along the teleport vector (from dangling pushes)
+        self.uniform_residual = 0.0
+        return result.iterations
+
+    def grow(self, num_nodes):
+        """Adds isolated nodes; the uniform teleport vector changes, so this recomputes"""
+        extra = num_nodes - self.num_nodes
+        if extra <= 0:
+            return
+        if self.teleport is not None:
+            raise ValueError("cannot grow a graph with a custom teleport vector")
+        adjacency = self.adjacency
+        owners, targets = adjacency.gather(np.arange(adjacency.num_nodes))
+        self.adjacency = DynamicAdjacency(num_nodes, np.column_stack([owners, targets]))
+        self.v = teleport_vector(num_nodes)
+        self.x = np.concatenate([self.x, np.zeros(extra)])
+        self.full_recompute()
+
+    def add_residual(self, nodes, amounts):
+        """Adds to the residual on nodes, keeping the running L1 norm in step"""
+        nodes, inverse = np.unique(nodes, return_inverse=True)
+        before = np.abs(self.r[nodes]).sum()
+        self.r[nodes] += np.bincount(inverse, weights=amounts, minlength=len(nodes))
+        self.residual_l1 += np.abs(self.r[nodes]).sum() - before
+        return nodes
+
+    def absorb_uniform_residual(self):
+        """
+        Clears the teleport-spread residual u * v without touching any edges.
+
+        Since (I - dP) x = (1-d) v - r, scaling x by 1 + u / (1-d) cancels u * v
+        exactly and leaves the residual r scaled by the same factor.
+        """
+        factor = 1 + self.uniform_residual / (1 - self.damping)
+        self.x *= factor
+        self.r *= factor
+        self.residual_l1 *= abs(factor)
+        self.uniform_residual = 0.0
+
+    def update(self, added=(), removed=()):
+        """
+        Applies a batch of edge additions and removals and refreshes the ranks.
+
+        Returns a dict describing what happened: the mode ("push" or "full"),
+        edges touched while pushing and the error bound afterwards.
+        """
+        added = np.asarray(added, dtype=np.int64).reshape(-1, 2)
+        removed = np.asarray(removed, dtype=np.int64).reshape(-1, 2)
+        changes = np.concatenate([added, removed])
+        if len(changes) and changes.max() >= self.num_nodes:
+            self.grow(int(changes.max()) + 1)
+
+        # Group the batch by source once; a stable sort keeps each source's changes in order
+        added = added[np.argsort(added[:, 0], kind="stable")]
+        removed = removed[np.argsort(removed[:, 0], kind="stable")]
+        sources = np.unique(changes[:, 0])
+        added_bounds = np.searchsorted(added[:, 0], [sources, sources + 1])
+        removed_bounds = np.searchsorted(removed[:, 0], [sources, sources + 1])
+
+        d = self.damping
+        touched = []
+        for i, u in enumerate(sources):
+            old = self.adjacency.neighbors(u).copy()
+            for v in removed[removed_bounds[0, i]:removed_bounds[1, i], 1]:
+                self.adjacency.remove_edge(u, v)
+            for v in added[added_bounds[0, i]:added_bounds[1, i], 1]:
+                self.adjacency.add_edge(u, v)
+            new = self.adjacency.neighbors(u).copy()
+
+            # Column u of the transition matrix changed: move d * x_u from the
+            # old distribution to the new one (dangling columns follow v)
+            mass = d * self.x[u]
+            if len(old):
+                touched.append(self.add_residual(old, np.full(len(old), -mass / len(old))))
+            else:
+                self.uniform_residual -= mass
+            if len(new):
+                touched.append(self.add_residual(new, np.full(len(new), mass / len(new))))
+            else:
+                self.uniform_residual += mass
+
+        candidates = np.unique(np.concatenate(touched)) if touched else np.zeros(0, dtype=np.int64)
+        if self.error_bound > self.staleness_bound:
+            self.absorb_uniform_residual()
+        work = self.push(candidates)
+        if work is not None and self.error_bound > self.staleness_bound:
+            # Pushes into dangling nodes add teleport-spread residual; anything
+            # still left over is residual outside the neighborhood pushed so far
+            self.absorb_uniform_residual()
+            more = self.push(np.arange(self.num_nodes))
+            work = None if more is None else work + more
+
+        if work is None or self.error_bound > self.staleness_bound:
+            iterations = self.full_recompute()
+            return {"mode": "full", "iterations": iterations, "error_bound": self.error_bound}
+        return {"mode": "push", "work": work, "error_bound": self.error_bound}
+
+    def push(self, candidates):
+        """
+        Pushes residual, largest first, until the error bound is under staleness_bound.
+
+        Each round takes the frontier nodes whose residual, relative to v, is
+        within a factor of two of the largest, moves it into x and spreads
+        d * r_u over u's out-links; nodes it lands on join the frontier.
+        Returns the edges touched, or None if the budget ran out.
+        """
+        d = self.damping
+        # Under floor * v per node the residual sums to at most half the staleness
+        # budget, and so does teleport-spread residual under floor
+        floor = 0.5 * self.staleness_bound * (1 - d)
+        budget = self.max_work_fraction * max(self.adjacency.num_edges, self.num_nodes)
+        tiny = np.finfo(float).tiny
+        work = 0
+
+        frontier = candidates
+        while len(frontier) and self.error_bound > self.staleness_bound:
+            if abs(self.uniform_residual) > floor:
+                self.absorb_uniform_residual()
+            ratios = np.abs(self.r[frontier]) / np.maximum(self.v[frontier], tiny)
+            largest = ratios.max()
+            if largest <= floor:
+                break
+            chosen = ratios > max(0.5 * largest, floor)
+            active = frontier[chosen]
+
+            amounts = self.r[active].copy()
+            self.x[active] += amounts
+            self.r[active] = 0
+            self.residual_l1 -= np.abs(amounts).sum()
+
+            degree = self.adjacency.length[active]
+            dangling = degree == 0
+            self.uniform_residual += d * amounts[dangling].sum()
+
+            sources = active[~dangling]
+            owners, targets = self.adjacency.gather(sources)
+            shares = d * amounts[~dangling] / degree[~dangling]
+            touched = self.add_residual(targets, shares[owners]) if len(targets) else targets
+
+            work += len(targets) + len(active)
+            if work > budget:
+                return None
+            # Nodes under the floor only come back if a later push lands on them
+            waiting = frontier[~chosen & (ratios > floor)]
+            frontier = np.union1d(waiting, touched)
+        return work
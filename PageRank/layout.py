@@ -0,0 +1,289 @@
+import hashlib
+import os
+import sys
+import time
+
+import numpy as np
+
+# Bits per axis of the Morton codes, which also caps the quadtree depth
+MORTON_BITS = 16
+
+# Barnes-Hut opening criterion: a cell of side s at distance r from a node is
+# treated as one body at its centre of mass when s / r < theta
+DEFAULT_THETA = 1.0
+
+# Layouts already computed in this process, keyed by graph hash and parameters
+LAYOUT_CACHE = {}
+
+
+def spread_bits(values):
+    """Moves bit k of each 16-bit value to bit 2k, leaving zeros in between"""
+    v = values.astype(np.uint64) & np.uint64(0xFFFF)
+    for shift, mask in ((8, 0x00FF00FF), (4, 0x0F0F0F0F), (2, 0x33333333), (1, 0x55555555)):
+        v = (v | (v << np.uint64(shift))) & np.uint64(mask)
+    return v
+
+
+def morton_codes(positions, lower, size, bits=MORTON_BITS):
+    """Z-order codes of 2-D points on a 2^bits grid over the square [lower, lower + size]"""
+    cells = np.floor((positions - lower) / size * (1 << bits)).astype(np.int64)
+    cells = np.clip(cells, 0, (1 << bits) - 1)
+    return spread_bits(cells[:, 0]) | (spread_bits(cells[:, 1]) << np.uint64(1))
+
+
+class QuadTree:
+    """
+    A linear (pointer-free) quadtree built from sorted Morton codes.
+
+    Level L holds one cell per distinct code prefix of 2L bits, with its point
+    count, centre of mass and the range of its children on level L + 1.
+    Because the points are sorted by code, every cell owns a contiguous run
+    of them, so masses and centroids come from one reduceat per level.
+    """
+
+    def __init__(self, positions, bits=MORTON_BITS):
+        self.positions = positions
+        n = len(positions)
+        lower = positions.min(axis=0)
+        self.size = max(float(np.ptp(positions, axis=0).max()), 1e-9) * (1 + 1e-9)
+        codes = morton_codes(positions, lower, self.size, bits)
+        order = np.argsort(codes, kind="stable")
+        codes = codes[order]
+        sorted_positions = positions[order]
+
+        self.mass, self.centroid, self.prefix, self.point_cell = [], [], [], []
+        for level in range(bits + 1):
+            prefix = codes >> np.uint64(2 * (bits - level))
+            new_cell = np.ones(n, dtype=bool)
+            new_cell[1:] = prefix[1:] != prefix[:-1]
+            starts = np.flatnonzero(new_cell)
+            mass = np.diff(np.append(starts, n))
+
+            self.prefix.append(prefix[starts])
+            self.mass.append(mass)
+            self.centroid.append(np.add.reduceat(sorted_positions, starts, axis=0) / mass[:, None])
+            point_cell = np.empty(n, dtype=np.int64)
+            point_cell[order] = np.cumsum(new_cell) - 1
+            self.point_cell.append(point_cell)
+
+            # Stop once every point has a cell of its own
+            if mass.max() == 1:
+                break
+        self.depth = len(self.mass) - 1
+
+        self.child_start, self.child_stop = [], []
+        for level in range(self.depth):
+            below = self.prefix[level + 1]
+            first = self.prefix[level] << np.uint64(2)
+            self.child_start.append(np.searchsorted(below, first))
+            self.child_stop.append(np.searchsorted(below, first + np.uint64(4)))
+
+    def cell_size(self, level):
+        return self.size / (1 << level)
+
+    def repulsion(self, strength=1.0, theta=DEFAULT_THETA):
+        """
+        Returns the (n, 2) repulsive forces strength * delta / |delta|^2 on every point.
+
+        The traversal runs breadth first over all (point, cell) pairs at once:
+        pairs that pass the opening criterion, or whose cell holds one point,
+        are summed directly; the rest are replaced by their child cells. A
+        point's own cell is always opened, and on the deepest level it
+        contributes its other points only.
+        """
+        positions = self.positions
+        n = len(positions)
+        forces = np.zeros((n, 2))
+        points = np.arange(n)
+        cells = np.zeros(n, dtype=np.int64)
+
+        for level in range(self.depth + 1):
+            if len(points) == 0:
+                break
+            mass = self.mass[level][cells].astype(np.float64)
+            centroid = self.centroid[level][cells]
+            own = self.point_cell[level][points] == cells
+
+            if level == self.depth:
+                # Leave the point itself out of its own (possibly shared) cell
+                others = mass[own] - 1
+                safe = np.maximum(others, 1)
+                centroid[own] = (centroid[own] * mass[own, None] - positions[points[own]]) / safe[:, None]
+                mass[own] = others
+
+            delta = positions[points] - centroid
+            distance_sq = np.maximum((delta ** 2).sum(axis=1), 1e-12)
+            if level == self.depth:
+                accept = np.ones(len(points), dtype=bool)
+            else:
+                accept = ~own & ((mass == 1) | (self.cell_size(level) ** 2 < theta ** 2 * distance_sq))
+
+            hit = points[accept]
+            push = strength * (mass[accept] / distance_sq[accept])[:, None] * delta[accept]
+            forces[:, 0] += np.bincount(hit, weights=push[:, 0], minlength=n)
+            forces[:, 1] += np.bincount(hit, weights=push[:, 1], minlength=n)
+
+            if level == self.depth:
+                break
+            opened = cells[~accept]
+            starts = self.child_start[level][opened]
+            counts = self.child_stop[level][opened] - starts
+            offsets = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+            points = np.repeat(points[~accept], counts)
+            cells = np.repeat(starts, counts) + offsets
+        return forces
+
+
+def undirected_edges(graph):
+    """Returns the unique (u, v) pairs with u < v linked in either direction, self-loops dropped"""
+    edges = np.sort(np.asarray(graph.edges() if hasattr(graph, "edges") else graph, dtype=np.int64), axis=1)
+    edges = edges[edges[:, 0] != edges[:, 1]]
+    return np.unique(edges, axis=0) if len(edges) else edges.reshape(0, 2)
+
+
+def graph_hash(graph, num_nodes=None):
+    """Hex digest identifying a graph's node count and (undirected) link structure"""
+    edges = undirected_edges(graph)
+    if num_nodes is None:
+        num_nodes = graph.num_nodes if hasattr(graph, "num_nodes") else int(edges.max()) + 1
+    digest = hashlib.sha1(np.int64(num_nodes).tobytes())
+    digest.update(np.ascontiguousarray(edges).tobytes())
+    return digest.hexdigest()
+
+
+def spring_forces(positions, edges, length=1.0):
+    """Returns the (n, 2) attractive forces |delta|^2 / length along every edge, vectorized"""
+    n = len(positions)
+    delta = positions[edges[:, 1]] - positions[edges[:, 0]]
+    distance = np.sqrt((delta ** 2).sum(axis=1))
+    pull = delta * (distance / length)[:, None]
+    forces = np.zeros((n, 2))
+    for axis in range(2):
+        forces[:, axis] = (np.bincount(edges[:, 0], weights=pull[:, axis], minlength=n)
+                           - np.bincount(edges[:, 1], weights=pull[:, axis], minlength=n))
+    return forces
+
+
+def force_layout(graph, num_nodes=None, iterations=200, theta=DEFAULT_THETA, gravity=0.05,
+                 initial=None, temperature=None, seed=0):
+    """
+    Fruchterman-Reingold layout with Barnes-Hut repulsion, in O(n log n) per iteration.
+
+    graph is a SparseGraph or an (E, 2) edge array; link direction is ignored.
+    Edges pull with |d|^2 / k and every pair of nodes pushes with k^2 / |d|,
+    using a quadtree rebuilt each iteration, where k = 1 is the ideal edge
+    length. A weak pull towards the centre keeps separate components
+    together. Steps are capped by a temperature that cools linearly to zero.
+    Passing initial positions warm-starts the layout; temperature then
+    defaults to a small value so the existing picture is only refined.
+    Returns an (n, 2) array centred at the origin.
+    """
+    edges = undirected_edges(graph)
+    if num_nodes is None:
+        num_nodes = graph.num_nodes if hasattr(graph, "num_nodes") else int(edges.max()) + 1
+    n = num_nodes
+    rng = np.random.default_rng(seed)
+
+    if initial is None:
+        positions = (rng.random((n, 2)) - 0.5) * np.sqrt(n)
+        temperature = temperature or 0.1 * np.sqrt(n)
+    else:
+        positions = np.array(initial, dtype=np.float64)[:, :2]
+        temperature = temperature or 0.5
+    if n < 2:
+        return np.zeros((n, 2))
+
+    for step in range(iterations):
+        forces = QuadTree(positions).repulsion(theta=theta)
+        forces += spring_forces(positions, edges)
+        forces -= gravity * (positions - positions.mean(axis=0))
+
+        heat = temperature * (1 - step / iterations)
+        magnitude = np.maximum(np.sqrt((forces ** 2).sum(axis=1)), 1e-12)
+        positions += forces * (np.minimum(magnitude, heat) / magnitude)[:, None]
+    return positions - positions.mean(axis=0)
+
+
+def relayout(graph, previous, num_nodes=None, iterations=60, seed=0, **kwargs):
+    """
+    Warm-started layout after the graph changed.
+
+    previous holds positions for the first len(previous) nodes, which keep
+    their ids. New nodes start at the mean position of their already placed
+    neighbours (or near the centre), then a short, cool run of force_layout
+    settles everything without reshuffling the old picture.
+    """
+    edges = undirected_edges(graph)
+    if num_nodes is None:
+        num_nodes = graph.num_nodes if hasattr(graph, "num_nodes") else int(edges.max()) + 1
+    previous = np.asarray(previous, dtype=np.float64)[:, :2]
+    known = len(previous)
+    rng = np.random.default_rng(seed)
+
+    positions = np.zeros((num_nodes, 2))
+    positions[:known] = previous
+    if num_nodes > known:
+        both = np.concatenate([edges, edges[:, ::-1]])
+        anchored = both[(both[:, 0] >= known) & (both[:, 1] < known)]
+        counts = np.bincount(anchored[:, 0], minlength=num_nodes)[known:]
+        for axis in range(2):
+            sums = np.bincount(anchored[:, 0], weights=previous[anchored[:, 1], axis], minlength=num_nodes)[known:]
+            center = previous[:, axis].mean() if known else 0.0
+            positions[known:, axis] = np.where(counts > 0, sums / np.maximum(counts, 1), center)
+        positions[known:] += rng.normal(scale=0.5, size=(num_nodes - known, 2))
+    return force_layout(edges, num_nodes, iterations, initial=positions, seed=seed, **kwargs)
+
+
+def cached_layout(graph, num_nodes=None, cache_dir=None, **kwargs):
+    """
+    force_layout, remembered per graph hash and layout parameters.
+
+    Results are kept in LAYOUT_CACHE for the process and, when cache_dir is
+    given, saved there as .npy files so later renders skip the layout.
+    """
+    if num_nodes is None:
+        num_nodes = graph.num_nodes if hasattr(graph, "num_nodes") else None
+    params = ",".join(f"{key}={kwargs[key]!r}" for key in sorted(kwargs))
+    key = f"{graph_hash(graph, num_nodes)}-{hashlib.sha1(params.encode()).hexdigest()[:12]}"
+    if key in LAYOUT_CACHE:
+        return LAYOUT_CACHE[key].copy()
+
+    path = os.path.join(cache_dir, f"layout-{key}.npy") if cache_dir else None
+    if path and os.path.exists(path):
+        positions = np.load(path)
+    else:
+        positions = force_layout(graph, num_nodes, **kwargs)
+        if path:
+            os.makedirs(cache_dir, exist_ok=True)
+            np.save(path, positions)
+    LAYOUT_CACHE[key] = positions
+    return positions.copy()
+
+
+def fit_to_box(positions, width, height, center=(0.0, 0.0, 0.0)):
+    """Scales a 2-D layout uniformly into a width x height box, returning (n, 3) scene points"""
+    positions = np.asarray(positions, dtype=np.float64)
+    span = np.maximum(np.ptp(positions, axis=0), 1e-9)
+    scale = min(width / span[0], height / span[1])
+    middle = (positions.max(axis=0) + positions.min(axis=0)) / 2
+    points = np.zeros((len(positions), 3))
+    points[:, :2] = (positions - middle) * scale
+    return points + np.asarray(center, dtype=np.float64)
+
+
+# To time the layout of a random sparse graph (nodes, average degree):
+# python layout.py 5000 3
+if __name__ == "__main__":
+    num_nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    degree = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    rng = np.random.default_rng(0)
+    edges = rng.integers(0, num_nodes, size=(num_nodes * degree // 2, 2))
+    start = time.perf_counter()
+    positions = force_layout(edges, num_nodes)
+    print(f"{num_nodes} nodes laid out in {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    grown = np.concatenate([edges, rng.integers(0, num_nodes + 100, size=(200, 2))])
+    relayout(grown, positions, num_nodes + 100)
+    print(f"warm relayout with 100 new nodes in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,247 @@
+from manim import *
+import numpy as np
+import scipy.sparse as sp
+
+# Matrices up to this size are typeset cell by cell; larger ones become a heatmap image
+MATRIX_TEXT_MAX_SIZE = 20
+
+# Longest side of the bucketed grid; one bucket becomes one image pixel
+DEFAULT_MAX_CELLS = 512
+
+# Colormaps as evenly spaced hex stops, interpolated into a 256-entry table
+COLORMAPS = {
+    "binary": ["#000000", "#FFFFFF"],
+    "blues": ["#0B1B2B", "#1C4E80", "#58C4DD", "#E8F6FB"],
+    "heat": ["#000000", "#7A0000", "#FC6255", "#FFFF00", "#FFFFFF"],
+    "viridis": ["#440154", "#3B528B", "#21918C", "#5EC962", "#FDE725"],
+}
+
+
+def colormap_table(name, size=256):
+    """Returns a (size, 3) uint8 lookup table for one of COLORMAPS"""
+    stops = np.array([[int(code[i:i + 2], 16) for i in (1, 3, 5)] for code in COLORMAPS[name]], dtype=np.float64)
+    positions = np.linspace(0, 1, len(stops))
+    samples = np.linspace(0, 1, size)
+    table = np.column_stack([np.interp(samples, positions, stops[:, channel]) for channel in range(3)])
+    return np.round(table).astype(np.uint8)
+
+
+def bucket_edges(length, buckets):
+    """Splits range(length) into at most buckets contiguous, nearly equal runs; returns the boundaries"""
+    buckets = max(1, min(buckets, length))
+    return np.linspace(0, length, buckets + 1).round().astype(np.int64)
+
+
+def bucket_matrix(matrix, rows=(0, None), cols=(0, None), max_cells=DEFAULT_MAX_CELLS, reduce="mean",
+                  column_offset=None):
+    """
+    Reduces the block matrix[rows[0]:rows[1], cols[0]:cols[1]] to at most max_cells per side.
+
+    matrix may be a dense array or a scipy sparse matrix; a sparse matrix is
+    never densified, its nonzeros are summed straight into their buckets.
+    reduce is "sum", "mean" (sum over the bucket area) or "max". The
+    optional column_offset is added to every entry of its column first, so
+    the grid reduces matrix + column_offset[None, :]. Sums and means take
+    it in per column bucket; "max" needs to see every cell and so only
+    takes an offset over a dense matrix. Returns the bucketed grid with the
+    row and column boundaries of every bucket.
+    """
+    if reduce not in ("sum", "mean", "max"):
+        raise ValueError(f"unknown reduce {reduce!r}, expected 'sum', 'mean' or 'max'")
+    num_rows, num_cols = matrix.shape
+    r0, r1 = rows[0], num_rows if rows[1] is None else rows[1]
+    c0, c1 = cols[0], num_cols if cols[1] is None else cols[1]
+    row_edges = bucket_edges(r1 - r0, max_cells)
+    col_edges = bucket_edges(c1 - c0, max_cells)
+    offset = None if column_offset is None else np.asarray(column_offset, dtype=np.float64)[c0:c1]
+
+    if sp.issparse(matrix):
+        if offset is not None and reduce == "max":
+            raise ValueError("reduce='max' can't include a column_offset over a sparse matrix; "
+                             "use 'sum' or 'mean', or pass a dense matrix")
+        block = sp.coo_matrix(sp.csr_matrix(matrix)[r0:r1, c0:c1])
+        row_bucket = np.searchsorted(row_edges, block.row, side="right") - 1
+        col_bucket = np.searchsorted(col_edges, block.col, side="right") - 1
+        flat = row_bucket * (len(col_edges) - 1) + col_bucket
+        size = (len(row_edges) - 1) * (len(col_edges) - 1)
+        if reduce == "max":
+            grid = np.zeros(size)
+            np.maximum.at(grid, flat, block.data)
+        else:
+            grid = np.bincount(flat, weights=block.data, minlength=size)
+        grid = grid.reshape(len(row_edges) - 1, len(col_edges) - 1)
+        if offset is not None:
+            # Every row of a bucket adds the offsets of the bucket's columns
+            grid += np.outer(np.diff(row_edges), np.add.reduceat(offset, col_edges[:-1]))
+    else:
+        block = np.asarray(matrix, dtype=np.float64)[r0:r1, c0:c1]
+        if offset is not None:
+            block = block + offset[None, :]
+        ufunc = np.maximum if reduce == "max" else np.add
+        grid = ufunc.reduceat(ufunc.reduceat(block, row_edges[:-1], axis=0), col_edges[:-1], axis=1)
+
+    if reduce == "mean":
+        grid = grid / np.outer(np.diff(row_edges), np.diff(col_edges))
+    return grid, row_edges + r0, col_edges + c0
+
+
+def graph_matrix(graph, kind="adjacency", damping=None):
+    """
+    The adjacency (A[end, start] = 1) or link part of the transition matrix of a SparseGraph, as scipy CSR.
+
+    For kind="transition" the entries are damping / outdegree; the dense
+    teleport and dangling terms are returned separately as a per-column
+    offset so the full matrix is csr + offset[None, :] without storing n^2 values.
+    """
+    n = graph.num_nodes
+    indptr, indices = np.asarray(graph.indptr), np.asarray(graph.indices)
+    if kind == "adjacency":
+        return sp.csr_matrix((np.ones(len(indices)), indices, indptr), shape=(n, n)), np.zeros(n)
+
+    totals = graph.out_weight_totals()
+    dangling = totals == 0
+    inv_out = np.zeros(n)
+    inv_out[~dangling] = 1.0 / totals[~dangling]
+    values = damping * inv_out[indices]
+    if graph.weights is not None:
+        values *= np.asarray(graph.weights)
+    offset = (1 - damping) / n + damping * dangling / n
+    return sp.csr_matrix((values, indices, indptr), shape=(n, n)), offset
+
+
+def color_values(grid, log_scale=False):
+    """The values a heatmap colors: the grid itself, or its log10 with NaN where it isn't positive"""
+    values = np.log10(np.maximum(grid, 1e-300)) if log_scale else np.asarray(grid, dtype=np.float64)
+    if log_scale:
+        values[grid <= 0] = np.nan
+    return values
+
+
+def color_limits(grid, vmin=None, vmax=None, log_scale=False):
+    """(vmin, vmax) of a heatmap's color scale, filling in the range of the grid's finite values if not given"""
+    values = color_values(grid, log_scale)
+    finite = values[np.isfinite(values)]
+    vmin = (float(finite.min()) if len(finite) else 0.0) if vmin is None else vmin
+    vmax = (float(finite.max()) if len(finite) else 1.0) if vmax is None else vmax
+    return vmin, vmax
+
+
+def heatmap_pixels(grid, colormap="blues", vmin=None, vmax=None, log_scale=False):
+    """Maps a grid of values to an (rows, cols, 4) uint8 RGBA image through a colormap"""
+    values = color_values(grid, log_scale)
+    vmin, vmax = color_limits(grid, vmin, vmax, log_scale)
+    scaled = (np.nan_to_num(values, nan=vmin) - vmin) / max(vmax - vmin, 1e-300)
+
+    table = colormap_table(colormap)
+    levels = np.clip(np.round(scaled * (len(table) - 1)), 0, len(table) - 1).astype(np.int64)
+    pixels = np.full(grid.shape + (4,), 255, dtype=np.uint8)
+    pixels[..., :3] = table[levels]
+    return pixels
+
+
+class MatrixHeatmap(ImageMobject):
+    """
+    A matrix drawn as a raster image, one pixel per bucket of cells.
+
+    The source stays a NumPy or scipy sparse array; only the shown block is
+    bucketed down to at most max_cells per side and colored through a
+    colormap, so the cost is set by the image size rather than by n^2 text
+    objects. zoomed() re-renders a sub-block at full resolution for
+    zoom-to-block transitions. A per-column offset covers dense rank-one
+    terms such as teleportation without materializing them.
+    """
+
+    def __init__(self, matrix, rows=(0, None), cols=(0, None), colormap="blues", max_cells=DEFAULT_MAX_CELLS,
+                 reduce="mean", column_offset=None, vmin=None, vmax=None, log_scale=False, height=5.0, width=None,
+                 **kwargs):
+        self.matrix = matrix
+        self.column_offset = column_offset
+        self.colormap = colormap
+        self.max_cells = max_cells
+        self.reduce = reduce
+        self.log_scale = log_scale
+
+        grid, self.row_edges, self.col_edges = bucket_matrix(matrix, rows, cols, max_cells, reduce, column_offset)
+        self.grid = grid
+        # The limits actually used (log10 ones on a log scale), so zoomed views share the color scale
+        self.vmin, self.vmax = color_limits(grid, vmin, vmax, log_scale)
+
+        super().__init__(heatmap_pixels(grid, colormap, self.vmin, self.vmax, log_scale), **kwargs)
+        # One bucket per pixel: keep the blocks sharp when the image is scaled up
+        self.set_resampling_algorithm(RESAMPLING_ALGORITHMS["nearest"])
+        (r0, r1), (c0, c1) = self.block
+        self.stretch_to_fit_height(height)
+        self.stretch_to_fit_width(width or height * (c1 - c0) / (r1 - r0))
+
+    @classmethod
+    def from_graph(cls, graph, kind="adjacency", damping=None, **kwargs):
+        """Heatmap of a SparseGraph's adjacency or transition matrix"""
+        matrix, offset = graph_matrix(graph, kind, damping)
+        return cls(matrix, column_offset=offset if offset.any() else None, **kwargs)
+
+    @property
+    def block(self):
+        """(row range, column range) of the matrix shown"""
+        return (int(self.row_edges[0]), int(self.row_edges[-1])), (int(self.col_edges[0]), int(self.col_edges[-1]))
+
+    def get_cell_center(self, row, col):
+        """Scene position of matrix entry (row, col), which must lie in the shown block"""
+        (r0, r1), (c0, c1) = self.block
+        x = (col - c0 + 0.5) / (c1 - c0)
+        y = (row - r0 + 0.5) / (r1 - r0)
+        return self.get_corner(UL) + RIGHT * x * self.width + DOWN * y * self.height
+
+    def block_rectangle(self, rows, cols, **kwargs):
+        """A Rectangle outlining the entries rows[0]:rows[1] x cols[0]:cols[1] on this view"""
+        (r0, r1), (c0, c1) = self.block
+        corner = self.get_corner(UL)
+        left = corner + RIGHT * (cols[0] - c0) / (c1 - c0) * self.width
+        top = DOWN * (rows[0] - r0) / (r1 - r0) * self.height
+        width = (cols[1] - cols[0]) / (c1 - c0) * self.width
+        height = (rows[1] - rows[0]) / (r1 - r0) * self.height
+        kwargs.setdefault("color", YELLOW)
+        rect = Rectangle(width=width, height=height, **kwargs)
+        return rect.move_to(left + top + RIGHT * width / 2 + DOWN * height / 2)
+
+    def zoomed(self, rows, cols, **kwargs):
+        """A new heatmap of the sub-block rows x cols, with the same color scale and placement"""
+        options = dict(colormap=self.colormap, max_cells=self.max_cells, reduce=self.reduce,
+                       column_offset=self.column_offset, log_scale=self.log_scale,
+                       vmin=self.vmin, vmax=self.vmax, height=self.height, width=self.width)
+        options.update(kwargs)
+        heatmap = MatrixHeatmap(self.matrix, rows, cols, **options)
+        return heatmap.move_to(self.get_center())
+
+
+def zoom_to_block(heatmap, rows, cols, **kwargs):
+    """
+    Returns (animation, zoomed heatmap) for zooming into a block of heatmap.
+
+    The re-rendered block starts on top of its outline in the old view and
+    grows to take the old view's place, while the old view fades out.
+    """
+    zoomed = heatmap.zoomed(rows, cols, **kwargs)
+    target = zoomed.copy()
+    outline = heatmap.block_rectangle(rows, cols)
+    zoomed.stretch_to_fit_width(outline.width).stretch_to_fit_height(outline.height).move_to(outline)
+    zoomed.set_opacity(0.2)
+    zoomed.target = target
+    return AnimationGroup(FadeOut(heatmap), MoveToTarget(zoomed)), zoomed
+
+
+def matrix_mobject(values, formatter=lambda value: f"{value:.2f}", column_offset=None,
+                   max_text_size=MATRIX_TEXT_MAX_SIZE, heatmap_kwargs=None, **matrix_kwargs):
+    """
+    A typeset Matrix for small arrays, a MatrixHeatmap once either side exceeds max_text_size.
+
+    values may be dense or scipy sparse, plus an optional per-column offset
+    (see graph_matrix). matrix_kwargs go to Matrix and heatmap_kwargs to
+    MatrixHeatmap, so a scene can pass both and let the size decide.
+    """
+    if max(values.shape) > max_text_size:
+        return MatrixHeatmap(values, column_offset=column_offset, **(heatmap_kwargs or {}))
+
+    dense = values.toarray() if sp.issparse(values) else np.asarray(values, dtype=np.float64)
+    if column_offset is not None:
+        dense = dense + np.asarray(column_offset)[None, :]
+    return Matrix([[formatter(value) for value in row] for row in dense], **matrix_kwargs)
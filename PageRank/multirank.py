@@ -0,0 +1,130 @@
+import sys
+import time
+
+import numpy as np
+import scipy.sparse as sp
+
+from rankengine import DEFAULT_DAMPING, RankResult, pagerank, teleport_vector
+from solvers import transition_setup
+
+
+def teleport_block(num_nodes, teleports):
+    """Returns teleport distributions as an (n, k) block: one column per distribution, uniform when None"""
+    if teleports is None:
+        return teleport_vector(num_nodes)[:, None]
+    block = np.asarray(teleports, dtype=np.float64)
+    if block.ndim == 1:
+        block = block[None, :]
+    if block.shape[1] != num_nodes:
+        raise ValueError(f"teleport distributions must have {num_nodes} entries, got shape {block.shape}")
+    # Stored node-major so each node's k values are adjacent, like the iterates
+    return np.ascontiguousarray((block / block.sum(axis=1, keepdims=True)).T)
+
+
+def multi_pagerank(graph, dampings=DEFAULT_DAMPING, teleports=None, tol=1e-10, max_iter=1000, x0=None):
+    """
+    PageRank for many damping factors and/or teleport distributions at once.
+
+    dampings is a scalar or a sequence of k values, teleports None, one
+    distribution or k of them (a (k, n) array); a single one of either is
+    shared by every column. All columns are iterated together as an (n, k)
+    block, and each iteration is one sparse-times-dense product, so the
+    graph is read once per iteration for all of them (this needs the
+    per-edge values of P in memory, like Gauss-Seidel). A column
+    stops as soon as its own L1 change drops below tol and leaves the block,
+    so the remaining iterations only pay for the columns still moving.
+    Returns one RankResult per column, in order.
+    """
+    n = graph.num_nodes
+    dampings = np.atleast_1d(np.asarray(dampings, dtype=np.float64))
+    v = teleport_block(n, teleports)
+    k = max(len(dampings), v.shape[1])
+    if len(dampings) not in (1, k) or v.shape[1] not in (1, k):
+        raise ValueError(f"got {len(dampings)} damping factors and {v.shape[1]} teleport distributions")
+    dampings = np.broadcast_to(dampings, k).copy()
+    shared_teleport = v.shape[1] == 1
+    _, dangling, inv_out = transition_setup(graph, None)
+    indices = np.asarray(graph.indices)
+    values = inv_out[indices]
+    if graph.weights is not None:
+        values *= np.asarray(graph.weights)
+    P = sp.csr_matrix((values, indices, np.asarray(graph.indptr)), shape=(n, n)).tocsc()
+
+    if x0 is None:
+        x = np.repeat(v, k, axis=1) if shared_teleport else v.copy()
+    else:
+        x = np.asarray(x0, dtype=np.float64).reshape(n, -1)
+        x = np.ascontiguousarray(np.broadcast_to(x / x.sum(axis=0), (n, k)))
+
+    ranks = np.zeros((n, k))
+    iterations = np.zeros(k, dtype=np.int64)
+    residuals = [[] for _ in range(k)]
+    active = np.arange(k)
+    # One reused scratch block: fresh (n, k) temporaries every step cost more than the arithmetic
+    scratch = np.empty_like(x)
+    for iteration in range(1, max_iter + 1):
+        d = dampings[active]
+        x_next = P @ x
+        x_next *= d
+
+        # Dangling mass and teleportation land on each column's own teleport vector
+        dangling_mass = x[dangling].sum(axis=0)
+        np.multiply(v if shared_teleport else v[:, active], d * dangling_mass + (1 - d), out=scratch)
+        x_next += scratch
+        x_next /= x_next.sum(axis=0)
+
+        np.subtract(x_next, x, out=scratch)
+        np.abs(scratch, out=scratch)
+        change = scratch.sum(axis=0)
+        x = x_next
+        for column, residual in zip(active, change):
+            residuals[column].append(float(residual))
+        iterations[active] = iteration
+
+        # Finished columns leave the block, which stays contiguous for the next product
+        done = change < tol
+        if done.any():
+            ranks[:, active[done]] = x[:, done]
+            active = active[~done]
+            if not len(active):
+                break
+            x = np.ascontiguousarray(x[:, ~done])
+            scratch = np.empty_like(x)
+    ranks[:, active] = x
+
+    return [
+        RankResult(ranks[:, column].copy(), int(iterations[column]), residuals[column],
+                   bool(residuals[column]) and residuals[column][-1] < tol, method="multi")
+        for column in range(k)
+    ]
+
+
+def damping_sweep(graph, start=0.5, stop=0.95, num=10, teleport=None, tol=1e-10, max_iter=1000):
+    """PageRank at num evenly spaced damping factors, returned as (dampings, list of RankResult)"""
+    dampings = np.linspace(start, stop, num)
+    return dampings, multi_pagerank(graph, dampings, teleport, tol, max_iter)
+
+
+# To time a damping sweep as one block against separate runs (nodes, number of damping factors):
+# python multirank.py 1000000 10
+if __name__ == "__main__":
+    from generators import make_graph
+
+    num_nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    graph = make_graph("web", num_nodes, seed=0)
+
+    start = time.perf_counter()
+    dampings, results = damping_sweep(graph, 0.5, 0.95, count)
+    block_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    separate = [pagerank(graph, d) for d in dampings]
+    separate_seconds = time.perf_counter() - start
+
+    print(f"{graph.num_nodes} nodes, {graph.num_edges} edges, {count} damping factors")
+    print(f"{'damping':>8}{'iters':>7}{'L1 vs separate':>16}")
+    for d, result, reference in zip(dampings, results, separate):
+        print(f"{d:>8.3f}{result.iterations:>7}{np.abs(result.ranks - reference.ranks).sum():>16.2e}")
+    print(f"block {block_seconds:.2f}s, separate {separate_seconds:.2f}s "
+          f"({separate_seconds / block_seconds:.1f}x)")
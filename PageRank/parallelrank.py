@@ -0,0 +1,284 @@
+import multiprocessing as mp
+import multiprocessing.connection
+import os
+import sys
+import threading
+import time
+from multiprocessing import shared_memory
+from threading import BrokenBarrierError
+
+import numpy as np
+
+from rankengine import (
+    DEFAULT_DAMPING,
+    RankResult,
+    SparseGraph,
+    in_link_sums,
+    teleport_vector,
+)
+
+# Commands the coordinator leaves in the shared control block before releasing the workers
+RUN = 0
+EXIT = 1
+
+# Longest anyone waits at the barrier for the others once a product has been started
+BARRIER_TIMEOUT = 600.0
+
+
+def partition_rows(indptr, num_parts):
+    """Splits rows into num_parts contiguous blocks holding about the same number of nonzeros"""
+    num_rows = len(indptr) - 1
+    targets = np.linspace(0, int(indptr[-1]), num_parts + 1)[1:-1]
+    cuts = np.searchsorted(np.asarray(indptr), targets)
+    bounds = np.concatenate([[0], np.clip(cuts, 0, num_rows), [num_rows]])
+    return [(int(lo), int(hi)) for lo, hi in zip(bounds[:-1], bounds[1:])]
+
+
+def share_array(array):
+    """
+    Returns (owner, spec) for handing an array to worker processes.
+
+    Contiguous memory-mapped arrays, slices included, are passed by file
+    name and byte offset and reopened by the worker; everything else is
+    copied once into a shared memory block. owner is the SharedMemory to
+    release afterwards, or None.
+    """
+    if isinstance(array, np.memmap) and array.filename is not None and array.flags.c_contiguous:
+        # A slice keeps its parent's offset, so measure from the memmap that owns the mapping
+        root = array
+        while isinstance(root.base, np.ndarray):
+            root = root.base
+        if isinstance(root, np.memmap):
+            offset = root.offset + array.ctypes.data - root.ctypes.data
+            return None, ("file", array.filename, array.dtype.str, offset, array.shape)
+
+    array = np.ascontiguousarray(array)
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+    return block, ("shm", block.name, array.dtype.str, 0, array.shape)
+
+
+def attach_array(spec):
+    """Opens an array described by share_array, returning (handle, array)"""
+    kind, name, dtype, offset, shape = spec
+    if kind == "file":
+        return None, np.memmap(name, dtype=dtype, mode="r", offset=offset, shape=shape)
+    block = shared_memory.SharedMemory(name=name)
+    return block, np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+
+def spmv_worker(specs, rows, barrier, timeout):
+    """
+    Worker loop: wait at the barrier, compute its row block of y = A z, wait again.
+
+    The first wait has no timeout, since the coordinator may leave the pool
+    idle between products. A broken barrier means the coordinator gave up
+    on the pool, and the worker just exits.
+    """
+    handles = []
+    arrays = {}
+    for key, spec in specs.items():
+        handle, arrays[key] = attach_array(spec)
+        handles.append(handle)
+
+    graph = SparseGraph(arrays["indptr"], arrays["indices"], arrays["out_degree"], arrays.get("weights"))
+    z, y, control = arrays["z"], arrays["y"], arrays["control"]
+    lo, hi = rows
+
+    try:
+        while True:
+            barrier.wait()
+            if control[0] == EXIT:
+                break
+            in_link_sums(graph, z, out=y[lo:hi], rows=(lo, hi))
+            barrier.wait(timeout)
+    except BrokenBarrierError:
+        pass
+    finally:
+        del graph, z, y, control, arrays
+        for handle in handles:
+            if handle is not None:
+                handle.close()
+
+
+class ParallelPageRank:
+    """
+    A pool of processes that computes PageRank's SpMV in row blocks.
+
+    The CSR is split into one contiguous row block per worker, balanced by
+    nonzero count. The scaled rank vector z and the next iterate y live in
+    shared memory, so each iteration only costs two barrier waits on top of
+    the product itself. A watchdog thread aborts the barrier as soon as a
+    worker exits while the pool is running, and waiting for a product gives
+    up after timeout seconds, so a crashed or stuck worker raises a
+    RuntimeError instead of hanging the coordinator. Use it as a context manager to start
+    and stop the pool.
+    """
+
+    def __init__(self, graph, num_workers=None, timeout=BARRIER_TIMEOUT):
+        self.graph = graph
+        self.num_workers = num_workers or os.cpu_count()
+        self.timeout = timeout
+        self.blocks = partition_rows(graph.indptr, self.num_workers)
+        self.owners = []
+        self.workers = []
+        self.watchdog = None
+        self.closing = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def start(self):
+        n = self.graph.num_nodes
+        specs = {}
+        arrays = {
+            "indptr": self.graph.indptr,
+            "indices": self.graph.indices,
+            "out_degree": self.graph.out_degree,
+            "z": np.zeros(n),
+            "y": np.zeros(n),
+            "control": np.zeros(1, dtype=np.int64),
+        }
+        if self.graph.weights is not None:
+            arrays["weights"] = self.graph.weights
+
+        # The coordinator keeps its own views of the shared vectors and control block
+        self.local = {}
+        for key, array in arrays.items():
+            owner, specs[key] = share_array(array)
+            if owner is not None:
+                self.owners.append(owner)
+                self.local[key] = np.ndarray(array.shape, dtype=array.dtype, buffer=owner.buf)
+
+        self.barrier = mp.Barrier(self.num_workers + 1)
+        self.closing = False
+        for rows in self.blocks:
+            worker = mp.Process(target=spmv_worker, args=(specs, rows, self.barrier, self.timeout), daemon=True)
+            worker.start()
+            self.workers.append(worker)
+        self.watchdog = threading.Thread(target=self.watch_workers, daemon=True)
+        self.watchdog.start()
+        return self
+
+    def watch_workers(self):
+        """Watchdog thread: breaks the barrier once any worker exits before the pool is closed"""
+        mp.connection.wait([worker.sentinel for worker in self.workers])
+        if not self.closing:
+            self.barrier.abort()
+
+    def sync(self):
+        """Waits at the barrier with the workers, raising RuntimeError if the pool has failed"""
+        try:
+            self.barrier.wait(self.timeout)
+        except BrokenBarrierError:
+            self.barrier.abort()
+            # Healthy workers leave on the broken barrier; give them a moment so the dead one can be named
+            for worker in self.workers:
+                worker.join(1.0)
+            failed = [f"worker {i} exited with code {worker.exitcode}"
+                      for i, worker in enumerate(self.workers) if worker.exitcode not in (None, 0)]
+            reason = ", ".join(failed) or f"a worker took longer than {self.timeout}s"
+            raise RuntimeError(f"parallel SpMV failed: {reason}") from None
+
+    def close(self):
+        if self.workers:
+            self.closing = True
+            self.local["control"][0] = EXIT
+            try:
+                self.barrier.wait(self.timeout)
+            except BrokenBarrierError:
+                # Workers leave on a broken barrier by themselves; stuck ones are stopped below
+                pass
+            for worker in self.workers:
+                worker.join(self.timeout)
+                if worker.is_alive():
+                    worker.terminate()
+                    worker.join()
+            self.watchdog.join()
+            self.workers = []
+        self.local = {}
+        for owner in self.owners:
+            owner.close()
+            owner.unlink()
+        self.owners = []
+
+    def multiply(self, z):
+        """Returns A z computed across the worker pool (a view into shared memory)"""
+        self.local["z"][...] = z
+        self.local["control"][0] = RUN
+        # First wait releases the workers, second one waits for every block to finish
+        self.sync()
+        self.sync()
+        return self.local["y"]
+
+    def pagerank(self, damping=DEFAULT_DAMPING, teleport=None, tol=1e-10, max_iter=1000, x0=None):
+        """Power iteration with the SpMV on the pool; same update as rankengine.power_iterations"""
+        n = self.graph.num_nodes
+        v = teleport_vector(n, teleport)
+        totals = self.graph.out_weight_totals()
+        dangling = totals == 0
+        inv_out = np.zeros(n)
+        inv_out[~dangling] = 1.0 / totals[~dangling]
+
+        x = v.copy() if x0 is None else np.asarray(x0, dtype=np.float64) / np.sum(x0)
+        residuals = []
+        iteration = 0
+        for iteration in range(1, max_iter + 1):
+            x_next = damping * self.multiply(x * inv_out)
+            x_next += (damping * x[dangling].sum() + (1 - damping)) * v
+            x_next /= x_next.sum()
+            residuals.append(np.abs(x_next - x).sum())
+            x = x_next
+            if residuals[-1] < tol:
+                break
+        return RankResult(x, iteration, residuals, residuals[-1] < tol if residuals else False, method="parallel")
+
+
+def pagerank_parallel(graph, num_workers=None, damping=DEFAULT_DAMPING, teleport=None, tol=1e-10, max_iter=1000,
+                      x0=None):
+    """Runs PageRank once on a temporary worker pool"""
+    with ParallelPageRank(graph, num_workers) as pool:
+        return pool.pagerank(damping, teleport, tol, max_iter, x0)
+
+
+def scaling_benchmark(graph, max_workers=None, iterations=20, repeats=3):
+    """
+    Times a fixed number of power iterations for 1..max_workers processes.
+
+    Returns a list of (workers, seconds per iteration, speedup over one worker).
+    Pool start-up is excluded; each setting keeps the best of a few repeats.
+    """
+    max_workers = max_workers or os.cpu_count()
+    rows = []
+    baseline = None
+    for workers in range(1, max_workers + 1):
+        with ParallelPageRank(graph, workers) as pool:
+            best = np.inf
+            for _ in range(repeats):
+                start = time.perf_counter()
+                pool.pagerank(tol=0, max_iter=iterations)
+                best = min(best, (time.perf_counter() - start) / iterations)
+        baseline = baseline or best
+        rows.append((workers, best, baseline / best))
+    return rows
+
+
+# To benchmark the parallel SpMV on a random graph (nodes, average degree, max workers):
+# python parallelrank.py 1000000 10 8
+if __name__ == "__main__":
+    num_nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    degree = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    max_workers = int(sys.argv[3]) if len(sys.argv) > 3 else os.cpu_count()
+
+    rng = np.random.default_rng(0)
+    edges = rng.integers(0, num_nodes, size=(num_nodes * degree, 2))
+    graph = SparseGraph.from_edges(edges, num_nodes)
+
+    print(f"{graph.num_nodes} nodes, {graph.num_edges} edges")
+    print("workers  ms/iter  speedup")
+    for workers, seconds, speedup in scaling_benchmark(graph, max_workers):
+        print(f"{workers:7d}  {seconds * 1000:7.2f}  {speedup:7.2f}x")
@@ -0,0 +1,198 @@
+import numpy as np
+
+from rankengine import DEFAULT_DAMPING, gather_out_links
+
+
+class PersonalizedRanks:
+    """
+    Approximate personalized PageRank for one seed set, stored sparsely.
+
+    values[i] estimates the rank of nodes[i]; error is an additive bound, so
+    the exact rank of every node lies in [values - lower_error, values + error]
+    (nodes that are not listed have an estimate of 0).
+    """
+
+    def __init__(self, nodes, values, error, lower_error=0.0, method="push"):
+        order = np.argsort(-values, kind="stable")
+        self.nodes = nodes[order]
+        self.values = values[order]
+        self.error = error
+        self.lower_error = lower_error
+        self.method = method
+
+    def top(self, k):
+        """Returns (nodes, estimates, lower bounds, upper bounds) of the k best nodes"""
+        nodes, values = self.nodes[:k], self.values[:k]
+        lower = np.maximum(values - self.lower_error, 0)
+        return nodes, values, lower, values + self.error
+
+    def is_certified(self, k):
+        """True when the bounds alone prove which nodes are the top k"""
+        if len(self.values) < k:
+            return False
+        kth_lower = max(self.values[k - 1] - self.lower_error, 0)
+        # Anything below rank k, listed or not, could be at most this high
+        runner_up = self.values[k] if len(self.values) > k else 0.0
+        return kth_lower >= runner_up + self.error
+
+    def __repr__(self):
+        return f"PersonalizedRanks(method={self.method!r}, support={len(self.nodes)}, error={self.error:.3g})"
+
+
+def seed_vectors(seed_sets, num_nodes):
+    """
+    Flattens seed sets into (query, node, weight) arrays, weights summing to one per query.
+
+    A seed set is either an iterable of nodes (uniform restart) or a
+    {node: weight} dict.
+    """
+    queries, nodes, weights = [], [], []
+    for query, seeds in enumerate(seed_sets):
+        if isinstance(seeds, dict):
+            seed_nodes = np.fromiter(seeds.keys(), dtype=np.int64)
+            seed_weights = np.fromiter(seeds.values(), dtype=np.float64)
+        else:
+            seed_nodes = np.unique(np.asarray(list(seeds), dtype=np.int64))
+            seed_weights = np.ones(len(seed_nodes))
+        if len(seed_nodes) == 0 or seed_nodes.max() >= num_nodes or seed_nodes.min() < 0:
+            raise ValueError(f"seed set {query} is empty or has nodes outside the graph")
+        queries.append(np.full(len(seed_nodes), query))
+        nodes.append(seed_nodes)
+        weights.append(seed_weights / seed_weights.sum())
+    return np.concatenate(queries), np.concatenate(nodes), np.concatenate(weights)
+
+
+def coalesce(keys, values):
+    """Sums values that share a key, returning sorted unique keys"""
+    keys, inverse = np.unique(keys, return_inverse=True)
+    return keys, np.bincount(inverse, weights=values, minlength=len(keys))
+
+
+def out_degrees(indptr, nodes):
+    """Out-degrees of just the given nodes, read off the out-link indptr"""
+    return indptr[nodes + 1] - indptr[nodes]
+
+
+def forward_push(graph, seed_sets, damping=DEFAULT_DAMPING, tol=1e-6, max_rounds=100000):
+    """
+    Forward-push (residual) personalized PageRank for many seed sets at once.
+
+    Every (query, node) pair is a key q * n + node in one sparse residual
+    vector, so all queries push together round by round. A node pushes while
+    its residual exceeds tol * outdegree; restart probability 1 - damping goes
+    to the estimate and the rest is split over its out-links (dangling nodes
+    send it back to the seeds). Work is O(1 / ((1 - damping) * tol)) per query
+    and never touches an n-sized array, so latency doesn't grow with the graph.
+    """
+    indptr, targets = graph.out_links()
+    n = graph.num_nodes
+    restart = 1 - damping
+
+    seed_queries, seed_nodes, seed_weights = seed_vectors(seed_sets, n)
+    num_queries = int(seed_queries.max()) + 1
+    r_keys, r_values = coalesce(seed_queries * n + seed_nodes, seed_weights)
+    p_keys = np.zeros(0, dtype=np.int64)
+    p_values = np.zeros(0)
+
+    for _ in range(max_rounds):
+        nodes = r_keys % n
+        active = r_values > tol * np.maximum(out_degrees(indptr, nodes), 1)
+        if not active.any():
+            break
+
+        pushed_keys, pushed = r_keys[active], r_values[active]
+        r_keys, r_values = r_keys[~active], r_values[~active]
+        p_keys, p_values = coalesce(np.concatenate([p_keys, pushed_keys]),
+                                    np.concatenate([p_values, restart * pushed]))
+
+        pushed_nodes = pushed_keys % n
+        pushed_queries = pushed_keys // n
+        spread = damping * pushed
+        out = out_degrees(indptr, pushed_nodes)
+        linked = out > 0
+
+        # Along the out-links
+        owners, link_targets = gather_out_links(indptr, targets, pushed_nodes[linked])
+        new_keys = [pushed_queries[linked][owners] * n + link_targets]
+        new_values = [(spread[linked] / out[linked])[owners]]
+
+        # Dangling nodes hand their mass back to the query's seeds
+        if (~linked).any():
+            returned = np.bincount(pushed_queries[~linked], weights=spread[~linked], minlength=num_queries)
+            new_keys.append(seed_queries * n + seed_nodes)
+            new_values.append(returned[seed_queries] * seed_weights)
+
+        r_keys, r_values = coalesce(np.concatenate([r_keys] + new_keys),
+                                    np.concatenate([r_values] + new_values))
+
+    # Mass still in the residual is the most any node's estimate can be missing
+    p_queries = p_keys // n
+    r_left = np.bincount(r_keys // n, weights=r_values, minlength=num_queries)
+    results = []
+    for query in range(num_queries):
+        mask = p_queries == query
+        results.append(PersonalizedRanks(p_keys[mask] % n, p_values[mask], float(r_left[query]), method="push"))
+    return results
+
+
+def monte_carlo(graph, seed_sets, damping=DEFAULT_DAMPING, tol=1e-2, confidence=0.95, seed=None):
+    """
+    Random-walk personalized PageRank for many seed sets at once.
+
+    Each walk starts at a seed, stops with probability 1 - damping per step
+    and otherwise follows a random out-link (or jumps back to the seeds from
+    a dangling node). The end points estimate the ranks. The number of walks
+    comes from Hoeffding's inequality so every estimate is within tol with
+    the given confidence, which depends on tol but not on the graph size.
+    """
+    rng = np.random.default_rng(seed)
+    indptr, targets = graph.out_links()
+    n = graph.num_nodes
+
+    seed_queries, seed_nodes, seed_weights = seed_vectors(seed_sets, n)
+    num_queries = int(seed_queries.max()) + 1
+    walks = int(np.ceil(np.log(2 / (1 - confidence)) / (2 * tol ** 2)))
+
+    # Query q's seed weights occupy [q, q + 1) of the running sum, so one
+    # searchsorted samples seeds for walkers of every query at once
+    cumulative = np.cumsum(seed_weights)
+
+    def sample_seeds(queries):
+        picks = np.searchsorted(cumulative, queries + rng.random(len(queries)), side="right")
+        return seed_nodes[np.minimum(picks, len(seed_nodes) - 1)]
+
+    queries = np.repeat(np.arange(num_queries), walks)
+    positions = sample_seeds(queries)
+    ends = []
+    while len(positions):
+        stopping = rng.random(len(positions)) >= damping
+        ends.append(queries[stopping] * n + positions[stopping])
+        queries, positions = queries[~stopping], positions[~stopping]
+
+        out = out_degrees(indptr, positions)
+        linked = out > 0
+        step = (rng.random(int(linked.sum())) * out[linked]).astype(np.int64)
+        positions[linked] = targets[indptr[positions[linked]] + step]
+        positions[~linked] = sample_seeds(queries[~linked])
+
+    keys, counts = coalesce(np.concatenate(ends), np.ones(num_queries * walks))
+    error = float(np.sqrt(np.log(2 / (1 - confidence)) / (2 * walks)))
+    results = []
+    for query in range(num_queries):
+        mask = keys // n == query
+        results.append(PersonalizedRanks(keys[mask] % n, counts[mask] / walks, error, error, method="monte_carlo"))
+    return results
+
+
+def personalized_pagerank(graph, seeds, method="push", damping=DEFAULT_DAMPING, **kwargs):
+    """Personalized PageRank for one seed set (iterable of nodes or {node: weight})"""
+    return personalized_pagerank_batch(graph, [seeds], method, damping, **kwargs)[0]
+
+
+def personalized_pagerank_batch(graph, seed_sets, method="push", damping=DEFAULT_DAMPING, **kwargs):
+    """Personalized PageRank for many seed sets in one batched pass ("push" or "monte_carlo")"""
+    if method == "push":
+        return forward_push(graph, seed_sets, damping, **kwargs)
+    if method == "monte_carlo":
+        return monte_carlo(graph, seed_sets, damping, **kwargs)
+    raise ValueError(f"unknown personalized PageRank method {method!r}")
@@ -0,0 +1,214 @@
+import hashlib
+import json
+import os
+import sys
+import time
+import weakref
+
+import numpy as np
+
+from rankengine import DEFAULT_DAMPING, RankResult, teleport_vector
+from solvers import solve
+
+# Cached rank vectors whose tolerance is at least this loose are stored as float32
+FLOAT32_MIN_TOL = 1e-6
+
+# Default on-disk size cap for a cache directory
+DEFAULT_MAX_BYTES = 256 << 20
+
+# Items hashed at a time, so memory-mapped graphs are fingerprinted in bounded memory
+HASH_BLOCK_ITEMS = 1 << 22
+
+# Digests of graphs already fingerprinted in this process
+GRAPH_DIGESTS = weakref.WeakKeyDictionary()
+
+
+def hash_array(digest, array):
+    flat = np.asarray(array).reshape(-1)
+    for lo in range(0, len(flat), HASH_BLOCK_ITEMS):
+        digest.update(np.ascontiguousarray(flat[lo:lo + HASH_BLOCK_ITEMS]).tobytes())
+
+
+def graph_digest(graph):
+    """
+    BLAKE2 digest of a graph's directed link structure (and weights, if any).
+
+    Computed once per graph object and remembered, so graphs are treated as
+    immutable once they have been hashed.
+    """
+    if graph in GRAPH_DIGESTS:
+        return GRAPH_DIGESTS[graph]
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(np.int64(graph.num_nodes).tobytes())
+    hash_array(digest, np.asarray(graph.indptr, dtype=np.int64))
+    hash_array(digest, np.asarray(graph.indices, dtype=np.int64))
+    if graph.weights is not None:
+        digest.update(b"weights")
+        hash_array(digest, np.asarray(graph.weights, dtype=np.float64))
+    GRAPH_DIGESTS[graph] = digest.hexdigest()
+    return GRAPH_DIGESTS[graph]
+
+
+def teleport_digest(num_nodes, teleport=None):
+    """"uniform" for the default teleport vector, otherwise a digest of the normalized distribution"""
+    if teleport is None:
+        return "uniform"
+    digest = hashlib.blake2b(teleport_vector(num_nodes, teleport).tobytes(), digest_size=12)
+    return digest.hexdigest()
+
+
+class RankCache:
+    """
+    PageRank results on disk, keyed by graph content, damping, teleport vector and tolerance.
+
+    Each result is one .npy rank vector (float32 when its tolerance is loose
+    enough not to notice) plus an entry in index.json. A result solved to a
+    tighter tolerance also answers looser requests. When the total size goes
+    over max_bytes, the least recently used results are deleted. On a miss,
+    the cached result for the same graph with the closest parameters is used
+    as the starting vector, which cuts the iterations when only the damping
+    or teleport vector changed.
+    """
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.hits = 0
+        self.warm_starts = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self.entries = {}
+        self.clock = 0
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                index = json.load(f)
+            self.entries, self.clock = index["entries"], index["clock"]
+
+    @property
+    def total_bytes(self):
+        return sum(entry["bytes"] for entry in self.entries.values())
+
+    def save_index(self):
+        partial = self.index_path + ".partial"
+        with open(partial, "w") as f:
+            json.dump({"clock": self.clock, "entries": self.entries}, f, indent=2)
+        os.replace(partial, self.index_path)
+
+    def touch(self, key):
+        self.clock += 1
+        self.entries[key]["last_used"] = self.clock
+
+    def load(self, key):
+        entry = self.entries[key]
+        ranks = np.load(os.path.join(self.cache_dir, entry["file"])).astype(np.float64)
+        return ranks / ranks.sum()
+
+    def lookup(self, graph, damping=DEFAULT_DAMPING, teleport=None, tol=1e-10):
+        """Returns the cached RankResult that satisfies the request, or None"""
+        graph_key, teleport_key = graph_digest(graph), teleport_digest(graph.num_nodes, teleport)
+        matches = [
+            key for key, entry in self.entries.items()
+            if entry["graph"] == graph_key and entry["teleport"] == teleport_key
+            and entry["damping"] == float(damping) and entry["tol"] <= tol and entry["converged"]
+        ]
+        if not matches:
+            return None
+        key = min(matches, key=lambda key: self.entries[key]["tol"])
+        entry = self.entries[key]
+        self.touch(key)
+        self.save_index()
+        return RankResult(self.load(key), entry["iterations"], [], True, method=entry["method"])
+
+    def nearest(self, graph, damping=DEFAULT_DAMPING, teleport=None):
+        """Ranks of the cached result for this graph with the closest damping (same teleport preferred), or None"""
+        graph_key, teleport_key = graph_digest(graph), teleport_digest(graph.num_nodes, teleport)
+        candidates = [key for key, entry in self.entries.items() if entry["graph"] == graph_key]
+        if not candidates:
+            return None
+
+        def distance(key):
+            entry = self.entries[key]
+            return (entry["teleport"] != teleport_key, abs(entry["damping"] - damping), entry["tol"])
+
+        key = min(candidates, key=distance)
+        self.touch(key)
+        return self.load(key)
+
+    def store(self, graph, result, damping=DEFAULT_DAMPING, teleport=None, tol=1e-10):
+        """Saves a result, then evicts least recently used entries over the size cap"""
+        graph_key, teleport_key = graph_digest(graph), teleport_digest(graph.num_nodes, teleport)
+        dtype = np.float32 if tol >= FLOAT32_MIN_TOL else np.float64
+        name = hashlib.blake2b(f"{graph_key}|{teleport_key}|{float(damping)!r}|{tol!r}".encode(),
+                               digest_size=16).hexdigest()
+        path = os.path.join(self.cache_dir, f"{name}.npy")
+        partial = os.path.join(self.cache_dir, f"{name}.partial.npy")
+        np.save(partial, np.asarray(result.ranks, dtype=dtype))
+        os.replace(partial, path)
+
+        self.entries[name] = {
+            "graph": graph_key,
+            "teleport": teleport_key,
+            "damping": float(damping),
+            "tol": float(tol),
+            "file": f"{name}.npy",
+            "bytes": os.path.getsize(path),
+            "iterations": int(result.iterations),
+            "converged": bool(result.converged),
+            "method": result.method,
+        }
+        self.touch(name)
+        self.evict()
+        self.save_index()
+        return name
+
+    def evict(self):
+        """Deletes least recently used results until the cache fits in max_bytes"""
+        total = self.total_bytes
+        for key in sorted(self.entries, key=lambda key: self.entries[key]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            entry = self.entries.pop(key)
+            total -= entry["bytes"]
+            try:
+                os.remove(os.path.join(self.cache_dir, entry["file"]))
+            except FileNotFoundError:
+                pass
+
+    def rank(self, graph, damping=DEFAULT_DAMPING, teleport=None, tol=1e-10, max_iter=1000, method="power",
+             **options):
+        """PageRank through the cache: a stored result if one fits, else a warm-started solve that is then stored"""
+        cached = self.lookup(graph, damping, teleport, tol)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        x0 = self.nearest(graph, damping, teleport)
+        if x0 is None:
+            self.misses += 1
+        else:
+            self.warm_starts += 1
+        result = solve(graph, method, damping, teleport, tol, max_iter, x0, **options)
+        self.store(graph, result, damping, teleport, tol)
+        return result
+
+    def __repr__(self):
+        return (f"RankCache({self.cache_dir!r}, entries={len(self.entries)}, bytes={self.total_bytes}, "
+                f"hits={self.hits}, warm_starts={self.warm_starts}, misses={self.misses})")
+
+
+# To replay a sweep of damping factors twice through a cache (nodes, cache directory):
+# python rankcache.py 1000000 rank_cache
+if __name__ == "__main__":
+    from generators import make_graph
+
+    num_nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    cache = RankCache(sys.argv[2] if len(sys.argv) > 2 else "rank_cache")
+    graph = make_graph("web", num_nodes, seed=0)
+
+    for sweep in ("first", "repeat"):
+        for damping in (0.85, 0.8, 0.9, 0.75):
+            start = time.perf_counter()
+            result = cache.rank(graph, damping)
+            print(f"{sweep:>7} d={damping:.2f}: {result.iterations:>4} iterations, {time.perf_counter() - start:.3f}s")
+    print(cache)
@@ -0,0 +1,276 @@
+import numpy as np
+import scipy.sparse as sp
+
+# Default random surfer from the scenes: follow a link with probability 0.75,
+# teleport to a uniformly random page with probability 0.25
+DEFAULT_DAMPING = 0.75
+
+# Upper bound on nonzeros gathered at once by the SpMV kernel, so the
+# temporary arrays stay small even when the graph itself does not fit in RAM
+DEFAULT_BLOCK_NNZ = 1 << 22
+
+
+class SparseGraph:
+    """
+    A directed graph stored as CSR arrays of its in-links.
+
+    Row i lists the sources j of every edge j -> i, which is the row layout
+    of the column-stochastic transition matrix P[end, start] in the scene.
+    Every out-link of a node carries the same probability 1/outdegree, so no
+    per-edge value array is stored unless explicit weights are given.
+    """
+
+    def __init__(self, indptr, indices, out_degree, weights=None):
+        self.indptr = indptr
+        self.indices = indices
+        self.out_degree = out_degree
+        # Optional per-edge weights aligned with indices; columns are
+        # renormalized by weighted out-degree when they are present
+        self.weights = weights
+        self.out_csr = None
+
+    @classmethod
+    def from_edges(cls, edges, num_nodes=None):
+        """Builds the in-link CSR from an iterable or (E, 2) array of (start, end) edges in O(E)"""
+        edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        if num_nodes is None:
+            num_nodes = int(edges.max()) + 1 if len(edges) else 0
+        starts, ends = edges[:, 0], edges[:, 1]
+
+        # COO -> CSR is a counting sort (degree count, prefix sum, scatter),
+        # linear in the number of edges. Repeated links collapse to one.
+        ones = np.ones(len(edges), dtype=np.int8)
+        matrix = sp.coo_matrix((ones, (ends, starts)), shape=(num_nodes, num_nodes)).tocsr()
+        matrix.sum_duplicates()
+
+        indptr = matrix.indptr.astype(np.int64)
+        indices = matrix.indices.astype(np.int64)
+        out_degree = np.bincount(indices, minlength=num_nodes).astype(np.int64)
+        return cls(indptr, indices, out_degree)
+
+    @property
+    def num_nodes(self):
+        return len(self.indptr) - 1
+
+    @property
+    def num_edges(self):
+        return int(self.indptr[-1])
+
+    def dangling_mask(self):
+        """Returns a boolean mask of nodes without out-links"""
+        return np.asarray(self.out_degree) == 0
+
+    def out_weight_totals(self):
+        """Returns the total out-weight of every node (its out-degree when unweighted)"""
+        if self.weights is None:
+            return np.asarray(self.out_degree, dtype=np.float64)
+        return np.bincount(self.indices, weights=self.weights, minlength=self.num_nodes)
+
+    def out_links(self):
+        """Returns (indptr, indices) of the out-link CSR, built once in O(E) and kept"""
+        if self.out_csr is None:
+            ones = np.ones(self.num_edges, dtype=np.int8)
+            matrix = sp.csr_matrix((ones, np.asarray(self.indices), np.asarray(self.indptr)),
+                                   shape=(self.num_nodes, self.num_nodes))
+            transposed = matrix.tocsc()
+            self.out_csr = (transposed.indptr.astype(np.int64), transposed.indices.astype(np.int64))
+        return self.out_csr
+
+    def edges(self):
+        """Returns the (E, 2) array of (start, end) edges"""
+        ends = np.repeat(np.arange(self.num_nodes), np.diff(self.indptr))
+        return np.column_stack([np.asarray(self.indices), ends])
+
+    def to_dense_transition(self, damping=DEFAULT_DAMPING, teleport=None):
+        """Returns the dense Google matrix G[end, start], only sensible for small graphs"""
+        n = self.num_nodes
+        v = teleport_vector(n, teleport)
+        totals = self.out_weight_totals()
+
+        G = np.zeros((n, n))
+        edges = self.edges()
+        weights = np.ones(len(edges)) if self.weights is None else np.asarray(self.weights)
+        np.add.at(G, (edges[:, 1], edges[:, 0]), weights / totals[edges[:, 0]])
+
+        # Dangling pages have nowhere to go, so their column follows the teleport vector
+        G[:, totals == 0] = v[:, None]
+        return damping * G + (1 - damping) * v[:, None]
+
+
+def gather_out_links(indptr, targets, nodes):
+    """
+    Returns (position in nodes, target) pairs for every out-link of nodes.
+
+    indptr and targets are an out-link CSR such as SparseGraph.out_links();
+    only the given nodes' rows are read.
+    """
+    starts = indptr[nodes]
+    lengths = indptr[nodes + 1] - starts
+    owners = np.repeat(np.arange(len(nodes)), lengths)
+    offsets = np.arange(int(lengths.sum())) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return owners, targets[starts[owners] + offsets]
+
+
+class RankResult:
+    """The outcome of one PageRank solve"""
+
+    def __init__(self, ranks, iterations, residuals, converged, method="power"):
+        self.ranks = ranks
+        self.iterations = iterations
+        self.residuals = residuals
+        self.converged = converged
+        self.method = method
+
+    def top(self, k):
+        """Returns the indices and ranks of the k highest ranked nodes"""
+        k = min(k, len(self.ranks))
+        order = np.argpartition(-self.ranks, k - 1)[:k] if k > 0 else np.zeros(0, dtype=np.int64)
+        order = order[np.argsort(-self.ranks[order], kind="stable")]
+        return order, self.ranks[order]
+
+    def __repr__(self):
+        return f"RankResult(method={self.method!r}, iterations={self.iterations}, converged={self.converged})"
+
+
+def teleport_vector(num_nodes, teleport=None):
+    """Returns the teleport distribution, uniform unless one is given (empty for a graph with no nodes)"""
+    if num_nodes == 0:
+        return np.zeros(0)
+    if teleport is None:
+        return np.full(num_nodes, 1.0 / num_nodes)
+    v = np.asarray(teleport, dtype=np.float64)
+    return v / v.sum()
+
+
+def row_blocks(indptr, block_nnz=DEFAULT_BLOCK_NNZ):
+    """Splits the rows into contiguous blocks of roughly block_nnz nonzeros each"""
+    num_rows = len(indptr) - 1
+    first, total = int(indptr[0]), int(indptr[-1] - indptr[0])
+    num_blocks = max(1, -(-total // block_nnz))
+    targets = first + np.linspace(0, total, num_blocks + 1)[1:-1]
+    cuts = np.searchsorted(indptr, targets)
+    bounds = np.unique(np.concatenate([[0], cuts, [num_rows]]))
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def in_link_sums(graph, x, out=None, rows=None, block_nnz=DEFAULT_BLOCK_NNZ):
+    """
+    Computes y[i] = sum of w(j, i) * x[j] over the in-links j -> i of every row.
+
+    x may be a vector or an (n, k) block of vectors. Rows are processed in
+    blocks of bounded nonzeros, so indptr/indices can be memory-mapped.
+    rows=(start, stop) restricts the product to a contiguous row range.
+    """
+    start, stop = rows if rows is not None else (0, graph.num_nodes)
+    if out is None:
+        out = np.zeros((stop - start,) + x.shape[1:], dtype=np.result_type(x, np.float64))
+
+    indptr = np.asarray(graph.indptr[start:stop + 1])
+    for lo, hi in row_blocks(indptr, block_nnz):
+        first, last = int(indptr[lo]), int(indptr[hi])
+        block_out = out[lo:hi]
+        if first == last:
+            block_out[...] = 0
+            continue
+
+        values = x[np.asarray(graph.indices[first:last])]
+        if graph.weights is not None:
+            weights = np.asarray(graph.weights[first:last])
+            values = values * (weights if values.ndim == 1 else weights[:, None])
+
+        # reduceat over the starts of non-empty rows; empty rows stay zero
+        starts = indptr[lo:hi] - first
+        nonempty = indptr[lo + 1:hi + 1] > indptr[lo:hi]
+        block_out[...] = 0
+        block_out[nonempty] = np.add.reduceat(values, starts[nonempty], axis=0)
+    return out
+
+
+def power_iterations(graph, damping=DEFAULT_DAMPING, teleport=None, x0=None, max_iter=1000):
+    """
+    Generator over power-iteration steps, yielding (iteration, ranks, residual).
+
+    Only the current and next rank vectors are alive at any time. Dangling
+    nodes spread their rank along the teleport vector, so the ranks always
+    sum to one.
+    """
+    n = graph.num_nodes
+    v = teleport_vector(n, teleport)
+    totals = graph.out_weight_totals()
+    dangling = totals == 0
+    inv_out = np.zeros(n)
+    inv_out[~dangling] = 1.0 / totals[~dangling]
+
+    x = v.copy() if x0 is None else np.asarray(x0, dtype=np.float64) / np.sum(x0)
+    for iteration in range(1, max_iter + 1):
+        # Follow a link: P x, with every column scaled by 1/outdegree up front
+        x_next = in_link_sums(graph, x * inv_out)
+        x_next *= damping
+
+        # Dangling mass and teleportation both land on the teleport vector
+        dangling_mass = x[dangling].sum()
+        x_next += (damping * dangling_mass + (1 - damping)) * v
+
+        # Renormalize to stop rounding drift from accumulating
+        x_next /= x_next.sum()
+        residual = np.abs(x_next - x).sum()
+        x = x_next
+        yield iteration, x, residual
+
+
+def pagerank(graph, damping=DEFAULT_DAMPING, teleport=None, tol=1e-10, max_iter=1000, x0=None):
+    """Runs power iteration until the L1 change between iterates drops below tol"""
+    residuals = []
+    x = None
+    iteration = 0
+    for iteration, x, residual in power_iterations(graph, damping, teleport, x0, max_iter):
+        residuals.append(residual)
+        if residual < tol:
+            break
+    if x is None:
+        x = teleport_vector(graph.num_nodes, teleport)
+    converged = bool(residuals) and residuals[-1] < tol
+    return RankResult(x, iteration, residuals, converged)
+
+
+def sampled_iterations(iterations, max_frames=30, tol=1e-10):
+    """
+    Thins a stream of (iteration, ranks, residual) steps down to at most max_frames.
+
+    The first step is always kept, and so is the last: the one whose residual
+    drops below tol, or the final step if the stream ends first. In between,
+    a step is kept when its residual crosses the next of max_frames - 2 levels
+    spaced evenly in log between the first residual and tol, so the kept
+    steps follow the visible change in the ranks rather than the iteration
+    count. At most one held-back step is referenced, always the latest, and
+    it is dropped before anything else is yielded, so consuming
+    power_iterations through this still keeps just two rank vectors alive.
+    """
+    if max_frames < 2:
+        raise ValueError("max_frames must be at least 2")
+    levels = None
+    level = 0
+    pending = None
+    for step in iterations:
+        residual = step[2]
+        if levels is None:
+            levels = np.geomspace(residual, tol, max_frames)[1:-1] if residual > tol else np.zeros(0)
+            yield step
+            if residual < tol:
+                return
+            continue
+        if residual < tol:
+            # Let go of the held-back step first, so it isn't alive next to the last one
+            pending = None
+            yield step
+            return
+        if level < len(levels) and residual <= levels[level]:
+            # Several levels can be crossed in one step; it still makes one frame
+            while level < len(levels) and residual <= levels[level]:
+                level += 1
+            pending = None
+            yield step
+        else:
+            pending = step
+    if pending is not None:
+        yield pending
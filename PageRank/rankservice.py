@@ -0,0 +1,339 @@
+import asyncio
+import json
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from incrementalrank import IncrementalPageRank
+from rankengine import DEFAULT_DAMPING
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Updates wait this long for more to arrive before a batch is applied
+DEFAULT_BATCH_DELAY = 0.05
+
+# Most edge changes applied in one batch
+DEFAULT_MAX_BATCH = 50_000
+
+logger = logging.getLogger(__name__)
+
+
+class RankSnapshot:
+    """
+    One consistent view of the ranks, never changed after it is published.
+
+    order is every node sorted by decreasing rank, computed once per
+    snapshot in the background so top-k queries are a slice.
+    """
+
+    def __init__(self, version, ranks, error_bound, updates_applied):
+        self.version = version
+        self.ranks = ranks
+        self.ranks.setflags(write=False)
+        self.order = np.argsort(-ranks, kind="stable")
+        self.error_bound = error_bound
+        self.updates_applied = updates_applied
+        self.created = time.time()
+
+
+class RankService:
+    """
+    PageRank served over a local socket while the graph keeps changing.
+
+    Clients send one JSON object per line and get one back:
+      {"op": "rank", "nodes": [...]}                 ranks of the given nodes
+      {"op": "top", "k": 10}                         the k best nodes and their ranks
+      {"op": "update", "add": [[u, v], ...], "remove": [[u, v], ...]}
+      {"op": "stats"}
+    Updates are queued and applied in batches by an IncrementalPageRank on a
+    single background thread, so queries never wait for a recompute; they
+    are answered from the latest published snapshot, which is swapped in
+    whole once a batch is done. Every answer carries its snapshot version.
+    A batch that fails to apply is logged and dropped, and the updater keeps
+    going; stats report failed_batches and the last error.
+    """
+
+    def __init__(self, graph, damping=DEFAULT_DAMPING, batch_delay=DEFAULT_BATCH_DELAY, max_batch=DEFAULT_MAX_BATCH,
+                 **engine_options):
+        self.engine = IncrementalPageRank(graph, damping, **engine_options)
+        self.batch_delay = batch_delay
+        self.max_batch = max_batch
+        # One worker: the engine is only ever touched by this thread once serving starts
+        self.executor = ThreadPoolExecutor(1)
+        self.pending_added = []
+        self.pending_removed = []
+        self.pending_count = 0
+        self.batches = 0
+        self.last_batch_seconds = 0.0
+        self.failed_batches = 0
+        self.last_error = None
+        self.snapshot = RankSnapshot(0, self.engine.ranks.copy(), self.engine.error_bound, 0)
+        self.wakeup = None
+        self.server = None
+        self.updater = None
+
+    def apply_batch(self, added, removed):
+        """Runs in the executor: applies one batch and builds the next snapshot"""
+        start = time.perf_counter()
+        report = self.engine.update(added, removed)
+        snapshot = RankSnapshot(self.snapshot.version + 1, self.engine.ranks.copy(), self.engine.error_bound,
+                                self.snapshot.updates_applied + len(added) + len(removed))
+        return snapshot, report, time.perf_counter() - start
+
+    async def run_updates(self):
+        """Collects queued updates into batches and publishes a new snapshot after each"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await self.wakeup.wait()
+            await asyncio.sleep(self.batch_delay)
+            self.wakeup.clear()
+
+            added, removed = self.take_batch()
+            if not len(added) and not len(removed):
+                continue
+            try:
+                snapshot, _, seconds = await loop.run_in_executor(self.executor, self.apply_batch, added, removed)
+            except Exception as error:
+                # A bad batch is dropped; the updater keeps serving the last good snapshot
+                logger.exception("failed to apply a batch of %d edge changes", len(added) + len(removed))
+                self.failed_batches += 1
+                self.last_error = f"{type(error).__name__}: {error}"
+            else:
+                self.snapshot = snapshot
+                self.batches += 1
+                self.last_batch_seconds = seconds
+            if self.pending_count:
+                self.wakeup.set()
+
+    def take_batch(self):
+        """Removes up to max_batch queued changes, returning (added, removed) edge arrays"""
+        taken = {"added": [], "removed": []}
+        budget = self.max_batch
+        for name, queue in (("added", self.pending_added), ("removed", self.pending_removed)):
+            while queue and budget > 0:
+                edges = queue.pop(0)
+                if len(edges) > budget:
+                    queue.insert(0, edges[budget:])
+                    edges = edges[:budget]
+                taken[name].append(edges)
+                budget -= len(edges)
+        count = self.max_batch - budget
+        self.pending_count -= count
+
+        def stacked(parts):
+            return np.concatenate(parts) if parts else np.zeros((0, 2), dtype=np.int64)
+
+        return stacked(taken["added"]), stacked(taken["removed"])
+
+    def queue_update(self, added, removed):
+        added = np.asarray(added, dtype=np.int64).reshape(-1, 2)
+        removed = np.asarray(removed, dtype=np.int64).reshape(-1, 2)
+        if (len(added) and added.min() < 0) or (len(removed) and removed.min() < 0):
+            raise ValueError("node ids must be non-negative")
+        if len(added):
+            self.pending_added.append(added)
+        if len(removed):
+            self.pending_removed.append(removed)
+        self.pending_count += len(added) + len(removed)
+        self.wakeup.set()
+        return len(added) + len(removed)
+
+    def handle(self, request):
+        """Answers one decoded request from the current snapshot"""
+        if not isinstance(request, dict):
+            raise ValueError(f"requests must be JSON objects, not {type(request).__name__}")
+        snapshot = self.snapshot
+        op = request.get("op")
+        if op == "rank":
+            nodes = np.asarray(request.get("nodes", []), dtype=np.int64)
+            if len(nodes) and (nodes.min() < 0 or nodes.max() >= len(snapshot.ranks)):
+                raise ValueError(f"nodes must be in [0, {len(snapshot.ranks)})")
+            return {"version": snapshot.version, "ranks": snapshot.ranks[nodes].tolist()}
+        if op == "top":
+            nodes = snapshot.order[:int(request.get("k", 10))]
+            return {"version": snapshot.version, "nodes": nodes.tolist(), "ranks": snapshot.ranks[nodes].tolist()}
+        if op == "update":
+            queued = self.queue_update(request.get("add", []), request.get("remove", []))
+            return {"version": snapshot.version, "queued": queued}
+        if op == "stats":
+            return {
+                "version": snapshot.version,
+                "num_nodes": len(snapshot.ranks),
+                "error_bound": snapshot.error_bound,
+                "updates_applied": snapshot.updates_applied,
+                "pending": self.pending_count,
+                "batches": self.batches,
+                "last_batch_seconds": self.last_batch_seconds,
+                "failed_batches": self.failed_batches,
+                "last_error": self.last_error,
+            }
+        raise ValueError(f"unknown op {op!r}")
+
+    async def serve_client(self, reader, writer):
+        try:
+            while line := await reader.readline():
+                try:
+                    response = self.handle(json.loads(line))
+                except (ValueError, TypeError, KeyError) as error:
+                    response = {"error": str(error)}
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except ConnectionResetError:
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """Starts listening and the background updater; returns the asyncio server"""
+        self.wakeup = asyncio.Event()
+        self.updater = asyncio.create_task(self.run_updates())
+        self.server = await asyncio.start_server(self.serve_client, host, port)
+        return self.server
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.updater is not None:
+            self.updater.cancel()
+        self.executor.shutdown()
+
+
+class RankClient:
+    """A minimal client for RankService: one request in flight per connection"""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def request(self, **request):
+        self.writer.write(json.dumps(request).encode() + b"\n")
+        await self.writer.drain()
+        response = json.loads(await self.reader.readline())
+        if "error" in response:
+            raise ValueError(response["error"])
+        return response
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def load_test(host=DEFAULT_HOST, port=DEFAULT_PORT, seconds=10.0, query_clients=8, updates_per_second=2000,
+                    update_batch=100, top_k=10, seed=0):
+    """
+    Measures query latency while a writer streams random edge updates.
+
+    query_clients connections alternate top-k and random rank lookups as
+    fast as they get answers; one more connection sends update_batch random
+    edge additions and removals at about updates_per_second. Returns latency
+    percentiles in milliseconds, throughput and the snapshot versions seen.
+    """
+    rng = np.random.default_rng(seed)
+    control = await RankClient.connect(host, port)
+    num_nodes = (await control.request(op="stats"))["num_nodes"]
+    deadline = time.perf_counter() + seconds
+    latencies = []
+    versions = set()
+    added_edges = []
+
+    async def query(client_id):
+        client = await RankClient.connect(host, port)
+        count = 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            if count % 2:
+                response = await client.request(op="rank", nodes=rng.integers(0, num_nodes, size=16).tolist())
+            else:
+                response = await client.request(op="top", k=top_k)
+            latencies.append(time.perf_counter() - start)
+            versions.add(response["version"])
+            count += 1
+        await client.close()
+
+    async def write():
+        client = await RankClient.connect(host, port)
+        interval = update_batch / updates_per_second
+        while time.perf_counter() < deadline:
+            added = rng.integers(0, num_nodes, size=(update_batch // 2, 2))
+            removed = []
+            if added_edges:
+                # Remove some edges this writer added earlier, so removals hit real links
+                removed = [added_edges.pop(rng.integers(len(added_edges))) for _ in range(update_batch // 2)
+                           if added_edges]
+            added_edges.extend(added.tolist())
+            await client.request(op="update", add=added.tolist(), remove=removed)
+            await asyncio.sleep(interval)
+        await client.close()
+
+    await asyncio.gather(write(), *(query(i) for i in range(query_clients)))
+    stats = await control.request(op="stats")
+    await control.close()
+
+    milliseconds = np.array(latencies) * 1000
+    percentiles = np.percentile(milliseconds, [50, 90, 99, 99.9]) if len(milliseconds) else [np.nan] * 4
+    return {
+        "queries": len(latencies),
+        "queries_per_second": len(latencies) / seconds,
+        "p50_ms": percentiles[0],
+        "p90_ms": percentiles[1],
+        "p99_ms": percentiles[2],
+        "p999_ms": percentiles[3],
+        "max_ms": float(milliseconds.max()) if len(milliseconds) else np.nan,
+        "versions_seen": len(versions),
+        "stats": stats,
+    }
+
+
+async def serve_forever(graph, host=DEFAULT_HOST, port=DEFAULT_PORT, **options):
+    service = RankService(graph, **options)
+    server = await service.start(host, port)
+    print(f"serving ranks of {graph.num_nodes} nodes on {host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+async def serve_and_load(graph, seconds, port=DEFAULT_PORT, **load_options):
+    """Starts a service on graph and runs load_test against it in the same process"""
+    service = RankService(graph)
+    await service.start(DEFAULT_HOST, port)
+    try:
+        return await load_test(DEFAULT_HOST, port, seconds, **load_options)
+    finally:
+        await service.close()
+
+
+# To serve a random web graph (nodes, port), or to load-test a running service (port, seconds):
+# python rankservice.py serve 100000 8765
+# python rankservice.py load 8765 10
+# Without a mode, a service and a load test run together in one process (nodes, seconds):
+# python rankservice.py 100000 10
+if __name__ == "__main__":
+    from generators import make_graph
+
+    mode = sys.argv[1] if len(sys.argv) > 1 else ""
+    if mode == "serve":
+        num_nodes = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+        port = int(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_PORT
+        asyncio.run(serve_forever(make_graph("web", num_nodes, seed=0), port=port))
+    else:
+        if mode == "load":
+            port = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_PORT
+            seconds = float(sys.argv[3]) if len(sys.argv) > 3 else 10.0
+            report = asyncio.run(load_test(port=port, seconds=seconds))
+        else:
+            num_nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+            seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 10.0
+            report = asyncio.run(serve_and_load(make_graph("web", num_nodes, seed=0), seconds))
+        stats = report.pop("stats")
+        for name, value in report.items():
+            print(f"{name:>20}: {value:.3f}" if isinstance(value, float) else f"{name:>20}: {value}")
+        print(f"{'service':>20}: {stats}")
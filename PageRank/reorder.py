@@ -0,0 +1,275 @@
+import sys
+import time
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components, reverse_cuthill_mckee
+
+from rankengine import SparseGraph, gather_out_links, in_link_sums
+
+# Synchronous label-propagation rounds used by community_order
+LABEL_ROUNDS = 10
+
+
+def symmetric_pattern(graph):
+    """The undirected link structure as a CSR matrix of ones (int8), self-loops removed"""
+    n = graph.num_nodes
+    ones = np.ones(graph.num_edges, dtype=np.int8)
+    matrix = sp.csr_matrix((ones, np.asarray(graph.indices), np.asarray(graph.indptr)), shape=(n, n))
+    matrix = (matrix + matrix.T).tocsr()
+    matrix.setdiag(0)
+    matrix.eliminate_zeros()
+    matrix.data[:] = 1
+    return matrix
+
+
+def degree_order(graph):
+    """Nodes by decreasing in-degree, so the hubs most rows gather from share cache lines"""
+    return np.argsort(-np.diff(np.asarray(graph.indptr)), kind="stable")
+
+
+def rcm_order(graph):
+    """Reverse Cuthill-McKee on the undirected pattern, which keeps links near the diagonal"""
+    return reverse_cuthill_mckee(symmetric_pattern(graph), symmetric_mode=True).astype(np.int64)
+
+
+def bfs_order(graph, pattern=None):
+    """
+    Breadth-first order over the undirected links, one weak component after another.
+
+    Every component starts from its highest-degree node and all components
+    are searched together, one frontier at a time. Within a level, nodes come
+    in the order of the parents that reached them first, so neighbors of a
+    node end up next to each other.
+    """
+    pattern = symmetric_pattern(graph) if pattern is None else pattern
+    n = graph.num_nodes
+    indptr, targets = pattern.indptr.astype(np.int64), pattern.indices.astype(np.int64)
+    _, component = connected_components(pattern, directed=False)
+    degree = np.diff(indptr)
+
+    # Highest-degree node of each component as its root
+    by_degree = np.lexsort((-degree, component))
+    roots = by_degree[np.flatnonzero(np.diff(component[by_degree], prepend=-1))]
+
+    position = np.full(n, -1)
+    position[roots] = np.arange(len(roots))
+    level = np.zeros(n, dtype=np.int64)
+    frontier = roots
+    found = len(roots)
+    depth = 0
+    while len(frontier):
+        owners, reached = gather_out_links(indptr, targets, frontier)
+        fresh = position[reached] < 0
+        owners, reached = owners[fresh], reached[fresh]
+        # First parent (in frontier order) claims each node; owners are already in that order
+        reached, first = np.unique(reached, return_index=True)
+        reached = reached[np.argsort(first, kind="stable")]
+        depth += 1
+        position[reached] = found + np.arange(len(reached))
+        level[reached] = depth
+        found += len(reached)
+        frontier = reached
+    return np.lexsort((position, level, component))
+
+
+def label_propagation(pattern, rounds=LABEL_ROUNDS, seed=0, min_change=0.01):
+    """
+    Community labels by synchronous label propagation, vectorized.
+
+    Each round, every node takes the label most common among its neighbors
+    (ties broken at random); a random half of the nodes update per round,
+    which stops two-colorings from flipping back and forth. Stops early
+    once fewer than min_change of the nodes change label in a round.
+    """
+    rng = np.random.default_rng(seed)
+    n = pattern.shape[0]
+    indptr, targets = pattern.indptr.astype(np.int64), pattern.indices.astype(np.int64)
+    owners = np.repeat(np.arange(n), np.diff(indptr))
+    labels = np.arange(n)
+    for _ in range(rounds):
+        # Count (node, neighbor label) pairs; sorted keys keep each node's candidates together
+        keys, counts = np.unique(owners * n + labels[targets], return_counts=True)
+        nodes, candidates = keys // n, keys % n
+        starts = np.flatnonzero(np.diff(nodes, prepend=-1))
+        score = counts + rng.random(len(counts)) * 0.5
+        best_score = np.maximum.reduceat(score, starts)
+        best = np.flatnonzero(score == np.repeat(best_score, np.diff(np.append(starts, len(score)))))
+        nodes, candidates = nodes[best], candidates[best]
+
+        updating = rng.random(len(nodes)) < 0.5
+        nodes, candidates = nodes[updating], candidates[updating]
+        changed = np.count_nonzero(labels[nodes] != candidates)
+        labels[nodes] = candidates
+        if changed < min_change * n:
+            break
+    return labels
+
+
+def community_order(graph, rounds=LABEL_ROUNDS, seed=0):
+    """Nodes grouped by label-propagation community, largest first, in BFS order within each"""
+    pattern = symmetric_pattern(graph)
+    labels = label_propagation(pattern, rounds, seed)
+    _, community, sizes = np.unique(labels, return_inverse=True, return_counts=True)
+    bfs_position = np.empty(graph.num_nodes, dtype=np.int64)
+    bfs_position[bfs_order(graph, pattern)] = np.arange(graph.num_nodes)
+    return np.lexsort((bfs_position, -sizes[community.ravel()]))
+
+
+# Strategy name -> function(graph) returning the new order (new id -> original id)
+ORDERINGS = {
+    "degree": degree_order,
+    "rcm": rcm_order,
+    "bfs": bfs_order,
+    "community": community_order,
+}
+
+
+class ReorderedGraph:
+    """
+    A graph renumbered for locality, with the maps back to the original ids.
+
+    order[new] is the original id of new node new, and new_id[original] the
+    reverse, so vectors move between numberings by indexing.
+    """
+
+    def __init__(self, graph, order, strategy=None):
+        self.order = np.asarray(order, dtype=np.int64)
+        self.new_id = np.empty_like(self.order)
+        self.new_id[self.order] = np.arange(len(self.order))
+        self.strategy = strategy
+        self.graph = permute_graph(graph, self.order, self.new_id)
+
+    def to_original(self, values):
+        """Reindexes per-node values (rows of an array) from the new numbering to the original ids"""
+        values = np.asarray(values)
+        original = np.empty_like(values)
+        original[self.order] = values
+        return original
+
+    def from_original(self, values):
+        """Reindexes per-node values from the original ids to the new numbering"""
+        return np.asarray(values)[self.order]
+
+    def translate_nodes(self, nodes):
+        """Original ids of nodes given in the new numbering"""
+        return self.order[np.asarray(nodes, dtype=np.int64)]
+
+
+def permute_graph(graph, order, new_id):
+    """
+    The graph with node order[i] renamed to i, rows moved and sources renamed to match.
+
+    Rows are copied with one vectorized gather and their in-links sorted, so
+    each row reads x in increasing address order. Weights follow their edges.
+    """
+    indptr, indices = np.asarray(graph.indptr), np.asarray(graph.indices)
+    lengths = np.diff(indptr)[order]
+    new_indptr = np.zeros(len(order) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=new_indptr[1:])
+
+    # Position of every edge in the old arrays, row by row in the new order
+    source_positions = np.repeat(indptr[order] - new_indptr[:-1], lengths) + np.arange(new_indptr[-1])
+    n = len(order)
+    matrix = sp.csr_matrix((source_positions, new_id[indices[source_positions]], new_indptr), shape=(n, n))
+    matrix.sort_indices()
+
+    weights = None if graph.weights is None else np.asarray(graph.weights)[matrix.data]
+    return SparseGraph(new_indptr, matrix.indices.astype(np.int64), np.asarray(graph.out_degree)[order], weights)
+
+
+def reorder(graph, strategy="community", **kwargs):
+    """Returns a ReorderedGraph using one of ORDERINGS"""
+    if strategy not in ORDERINGS:
+        raise ValueError(f"unknown ordering {strategy!r}, expected one of {sorted(ORDERINGS)}")
+    return ReorderedGraph(graph, ORDERINGS[strategy](graph, **kwargs), strategy)
+
+
+def index_gap(graph):
+    """Median distance between consecutive sources within a row, a cheap proxy for gather locality"""
+    indptr, indices = np.asarray(graph.indptr), np.asarray(graph.indices)
+    gaps = np.abs(np.diff(indices))
+    # Drop the jumps between one row's last source and the next row's first; a boundary at 0
+    # (empty leading rows) or at the end has no jump before it
+    boundaries = indptr[1:-1]
+    boundaries = boundaries[(boundaries > 0) & (boundaries <= len(gaps))]
+    gaps[boundaries - 1] = 0
+    inner = gaps[gaps > 0]
+    return float(np.median(inner)) if len(inner) else 0.0
+
+
+def spmv_benchmark(graph, strategies=None, repeats=10, kernels=("engine", "compact")):
+    """
+    Times the SpMV of every ordering, returning one row per (strategy, kernel).
+
+    "engine" is rankengine.in_link_sums and "compact" the int32 / float32
+    kernel from compactrank. Each row has the reordering time, the milliseconds
+    per product, the speedup against the input order and the median index
+    gap; every product is also checked against the input order's, mapped back.
+    """
+    from compactrank import CompactOperator, compact_graph
+
+    strategies = list(ORDERINGS) if strategies is None else strategies
+    x = np.random.default_rng(0).random(graph.num_nodes)
+    expected = in_link_sums(graph, x)
+
+    candidates = [("input", None, 0.0)]
+    for strategy in strategies:
+        start = time.perf_counter()
+        reordered = reorder(graph, strategy)
+        candidates.append((strategy, reordered, time.perf_counter() - start))
+
+    rows = []
+    baseline = {}
+    for strategy, reordered, seconds in candidates:
+        permuted = graph if reordered is None else reordered.graph
+        z = x if reordered is None else reordered.from_original(x)
+        for kernel in kernels:
+            if kernel == "engine":
+                multiply = lambda: in_link_sums(permuted, z)
+            else:
+                operator = CompactOperator(compact_graph(permuted))
+                z32 = z.astype(np.float32)
+                multiply = lambda: operator(z32)
+            y = multiply()
+            start = time.perf_counter()
+            for _ in range(repeats):
+                multiply()
+            milliseconds = (time.perf_counter() - start) / repeats * 1000
+            baseline.setdefault(kernel, milliseconds)
+
+            y = y if reordered is None else reordered.to_original(y)
+            if not np.allclose(y, expected, rtol=1e-4, atol=1e-9):
+                raise AssertionError(f"{strategy} ordering changed the product")
+            rows.append({
+                "strategy": strategy,
+                "kernel": kernel,
+                "reorder_seconds": seconds,
+                "spmv_ms": milliseconds,
+                "speedup": baseline[kernel] / milliseconds,
+                "index_gap": index_gap(permuted),
+            })
+    return rows
+
+
+def format_spmv_benchmark(rows):
+    lines = [f"{'ordering':<11}{'kernel':<9}{'reorder (s)':>12}{'SpMV (ms)':>11}{'speedup':>9}{'index gap':>11}"]
+    for row in rows:
+        lines.append(
+            f"{row['strategy']:<11}{row['kernel']:<9}{row['reorder_seconds']:>12.2f}{row['spmv_ms']:>11.1f}"
+            f"{row['speedup']:>8.2f}x{row['index_gap']:>11.0f}"
+        )
+    return "\n".join(lines)
+
+
+# To compare orderings on a web graph whose ids have been shuffled, as in crawl order (nodes):
+# python reorder.py 1000000
+if __name__ == "__main__":
+    from generators import make_graph
+
+    num_nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    generated = make_graph("web", num_nodes, seed=0)
+    # The generator numbers pages host by host; shuffle to get an arbitrary input order
+    graph = ReorderedGraph(generated, np.random.default_rng(1).permutation(num_nodes)).graph
+    print(f"{graph.num_nodes} nodes, {graph.num_edges} edges")
+    print(format_spmv_benchmark(spmv_benchmark(graph)))
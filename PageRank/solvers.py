@@ -0,0 +1,305 @@
+import sys
+import time
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import spsolve_triangular
+
+from rankengine import (
+    DEFAULT_DAMPING,
+    RankResult,
+    SparseGraph,
+    in_link_sums,
+    pagerank,
+    teleport_vector,
+)
+
+
+def transition_setup(graph, teleport):
+    """Returns (teleport vector, dangling mask, 1/outdegree with zeros for dangling)"""
+    v = teleport_vector(graph.num_nodes, teleport)
+    totals = graph.out_weight_totals()
+    dangling = totals == 0
+    inv_out = np.zeros(graph.num_nodes)
+    inv_out[~dangling] = 1.0 / totals[~dangling]
+    return v, dangling, inv_out
+
+
+def google_step(graph, x, damping, v, dangling, inv_out):
+    """One power-iteration step x -> G x, renormalized"""
+    x_next = damping * in_link_sums(graph, x * inv_out)
+    x_next += (damping * x[dangling].sum() + (1 - damping)) * v
+    return x_next / x_next.sum()
+
+
+def row_subgraph(graph, rows):
+    """Returns a graph view holding only the given rows' in-links (columns stay global)"""
+    indptr = np.asarray(graph.indptr)
+    starts, stops = indptr[rows], indptr[rows + 1]
+    lengths = stops - starts
+    offsets = np.arange(int(lengths.sum())) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    positions = np.repeat(starts, lengths) + offsets
+    sub_indptr = np.concatenate([[0], np.cumsum(lengths)])
+    weights = None if graph.weights is None else np.asarray(graph.weights)[positions]
+    return SparseGraph(sub_indptr, np.asarray(graph.indices)[positions], graph.out_degree, weights)
+
+
+def power(graph, damping=DEFAULT_DAMPING, teleport=None, tol=1e-10, max_iter=1000, x0=None):
+    """Plain power iteration, the baseline every other solver is measured against"""
+    return pagerank(graph, damping, teleport, tol, max_iter, x0)
+
+
+def gauss_seidel(graph, damping=DEFAULT_DAMPING, teleport=None, tol=1e-10, max_iter=1000, x0=None):
+    """
+    Gauss-Seidel sweeps over the PageRank linear system.
+
+    With dangling columns left empty, PageRank is y / sum(y) for the
+    solution of (I - d P) y = v. Every sweep solves the lower triangle
+    (I - d tril(P)) y_new = v + d triu(P, 1) y_old with one sparse
+    triangular solve, so each row already sees the rows updated before it
+    in the same sweep. This needs the per-edge values of P in memory.
+    """
+    n = graph.num_nodes
+    v, dangling, inv_out = transition_setup(graph, teleport)
+    indices = np.asarray(graph.indices)
+    values = damping * inv_out[indices]
+    if graph.weights is not None:
+        values *= np.asarray(graph.weights)
+    P = sp.csr_matrix((values, indices, np.asarray(graph.indptr)), shape=(n, n))
+
+    lower = (sp.identity(n, format="csr") - sp.tril(P, format="csr")).tocsr()
+    upper = sp.triu(P, 1, format="csr")
+    unit_diagonal = not P.diagonal().any()
+    if unit_diagonal:
+        lower = sp.tril(lower, -1, format="csr")
+
+    x = v.copy() if x0 is None else np.asarray(x0, dtype=np.float64) / np.sum(x0)
+    y = x.copy()
+    residuals = []
+    iteration = 0
+    for iteration in range(1, max_iter + 1):
+        y = spsolve_triangular(lower, v + upper @ y, lower=True, unit_diagonal=unit_diagonal)
+        x_next = y / y.sum()
+        residuals.append(np.abs(x_next - x).sum())
+        x = x_next
+        if residuals[-1] < tol:
+            break
+    return RankResult(x, iteration, residuals, bool(residuals) and residuals[-1] < tol, method="gauss_seidel")
+
+
+def aitken_extrapolate(x0, x1, x2):
+    """Componentwise Aitken delta-squared extrapolation of three iterates"""
+    delta = x1 - x0
+    second = x2 - 2 * x1 + x0
+    safe = np.abs(second) > 1e-300
+    x = x2.copy()
+    x[safe] = x0[safe] - delta[safe] ** 2 / second[safe]
+    x = np.abs(x)
+    return x / x.sum()
+
+
+def quadratic_extrapolate(x0, x1, x2, x3):
+    """Quadratic extrapolation (Kamvar et al.) from four successive iterates"""
+    y1, y2, y3 = x1 - x0, x2 - x0, x3 - x0
+    Y = np.column_stack([y1, y2])
+    gamma1, gamma2 = -np.linalg.lstsq(Y, y3, rcond=None)[0]
+    gamma3 = 1.0
+    beta0 = gamma1 + gamma2 + gamma3
+    beta1 = gamma2 + gamma3
+    beta2 = gamma3
+    x = np.abs(beta0 * x1 + beta1 * x2 + beta2 * x3)
+    return x / x.sum()
+
+
+def extrapolated(graph, damping=DEFAULT_DAMPING, teleport=None, tol=1e-10, max_iter=1000, x0=None,
+                 kind="quadratic", period=10):
+    """
+    Power iteration with periodic Aitken or quadratic extrapolation.
+
+    Every period iterations the last three (Aitken) or four (quadratic)
+    iterates are combined to cancel the slowest decaying eigenvector
+    components. Only that many vectors are kept.
+    """
+    v, dangling, inv_out = transition_setup(graph, teleport)
+    x = v.copy() if x0 is None else np.asarray(x0, dtype=np.float64) / np.sum(x0)
+    history = [x]
+    needed = 3 if kind == "aitken" else 4
+
+    residuals = []
+    iteration = 0
+    for iteration in range(1, max_iter + 1):
+        x_next = google_step(graph, x, damping, v, dangling, inv_out)
+        residuals.append(np.abs(x_next - x).sum())
+        x = x_next
+        history = (history + [x])[-needed:]
+        if residuals[-1] < tol:
+            break
+
+        if iteration % period == 0 and len(history) == needed:
+            x = aitken_extrapolate(*history) if kind == "aitken" else quadratic_extrapolate(*history)
+            history = [x]
+    return RankResult(x, iteration, residuals, bool(residuals) and residuals[-1] < tol, method=kind)
+
+
+def aitken(graph, damping=DEFAULT_DAMPING, teleport=None, tol=1e-10, max_iter=1000, x0=None, period=10):
+    return extrapolated(graph, damping, teleport, tol, max_iter, x0, kind="aitken", period=period)
+
+
+def quadratic(graph, damping=DEFAULT_DAMPING, teleport=None, tol=1e-10, max_iter=1000, x0=None, period=10):
+    return extrapolated(graph, damping, teleport, tol, max_iter, x0, kind="quadratic", period=period)
+
+
+def adaptive(graph, damping=DEFAULT_DAMPING, teleport=None, tol=1e-10, max_iter=1000, x0=None, refresh=0.8,
+             full_every=10):
+    """
+    Adaptive PageRank: nodes stop being updated once they have converged.
+
+    A node is frozen when its last change fell below tol times its rank.
+    Only the rows of active nodes are multiplied; their sub-CSR is rebuilt
+    each time the active set shrinks below refresh times its size at the
+    last rebuild. Frozen rows aren't recomputed, so they go stale as their
+    in-neighbours move: every full_every iterations, and whenever the L1
+    change over all n rows drops below tol, one full step recomputes every
+    row. The run only stops on a full step that changes less than tol, and
+    each full step reactivates every node it moved by tol times its rank or
+    more.
+    """
+    n = graph.num_nodes
+    v, dangling, inv_out = transition_setup(graph, teleport)
+    x = v.copy() if x0 is None else np.asarray(x0, dtype=np.float64) / np.sum(x0)
+
+    active = np.ones(n, dtype=bool)
+    rows = np.arange(n)  # Rows held by the current subgraph
+    subgraph = graph
+    residuals = []
+    converged = False
+    iteration = 0
+    for iteration in range(1, max_iter + 1):
+        num_active = np.count_nonzero(active[rows])
+        if num_active < refresh * len(rows):
+            rows = rows[active[rows]]
+            subgraph = row_subgraph(graph, rows)
+
+        updated = damping * in_link_sums(subgraph, x * inv_out)
+        updated += (damping * x[dangling].sum() + (1 - damping)) * v[rows]
+
+        # Rows that froze since the last rebuild keep their values
+        live = active[rows]
+        live_rows = rows[live]
+        previous = x.copy()
+        x[live_rows] = updated[live]
+        x /= x.sum()
+        change = np.abs(x - previous)
+        residuals.append(change.sum())
+
+        if residuals[-1] < tol or iteration % full_every == 0:
+            # Full step: frozen rows may have drifted from what their in-links now give
+            x_full = google_step(graph, x, damping, v, dangling, inv_out)
+            change = np.abs(x_full - x)
+            x = x_full
+            residuals[-1] = change.sum()
+            if residuals[-1] < tol:
+                converged = True
+                break
+            active = change >= tol * x
+            rows = np.arange(n)
+            subgraph = graph
+        else:
+            active[live_rows[change[live_rows] < tol * x[live_rows]]] = False
+    return RankResult(x, iteration, residuals, converged, method="adaptive")
+
+
+def scc_block(graph, damping=DEFAULT_DAMPING, teleport=None, tol=1e-10, max_iter=1000, x0=None, num_workers=1):
+    """Block solve over strongly connected components in topological order (see sccblock)"""
+    from sccblock import scc_pagerank
+    return scc_pagerank(graph, damping, teleport, tol, max_iter, x0, num_workers)
+
+
+def compact(graph, damping=DEFAULT_DAMPING, teleport=None, tol=1e-10, max_iter=1000, x0=None, precision="mixed"):
+    """Power iteration on int32 indices with float32 gathers, finishing in float64 (see compactrank)"""
+    from compactrank import compact_pagerank
+    return compact_pagerank(graph, damping, teleport, tol, max_iter, x0, precision)
+
+
+# Every solver takes (graph, damping, teleport, tol, max_iter, x0) and returns a RankResult
+SOLVERS = {
+    "power": power,
+    "gauss_seidel": gauss_seidel,
+    "aitken": aitken,
+    "quadratic": quadratic,
+    "adaptive": adaptive,
+    "scc_block": scc_block,
+    "compact": compact,
+}
+
+
+def solve(graph, method="power", damping=DEFAULT_DAMPING, teleport=None, tol=1e-10, max_iter=1000, x0=None, **options):
+    """Runs one of the registered PageRank solvers by name"""
+    if method not in SOLVERS:
+        raise ValueError(f"unknown PageRank solver {method!r}, expected one of {sorted(SOLVERS)}")
+    return SOLVERS[method](graph, damping, teleport, tol, max_iter, x0, **options)
+
+
+def compare_solvers(graph, methods=None, damping=DEFAULT_DAMPING, teleport=None, tol=1e-10, max_iter=1000):
+    """
+    Runs several solvers on one graph and returns a row of measurements per solver.
+
+    Each row has the method, iterations, wall time in seconds, the residual
+    curve and the L1 error against a tightly converged power iteration.
+    """
+    methods = methods or list(SOLVERS)
+    reference = pagerank(graph, damping, teleport, tol=min(tol, 1e-13) / 100, max_iter=10 * max_iter).ranks
+
+    rows = []
+    for method in methods:
+        start = time.perf_counter()
+        result = solve(graph, method, damping, teleport, tol, max_iter)
+        seconds = time.perf_counter() - start
+        rows.append({
+            "method": method,
+            "iterations": result.iterations,
+            "seconds": seconds,
+            "residuals": result.residuals,
+            "error": float(np.abs(result.ranks - reference).sum()),
+            "converged": result.converged,
+        })
+    return rows
+
+
+def format_comparison(rows, curve_points=12):
+    """Formats compare_solvers output as a table plus log10 residual curves"""
+    baseline = next((row for row in rows if row["method"] == "power"), rows[0])
+    lines = [f"{'method':<14}{'iters':>7}{'time (s)':>11}{'vs power':>10}{'L1 error':>12}"]
+    for row in rows:
+        speedup = baseline["seconds"] / row["seconds"] if row["seconds"] > 0 else float("inf")
+        lines.append(
+            f"{row['method']:<14}{row['iterations']:>7}{row['seconds']:>11.3f}"
+            f"{speedup:>9.2f}x{row['error']:>12.2e}"
+        )
+
+    lines.append("")
+    lines.append("log10 residual by iteration")
+    longest = max(len(row["residuals"]) for row in rows)
+    marks = np.unique(np.linspace(1, longest, curve_points).astype(int))
+    lines.append(f"{'':<14}" + "".join(f"{mark:>7}" for mark in marks))
+    for row in rows:
+        residuals = np.asarray(row["residuals"])
+        cells = [
+            f"{np.log10(max(residuals[mark - 1], 1e-300)):>7.1f}" if mark <= len(residuals) else f"{'':>7}"
+            for mark in marks
+        ]
+        lines.append(f"{row['method']:<14}" + "".join(cells))
+    return "\n".join(lines)
+
+
+# To compare the solvers on a random graph (nodes, average degree, damping):
+# python solvers.py 200000 8 0.85
+if __name__ == "__main__":
+    num_nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    degree = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    damping = float(sys.argv[3]) if len(sys.argv) > 3 else 0.85
+
+    rng = np.random.default_rng(0)
+    edges = rng.integers(0, num_nodes, size=(num_nodes * degree, 2))
+    graph = SparseGraph.from_edges(edges, num_nodes)
+    print(format_comparison(compare_solvers(graph, damping=damping)))
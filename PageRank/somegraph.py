@@ -1,5 +1,69 @@
 from manim import *
 import numpy as np
+import os
+
+from edgeset import EdgeSet
+from graphformat import import_edge_list
+from layout import cached_layout, fit_to_box
+from matrixview import MatrixHeatmap, graph_matrix, matrix_mobject, zoom_to_block
+from rankcache import RankCache
+from rankengine import SparseGraph, pagerank, power_iterations, sampled_iterations
+
+# Original edges for the directed graph
+EDGES = [
+    (0, 1), (0, 3), (1, 0), (1, 4), (2, 3),
+    (3, 2), (3, 4), (4, 0), (4, 3)
+]
+
+# Probability that the random surfer teleports instead of following a link
+TELEPORT_PROB = 1/4
+
+# Optional text edge list for the large graph scene; it's converted once into
+# GRAPH_CACHE_DIR and memory-mapped from there on later renders
+GRAPH_FILE = os.environ.get("PAGERANK_GRAPH")
+GRAPH_CACHE_DIR = os.environ.get("PAGERANK_GRAPH_CACHE", "graph_cache")
+
+# Force layouts of the bigger graphs, saved so re-rendering a scene doesn't lay the graph out again.
+# The layout is seeded, so a cached one is the same as a fresh one
+LAYOUT_CACHE_DIR = os.environ.get("PAGERANK_LAYOUT_CACHE", os.path.join(GRAPH_CACHE_DIR, "layouts"))
+
+# Optional directory for computed rankings, so re-rendering a scene doesn't solve again.
+# Off by default: a cache hit or warm start changes the iteration counts a scene shows
+RANK_CACHE_DIR = os.environ.get("PAGERANK_RANK_CACHE")
+
+# Graphs up to this size are placed by hand on a circle; bigger ones get a force layout
+CIRCLE_LAYOUT_MAX_NODES = 8
+
+# Animated steps of the convergence scene, however many iterations the solve takes
+CONVERGENCE_FRAMES = 24
+CONVERGENCE_FRAME_SECONDS = 0.4
+
+# Graphs up to this size get one dot per node in the convergence scene; bigger ones share a point cloud
+CONVERGENCE_DOT_MAX_NODES = 500
+
+
+def node_positions(graph, radius=2.4, width=12, height=6.5):
+    """Scene positions for every node: a regular polygon for small graphs, Barnes-Hut layout otherwise"""
+    n = graph.num_nodes
+    if n <= CIRCLE_LAYOUT_MAX_NODES:
+        angles = np.linspace(0, 2*PI, n + 1)[:-1]
+        return np.column_stack([radius * np.cos(angles), radius * np.sin(angles), np.zeros(n)])
+    return fit_to_box(cached_layout(graph, cache_dir=LAYOUT_CACHE_DIR), width, height)
+
+
+def scene_pagerank(graph, damping, cache_dir=RANK_CACHE_DIR):
+    """PageRank for a scene: a cold solve, or through a RankCache when a cache_dir is given"""
+    if cache_dir is None:
+        return pagerank(graph, damping)
+    return RankCache(cache_dir).rank(graph, damping=damping)
+
+
+def rank_colors(ranks):
+    """(n, 4) RGBA rows from blue for the lowest rank to yellow for the highest"""
+    low, high = np.array(BLUE.to_rgb()), np.array(YELLOW.to_rgb())
+    levels = (ranks / ranks.max())[:, None]
+    return np.column_stack([low + levels * (high - low), np.ones(len(ranks))])
+
 
 class PageRankGraph(Scene):
     def construct(self):
@@ -8,52 +72,28 @@ class PageRankGraph(Scene):
         nodes = []
         node_labels = []
         
-        # Position the nodes in a pentagon shape
-        radius = 2.4
-        angles = np.linspace(0, 2*PI, 6)[:-1]  # 5 angles
+        # Original edges for the directed graph
+        edges = EDGES
+        graph = SparseGraph.from_edges(edges)
         
-        for i, angle in enumerate(angles):
-            x = radius * np.cos(angle)
-            y = radius * np.sin(angle)
-            
+        # Position the nodes in a pentagon shape
+        positions = node_positions(graph)
+        for i, position in enumerate(positions):
             # Create node (circle with no fill)
             node = Circle(radius=0.5, color=BLUE, fill_opacity=0)
-            node.move_to([x, y, 0])
+            node.move_to(position)
             nodes.append(node)
             
             # Create node label
             label = Text(f"{i+1}").scale(0.7).move_to(node.get_center())
             node_labels.append(label)
         
-        # Original edges for the directed graph
-        edges = [
-            (0, 1), (0, 3), (1, 0), (1, 4), (2, 3),
-            (3, 2), (3, 4), (4, 0), (4, 3)
-        ]
-        
-        arrows = []
-        # Dictionary to map edge to arrow index for later reference
-        edge_to_arrow = {}
-        
-        for idx, (start, end) in enumerate(edges):
-            # Calculate the direction vector
-            start_pos = nodes[start].get_center()
-            end_pos = nodes[end].get_center()
-            
-            # Adjust start and end positions to be on the circle boundaries
-            direction = normalize(end_pos - start_pos)
-            start_adjusted = start_pos + direction * 0.5  # radius of the circle
-            end_adjusted = end_pos - direction * 0.5
-            
-            # Create the arrow
-            arrow = CurvedArrow(start_adjusted, end_adjusted, angle = TAU/4, color=WHITE)
-            arrows.append(arrow)
-            
-            # Map this edge to the arrow index
-            edge_to_arrow[(start, end)] = idx
+        # All arrows in one edge set, ends pulled back to the circle boundaries
+        # (radius of the circle); it maps each edge to its index for highlighting
+        arrows = EdgeSet.from_graph(edges, positions, angle=TAU/4, color=WHITE, node_radius=0.5)
         
         # Group all graph elements together
-        graph_group = VGroup(*nodes, *node_labels, *arrows)
+        graph_group = VGroup(*nodes, *node_labels, arrows)
         
         # Show nodes and labels
         self.play(
@@ -64,7 +104,7 @@ class PageRankGraph(Scene):
         self.wait(1)
         
         # Show arrows
-        self.play(*[Create(arrow) for arrow in arrows])
+        self.play(Create(arrows))
 
         self.wait(4)
         ### This is the finish point for the production of the connected graph
@@ -87,26 +127,30 @@ class PageRankGraph(Scene):
         self.wait(2)
         
         # Create adjacency matrix (transposed from original)
-        n = len(nodes)
-        adjacency = np.zeros((n, n))
-        for start, end in edges:
-            adjacency[end, start] = 1  # Transposed - now rows are arrivals, columns are departures
-            
+        # Rows are arrivals, columns are departures
+        n = graph.num_nodes
+        adjacency, _ = graph_matrix(graph)
+        
         # Create a title for the adjacency matrix
         adj_matrix_title = Text("Adjacency Matrix").scale(0.8)
         adj_matrix_title.to_edge(UP)
         
         # Create the matrix visualization with entries 0 and 1
-        adj_matrix = Matrix(
-            [[str(int(adjacency[i, j])) for j in range(n)] for i in range(n)],
+        # (a heatmap image instead once the graph is too big to typeset)
+        adj_matrix = matrix_mobject(
+            adjacency,
+            lambda value: str(int(value)),
             h_buff=1.5,
-            v_buff=1.0
+            v_buff=1.0,
+            heatmap_kwargs=dict(colormap="blues", height=6.5)
         )
         adj_matrix.scale(0.75)
+        text_matrix = isinstance(adj_matrix, Matrix)
         
         # Create row and column labels
-        row_labels = VGroup(*[Text(f"{i+1}", font_size=20) for i in range(n)])
-        col_labels = VGroup(*[Text(f"{i+1}", font_size=20) for i in range(n)])
+        labeled = range(n) if text_matrix else []
+        row_labels = VGroup(*[Text(f"{i+1}", font_size=20) for i in labeled])
+        col_labels = VGroup(*[Text(f"{i+1}", font_size=20) for i in labeled])
         
         # Position labels
         for i, label in enumerate(row_labels):
@@ -116,17 +160,17 @@ class PageRankGraph(Scene):
             label.next_to(adj_matrix.get_columns()[i], UP, buff=0.5)
         
         # Add row and column headers (switched from original)
-        row_header = Text("To", font_size=24).next_to(row_labels, LEFT, buff=0.5)
-        col_header = Text("From", font_size=24).next_to(col_labels, UP, buff=0.5)
+        row_header = Text("To", font_size=24).next_to(row_labels if text_matrix else adj_matrix, LEFT, buff=0.5)
+        col_header = Text("From", font_size=24).next_to(col_labels if text_matrix else adj_matrix, UP, buff=0.5)
         
         # Group matrix elements
-        matrix_group = VGroup(adj_matrix, row_labels, col_labels, row_header, col_header)
+        matrix_group = Group(adj_matrix, row_labels, col_labels, row_header, col_header)
         matrix_group.move_to(LEFT * .2 + DOWN * .3)
         
         # Transition from graph to adjacency matrix
         self.play(
             FadeIn(adj_matrix_title),
-            Transform(graph_copy, adj_matrix)
+            Transform(graph_copy, adj_matrix) if text_matrix else FadeTransform(graph_copy, adj_matrix)
         )
         
         self.play(
@@ -139,20 +183,16 @@ class PageRankGraph(Scene):
         self.wait(4)
         
         # Now we'll highlight matrix entries and corresponding arrows in the original graph
-        # Select a few edges to demonstrate
-        demo_edges = [(0, 1), (1, 0), (3, 2)]
+        # Select a few edges to demonstrate (only when every entry is typeset)
+        demo_edges = [(0, 1), (1, 0), (3, 2)] if text_matrix else []
         
         highlight_circle = None  # Initialize variable for the highlight circle
         explanation_text = None  # Initialize variable for the explanation text
         
         for i, (start, end) in enumerate(demo_edges):
-            # Reset colors of all arrows first
-            for arrow in arrows:
-                arrow.set_color(WHITE)
-            
             # Highlight the corresponding arrow in the original graph
-            arrow_idx = edge_to_arrow[(start, end)]
-            arrows[arrow_idx].set_color(YELLOW)
+            # (every other arrow goes back to white)
+            arrows.highlight([arrows.get_edge_index(start, end)], YELLOW, base_color=WHITE)
             
             # Get the position of the matrix entry in the transposed matrix
             entry_idx = end * n + start  # Transposed indices
@@ -188,10 +228,11 @@ class PageRankGraph(Scene):
             self.wait(2)
         
         # Clean up last highlight and text
-        self.play(
-            FadeOut(highlight_circle),
-            FadeOut(explanation_text)
-        )
+        if demo_edges:
+            self.play(
+                FadeOut(highlight_circle),
+                FadeOut(explanation_text)
+            )
         
         # Add a general explanation of the adjacency matrix using LaTeX
         explanation = MathTex(
@@ -205,29 +246,19 @@ class PageRankGraph(Scene):
         matrix_title = Text("Transition Matrix with Teleport Probability").scale(0.7)
         matrix_title.to_edge(UP)
         
-        # Calculate the transition probabilities
-        teleport_prob = 1/4
-        n = len(nodes)
-        P = np.zeros((n, n))
-        
-        # Fill the matrix according to the graph structure
-        for i in range(n):
-            outgoing_count = sum(1 for e in edges if e[0] == i)
-            if outgoing_count > 0:
-                standard_prob = (1 - teleport_prob) / outgoing_count
-                for start, end in edges:
-                    if start == i:
-                        P[end, start] = standard_prob  # Column-major format for Markov matrices
-            
-            # Add teleport probability
-            for j in range(n):
-                P[j, i] += teleport_prob / n
+        # Calculate the transition probabilities from the sparse engine
+        # (column j spreads 0.75 over j's out-links, 0.25 over every node)
+        teleport_prob = TELEPORT_PROB
+        n = graph.num_nodes
+        P, teleport_offset = graph_matrix(graph, "transition", damping=1 - teleport_prob)
         
         # Create the matrix visualization
-        transition_matrix = Matrix(
-            [[f"{P[i, j]:.2f}" for j in range(n)] for i in range(n)],
+        transition_matrix = matrix_mobject(
+            P,
+            column_offset=teleport_offset,
             h_buff=1.5,
-            v_buff=1.0
+            v_buff=1.0,
+            heatmap_kwargs=dict(colormap="heat", log_scale=True, height=8.0)
         )
         transition_matrix.scale(0.6)
         transition_matrix.center()
@@ -249,10 +280,104 @@ class PageRankGraph(Scene):
         
         self.play(Write(explanation))
         
+        self.wait(2)
+        
+        # Solve for the actual PageRank vector with power iteration
+        result = scene_pagerank(graph, 1 - teleport_prob)
+        
+        rank_title = Text("PageRank Vector", font_size=28)
+        rank_vector = matrix_mobject(
+            result.ranks[:, None],
+            lambda rank: f"{rank:.3f}",
+            v_buff=1.0,
+            heatmap_kwargs=dict(colormap="heat", height=8.0, width=0.6)
+        ).scale(0.6)
+        rank_labels = VGroup(*[Text(f"{i+1}", font_size=20) for i in labeled])
+        for i, label in enumerate(rank_labels):
+            label.next_to(rank_vector.get_rows()[i], LEFT, buff=0.4)
+        
+        rank_group = Group(rank_vector, rank_labels)
+        rank_title.next_to(rank_group, UP, buff=0.3)
+        rank_group = Group(rank_group, rank_title)
+        
+        # Slide the transition matrix over to make room for the result
+        self.play(transition_matrix.animate.shift(LEFT * 2.5))
+        rank_group.next_to(transition_matrix, RIGHT, buff=1.0)
+        
+        iteration_text = Text(
+            f"Power iteration converged after {result.iterations} steps",
+            font_size=20
+        ).next_to(explanation, DOWN, buff=0.3)
+        
+        self.play(FadeIn(rank_group), Write(iteration_text))
+        
         # Wait for final view
         self.wait(2)
 
 
+# A web-sized graph: thousands of nodes placed by the Barnes-Hut force layout
+class LargePageRankGraph(Scene):
+    def construct(self):
+        if GRAPH_FILE:
+            graph = import_edge_list(GRAPH_FILE, GRAPH_CACHE_DIR).graph
+            num_nodes = graph.num_nodes
+        else:
+            rng = np.random.default_rng(0)
+            num_nodes = 2000
+            
+            # Sparse random web: mostly local links plus a few long-range ones
+            starts = rng.integers(0, num_nodes, size=3 * num_nodes)
+            ends = (starts + rng.geometric(0.05, size=len(starts))) % num_nodes
+            graph = SparseGraph.from_edges(np.column_stack([starts, ends]), num_nodes)
+        
+        title = Text(f"{num_nodes} pages, {graph.num_edges} links", font_size=28).to_edge(UP)
+        positions = node_positions(graph, width=12, height=6.2) + DOWN * 0.3
+        
+        # All links in one edge set: straight, faint, with small tips
+        links = graph.edges()
+        edge_cloud = EdgeSet.from_graph(links, positions, angle=0, color=GREY, opacity=0.4,
+                                        stroke_width=0.5, tip_length=0.04)
+        
+        # Nodes as one point cloud, colored by PageRank
+        ranks = scene_pagerank(graph, 1 - TELEPORT_PROB).ranks
+        node_cloud = PMobject(stroke_width=4)
+        node_cloud.add_points(positions, rgbas=rank_colors(ranks))
+        
+        self.play(Write(title))
+        self.play(Create(edge_cloud), FadeIn(node_cloud), run_time=3)
+        self.wait(2)
+        
+        # Light up every link into the top-ranked page
+        top = int(np.argmax(ranks))
+        into_top = np.flatnonzero(links[:, 1] == top)
+        edge_cloud.highlight(into_top, YELLOW, base_color=GREY)
+        edge_cloud.set_edge_opacities(1.0, into_top)
+        self.wait(2)
+        
+        # The adjacency matrix is far too big to typeset, so it's drawn as a heatmap
+        matrix_title = Text("Adjacency Matrix", font_size=28).to_edge(UP)
+        heatmap = MatrixHeatmap.from_graph(graph, colormap="blues", max_cells=400, height=6.2)
+        heatmap.shift(DOWN * 0.3)
+        
+        self.play(
+            FadeOut(edge_cloud), FadeOut(node_cloud),
+            ReplacementTransform(title, matrix_title),
+            FadeIn(heatmap)
+        )
+        self.wait(2)
+        
+        # Links are mostly local, so the mass hugs the diagonal; zoom into one corner
+        block = (0, 100)
+        outline = heatmap.block_rectangle(block, block)
+        self.play(Create(outline))
+        zoom, zoomed = zoom_to_block(heatmap, block, block)
+        self.play(zoom, FadeOut(outline), run_time=2)
+        
+        zoom_label = Text(f"Pages 1-{block[1]}", font_size=24).next_to(zoomed, RIGHT, buff=0.4)
+        self.play(Write(zoom_label))
+        self.wait(2)
+
+
 # Create a separate scene for explaining the PageRank computation
 class PageRankComputation(Scene):
     def construct(self):
@@ -298,3 +423,78 @@ class PageRankComputation(Scene):
         
         self.play(Write(final_msg))
         self.wait(2)
+        
+        # Show the steady state that the engine actually computes for the example graph
+        graph = SparseGraph.from_edges(EDGES)
+        result = scene_pagerank(graph, 1 - TELEPORT_PROB)
+        ranks_text = "   ".join(f"PR({i+1}) = {rank:.3f}" for i, rank in enumerate(result.ranks))
+        
+        # Make room below the formula for the result
+        self.play(FadeOut(legend), final_msg.animate.next_to(formula, DOWN, buff=0.6))
+        result_msg = Text(ranks_text, font_size=20, color=YELLOW).next_to(final_msg, DOWN, buff=0.5)
+        
+        self.play(Write(result_msg))
+        self.wait(2)
+
+
+# Power iteration played out: node sizes and colors follow the ranks as they converge
+class PageRankConvergence(Scene):
+    def construct(self):
+        if GRAPH_FILE:
+            graph = import_edge_list(GRAPH_FILE, GRAPH_CACHE_DIR).graph
+        else:
+            graph = SparseGraph.from_edges(EDGES)
+        n = graph.num_nodes
+        positions = node_positions(graph, width=12, height=5.8) + DOWN * 0.4
+        
+        # Every node is a dot whose area follows its rank; big graphs only change color
+        if n <= CIRCLE_LAYOUT_MAX_NODES:
+            max_radius = 0.5
+            links = EdgeSet.from_graph(graph.edges(), positions, angle=TAU/4, color=GREY, node_radius=max_radius)
+        else:
+            max_radius = min(0.5, 0.6 * np.sqrt(12 * 5.8 / n))
+            links = EdgeSet.from_graph(graph.edges(), positions, angle=0, color=GREY, opacity=0.4,
+                                       stroke_width=0.5, tip_length=0.04)
+        
+        def rank_nodes(ranks):
+            colors = rank_colors(ranks)
+            if n > CONVERGENCE_DOT_MAX_NODES:
+                cloud = PMobject(stroke_width=4)
+                cloud.add_points(positions, rgbas=colors)
+                return cloud
+            radii = max_radius * np.clip(np.sqrt(ranks / ranks.max()), 0.15, 1)
+            return VGroup(*[
+                Dot(position, radius=radius, color=rgb_to_color(color[:3]))
+                for position, radius, color in zip(positions, radii, colors)
+            ])
+        
+        # Every page starts out equally likely
+        nodes = rank_nodes(np.full(n, 1.0 / n))
+        labels = VGroup(*[
+            Text(f"{i+1}", font_size=24, color=BLACK).move_to(position)
+            for i, position in enumerate(positions[:n if n <= CIRCLE_LAYOUT_MAX_NODES else 0])
+        ])
+        title = Text("Power Iteration", font_size=28).to_edge(UP)
+        status = Text("Iteration 0", font_size=24).to_edge(DOWN)
+        
+        self.play(Write(title), Create(links), FadeIn(nodes), Write(labels), Write(status))
+        self.wait(1)
+        
+        # The engine streams its iterates; only a frame budget's worth of them
+        # is drawn, so the render costs the same however many iterations run.
+        # Each frame's dots copy what they need, so no rank vector is kept.
+        tol = 1e-10
+        residual = np.inf
+        iterates = power_iterations(graph, damping=1 - TELEPORT_PROB)
+        for iteration, ranks, residual in sampled_iterations(iterates, CONVERGENCE_FRAMES, tol):
+            new_status = Text(f"Iteration {iteration}    change {residual:.1e}", font_size=24).to_edge(DOWN)
+            self.play(
+                Transform(nodes, rank_nodes(ranks)),
+                ReplacementTransform(status, new_status),
+                run_time=CONVERGENCE_FRAME_SECONDS
+            )
+            status = new_status
+        
+        outcome = f"Converged after {iteration} iterations" if residual < tol else f"Stopped after {iteration} iterations"
+        self.play(ReplacementTransform(status, Text(outcome, font_size=24).to_edge(DOWN)))
+        self.wait(2)
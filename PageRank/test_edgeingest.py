@@ -0,0 +1,21 @@
+import numpy as np
+import pytest
+
+from edgeingest import read_edge_chunks, read_label_chunks
+
+
+def test_rows_with_extra_columns_keep_their_own_edges(tmp_path):
+    # Joining every token and reshaping by the first row's width misread this as 0->1, 1->2, 5->2, ...
+    path = tmp_path / "edges.txt"
+    path.write_bytes(b"# start end weight\n0 1\n1,2,5\n\n2\t3 5 7\n3 4\n")
+    edges = np.concatenate(list(read_edge_chunks(str(path), chunk_bytes=8)))
+    assert edges.tolist() == [[0, 1], [1, 2], [2, 3], [3, 4]]
+    labels = np.concatenate(list(read_label_chunks(str(path))))
+    assert labels[:, 0].tolist() == [b"0", b"1", b"2", b"3"]
+
+
+def test_row_without_an_end_column_raises(tmp_path):
+    path = tmp_path / "edges.txt"
+    path.write_bytes(b"0 1\n1\n2 3\n")
+    with pytest.raises(ValueError):
+        list(read_edge_chunks(str(path)))
@@ -0,0 +1,13 @@
+import numpy as np
+
+from generators import barabasi_albert
+
+
+def test_barabasi_albert_links_point_back_at_scale():
+    # Pointer jumping once read a link cleared in the same round: forward edges, or no return at all (seed=1)
+    for seed in (0, 1, 2, 3):
+        edges = barabasi_albert(20_000, seed=seed)
+        new = edges[edges[:, 0] >= 4]
+        assert len(new) == (20_000 - 4) * 4
+        assert (new[:, 1] >= 0).all()
+        assert (new[:, 1] < new[:, 0]).all()
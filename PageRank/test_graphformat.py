@@ -0,0 +1,20 @@
+import numpy as np
+import pytest
+
+from graphformat import import_edge_list
+
+
+def test_index_of_text_labels_by_str_and_bytes(tmp_path):
+    path = tmp_path / "edges.txt"
+    path.write_text("alice bob\nbob carol\ncarol alice\n")
+    graph_file = import_edge_list(str(path), str(tmp_path / "cache"), numeric=False)
+
+    by_str = graph_file.index_of(["bob", "alice"])
+    assert (by_str == graph_file.index_of([b"bob", b"alice"])).all()
+    assert list(graph_file.label_of(by_str)) == [b"bob", b"alice"]
+    assert graph_file.index_of("carol") == graph_file.index_of(b"carol")
+
+    # "alicexyz" is wider than the stored S5 labels and must not match its truncation "alice"
+    for missing in (["alicexyz"], [b"alicexyz"], ["dave"]):
+        with pytest.raises(KeyError):
+            graph_file.index_of(missing)
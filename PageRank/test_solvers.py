@@ -0,0 +1,21 @@
+import numpy as np
+
+from generators import make_graph
+from rankengine import SparseGraph, pagerank
+from solvers import adaptive, power
+
+
+def test_adaptive_matches_power_on_scale_free_graph():
+    # Frozen rows once went stale here while adaptive still reported convergence (L1 error ~5e-2)
+    graph = make_graph("barabasi_albert", 1000, seed=0)
+    reference = power(graph, tol=1e-14, max_iter=10_000).ranks
+    result = adaptive(graph, tol=1e-8)
+    assert result.converged
+    assert np.abs(result.ranks - reference).sum() < 1e-7
+    assert np.abs(result.ranks - power(graph, tol=1e-8).ranks).sum() < 1e-7
+
+
+def test_empty_graph_ranks_to_empty_array():
+    graph = SparseGraph.from_edges([])
+    for result in (pagerank(graph), power(graph), adaptive(graph)):
+        assert result.ranks.shape == (0,)